@@ -0,0 +1,237 @@
+import glob
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from pipelines.features import CAT_FEATURES, NUM_FEATURES
+from pipelines.storage import _pyarrow
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_GLOB = "audit-*.parquet"
+OPEN_SUFFIX = ".open"
+
+
+def audit_schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [("ts", pa.timestamp("ms", tz="UTC")), ("model_version", pa.string())]
+        + [(column, pa.float64()) for column in NUM_FEATURES]
+        + [(column, pa.string()) for column in CAT_FEATURES]
+        + [("delay_probability", pa.float64()), ("delivery_delayed", pa.int8())]
+    )
+
+
+def _segment_name(started):
+    return f"audit-{datetime.fromtimestamp(started, timezone.utc):%Y%m%dT%H%M%S%f}.parquet"
+
+
+def _segment_start(path):
+    stamp = os.path.basename(path)[len("audit-"):-len(".parquet")]
+    return datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").replace(tzinfo=timezone.utc).timestamp()
+
+
+class AuditLog:
+    """
+    Append-only log of every scored order for drift monitoring.
+
+    `record()` only appends to an in-memory buffer; a background thread
+    flushes it every `flush_interval` seconds as one Parquet row group of the
+    open segment (`audit-<start>.parquet.open`). A segment is closed, and
+    renamed to `.parquet` so readers can see it, once it holds
+    `segment_rows` rows or is `segment_seconds` old. Closed segments older
+    than `retention_days` are deleted. When more than `max_pending` rows are
+    waiting, new rows are dropped and counted instead of growing memory.
+    """
+
+    def __init__(self, path, flush_interval=1.0, segment_rows=100_000, segment_seconds=3600,
+                 retention_days=30, max_pending=100_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.segment_rows = segment_rows
+        self.segment_seconds = segment_seconds
+        self.retention_days = retention_days
+        self.max_pending = max_pending
+        os.makedirs(path, exist_ok=True)
+
+        self.schema = audit_schema()
+        self.columns = self.schema.names
+        self.written = 0
+        self.dropped = 0
+        self.segments_closed = 0
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._segment = None
+        self._segment_rows = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._recover()
+
+    def _recover(self):
+        # A crash leaves `.open` segments without a Parquet footer; they are unreadable
+        for path in glob.glob(os.path.join(self.path, SEGMENT_GLOB + OPEN_SUFFIX)):
+            logger.warning(f"Discarding unfinished audit segment {path}")
+            os.remove(path)
+
+    # ---------------------------------------------------
+    # Request Path
+    # ---------------------------------------------------
+    def record(self, features, result):
+        """Queue one scored order; never touches disk."""
+        row = (time.time(), features, result)
+        with self._lock:
+            if len(self._buffer) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+
+    # ---------------------------------------------------
+    # Writer
+    # ---------------------------------------------------
+    def _to_table(self, rows):
+        pa = _pyarrow()
+        data = {
+            "ts": [int(ts * 1000) for ts, _, _ in rows],
+            "model_version": [result.get("model_version") for _, _, result in rows],
+        }
+        for column in NUM_FEATURES + CAT_FEATURES:
+            data[column] = [features.get(column) for _, features, _ in rows]
+        data["delay_probability"] = [result["delay_probability"] for _, _, result in rows]
+        data["delivery_delayed"] = [result["delivery_delayed"] for _, _, result in rows]
+        return pa.Table.from_pydict(data, schema=self.schema)
+
+    def flush(self):
+        """Write buffered rows to the open segment and apply the rotation policy."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+
+        with self._write_lock:
+            if rows:
+                if self._writer is None:
+                    self._open_segment()
+                self._writer.write_table(self._to_table(rows))
+                self._segment_rows += len(rows)
+                self.written += len(rows)
+
+            if self._writer is not None and (
+                self._segment_rows >= self.segment_rows
+                or time.time() - self._segment_started >= self.segment_seconds
+            ):
+                self._close_segment()
+        return len(rows)
+
+    def _open_segment(self):
+        self._segment_started = time.time()
+        self._segment = os.path.join(self.path, _segment_name(self._segment_started))
+        self._writer = _pyarrow().parquet.ParquetWriter(self._segment + OPEN_SUFFIX, self.schema)
+        self._segment_rows = 0
+
+    def _close_segment(self):
+        self._writer.close()
+        os.replace(self._segment + OPEN_SUFFIX, self._segment)
+        self._writer = None
+        self.segments_closed += 1
+        self._apply_retention()
+
+    def rotate(self):
+        """Flush and close the open segment now, making it visible to readers."""
+        self.flush()
+        with self._write_lock:
+            if self._writer is not None:
+                self._close_segment()
+
+    def _apply_retention(self):
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        for path in list_segments(self.path):
+            if _segment_start(path) < cutoff:
+                os.remove(path)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Audit log flush failed")
+
+        self._thread = threading.Thread(target=loop, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.rotate()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "pending": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "segments_closed": self.segments_closed,
+            "open_segment_rows": self._segment_rows if self._writer is not None else 0,
+        }
+
+
+# ---------------------------------------------------
+# Reader
+# ---------------------------------------------------
+def list_segments(path):
+    """Closed segments, oldest first."""
+    return sorted(glob.glob(os.path.join(path, SEGMENT_GLOB)))
+
+
+def _utc(value):
+    import pandas as pd
+
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+def iter_segments(path, start=None, end=None, columns=None):
+    """
+    Yield closed segments as DataFrames, oldest first.
+
+    `start` / `end` (anything pandas.Timestamp accepts, UTC) keep rows whose
+    `ts` falls in [start, end); segments that start after `end` are skipped
+    without being read.
+    """
+    start, end = _utc(start), _utc(end)
+    names = audit_schema().names
+    read_columns = None if columns is None else [name for name in names if name in columns or name == "ts"]
+
+    for segment in list_segments(path):
+        if end is not None and _segment_start(segment) >= end.timestamp():
+            break
+        df = _pyarrow().parquet.read_table(segment, columns=read_columns).to_pandas()
+        if start is not None:
+            df = df[df["ts"] >= start]
+        if end is not None:
+            df = df[df["ts"] < end]
+        if len(df):
+            yield df[columns] if columns is not None else df
+
+
+def read_audit(path, start=None, end=None, columns=None):
+    """All audited orders in [start, end) as one DataFrame, e.g. drift `current_data`."""
+    import pandas as pd
+
+    frames = list(iter_segments(path, start, end, columns))
+    if not frames:
+        return audit_schema().empty_table().to_pandas()[columns or audit_schema().names]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+
+from api.schemas import PredictionInput
+
+# ---------------------------------------------------
+# Supported Batch Payload Formats
+# ---------------------------------------------------
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+CSV_TYPES = ("text/csv", "application/csv")
+
+
+class BatchFormatError(ValueError):
+    """Raised when a batch body cannot be split into individual orders."""
+
+
+def _media_type(content_type):
+    return (content_type or "application/json").split(";")[0].strip().lower()
+
+
+def _parse_json(text):
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise BatchFormatError(f"Invalid JSON body: {exc}") from exc
+
+    if not isinstance(items, list):
+        raise BatchFormatError("JSON batch body must be an array of orders")
+    return items
+
+
+def _parse_ndjson(text):
+    items = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as exc:
+            # Keep the slot so later results stay aligned with input order
+            items.append(BatchFormatError(f"Invalid JSON on line {line_no}: {exc.msg}"))
+    return items
+
+
+def _parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise BatchFormatError("CSV batch body must start with a header row")
+
+    # Empty cells mean "not provided" (e.g. order_value left blank)
+    return [
+        {key.strip(): value for key, value in row.items() if key and value not in ("", None)}
+        for row in reader
+    ]
+
+
+def parse_batch_body(body, content_type):
+    """Split a raw request body into a list of un-validated order items."""
+    media_type = _media_type(content_type)
+    text = body.decode("utf-8-sig")
+
+    if media_type in NDJSON_TYPES:
+        return _parse_ndjson(text)
+    if media_type in CSV_TYPES:
+        return _parse_csv(text)
+    if media_type in JSON_TYPES:
+        return _parse_json(text)
+
+    raise BatchFormatError(f"Unsupported batch content type: {media_type}")
+
+
+def validate_batch(items):
+    """
+    Validate each item independently.
+
+    Returns (valid, errors): `valid` is a list of (index, PredictionInput) and
+    `errors` a list of per-item error dicts, both keyed by input position.
+    """
+    valid, errors = [], []
+
+    for index, item in enumerate(items):
+        if isinstance(item, BatchFormatError):
+            errors.append({"index": index, "error": [{"msg": str(item)}]})
+            continue
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": [{"msg": "Order must be a JSON object"}]})
+            continue
+        try:
+            valid.append((index, PredictionInput.parse_obj(item)))
+        except ValidationError as exc:
+            errors.append({"index": index, "error": exc.errors()})
+
+    return valid, errors
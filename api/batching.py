@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+
+from api.executor import InferenceSaturated
+from api.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-order requests into one scoring call.
+
+    The first queued request opens a batch; the batch is dispatched once
+    `window_ms` has elapsed or `max_batch_size` requests have joined,
+    whichever comes first. `score_fn` is a coroutine function that receives
+    the list of records and returns one result per record, in order. Once
+    `max_queue_size` requests are waiting, new ones are rejected with
+    InferenceSaturated.
+    """
+
+    def __init__(self, score_fn, window_ms=2.0, max_batch_size=64, max_in_flight=1,
+                 max_queue_size=1024, retry_after=1):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max_in_flight
+        self.max_queue_size = max_queue_size
+        self.retry_after = retry_after
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self.batches = 0
+        self.failures = 0
+
+        self._queue = None
+        self._slots = None
+        self._task = None
+        self._pending = set()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def submit(self, record):
+        if self.queue_depth >= self.max_queue_size:
+            raise InferenceSaturated(
+                f"Micro-batch queue is full ({self.queue_depth})",
+                retry_after=self.retry_after
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, batch):
+        batch.append(await self._queue.get())
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before sleeping on the window
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                self._abort(batch)
+                raise
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _abort(self, batch):
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher is shutting down"))
+
+    async def _dispatch(self, batch):
+        try:
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self.wait_ms.observe((dispatched_at - enqueued_at) * 1000.0)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+
+            records = [record for record, _, _ in batch]
+            try:
+                results = await self.score_fn(records)
+            except Exception as exc:
+                self.failures += 1
+                if not isinstance(exc, InferenceSaturated):
+                    logger.exception("Micro-batch scoring failed")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+            for (_, future, _), result in zip(batch, results):
+                # The caller may have disconnected while the batch was scored
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self.queue_depth,
+            "in_flight": len(self._pending),
+            "batches": self.batches,
+            "failures": self.failures,
+            "batch_size": self.batch_sizes.as_dict(),
+            "wait_ms": self.wait_ms.as_dict(),
+        }
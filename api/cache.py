@@ -0,0 +1,181 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_key(record, model_token):
+    """
+    Stable hash of a prepared feature dict (order_value already derived).
+
+    Keys are sorted and serialized compactly so logically identical orders
+    hash the same regardless of field order in the request. The model token
+    is part of the key, so entries never outlive the model that produced them.
+    """
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(f"{model_token}|{payload}".encode(), digest_size=16).hexdigest()
+
+
+class LocalCache:
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteCache:
+    """
+    File-backed cache shared by every uvicorn worker on the same host.
+
+    Values are stored as JSON with an absolute expiry timestamp. Expired
+    rows and rows beyond `max_rows` are purged every `purge_every` writes.
+    """
+
+    def __init__(self, path, ttl=300.0, max_rows=100000, purge_every=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.purge_every = purge_every
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prediction_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM prediction_cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prediction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._purge()
+
+    def _purge(self):
+        expired = self._conn.execute(
+            "DELETE FROM prediction_cache WHERE expires_at < ?", (time.time(),)
+        ).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM prediction_cache WHERE key IN ("
+            "SELECT key FROM prediction_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        ).rowcount
+        self.evictions += expired + overflow
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PredictionCache:
+    """
+    Two-tier prediction cache: a local LRU/TTL map in front of an optional
+    shared SqliteCache. Shared hits are copied into the local tier.
+
+    `bind_model()` must be called with a token identifying the loaded model;
+    changing the token drops the local tier, and the token is part of every
+    key so shared entries from other models are never served.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0, shared=None):
+        self.local = LocalCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.model_token = None
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def bind_model(self, model_token):
+        if model_token != self.model_token:
+            self.local.clear()
+            self.model_token = model_token
+
+    def key(self, record):
+        return canonical_key(record, self.model_token)
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(value)
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.local),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "shared_evictions": self.shared.evictions if self.shared is not None else None,
+        }
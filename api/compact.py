@@ -0,0 +1,150 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+# Rows traversed per block in predict_proba; bounds the (rows x trees) node matrix
+COMPACT_BLOCK_ROWS = 4096
+
+
+def _floor_float32(values):
+    """Largest float32 <= each float64 value."""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest(ClassifierMixin, BaseEstimator):
+    """
+    A fitted tree ensemble flattened into a few float32 / int32 arrays.
+
+    sklearn stores about 80 bytes per node: int64 children and feature ids,
+    a float64 threshold, impurity and sample counts, plus float64 class
+    values. Serving only needs the children, the feature id, the threshold
+    and the leaf class probabilities, which take about a third of that.
+
+    sklearn casts inputs to float32 and tests `x <= threshold`. For a float32
+    `x` that is the same test as `x <= floor32(threshold)`, so rounding the
+    thresholds down keeps every split decision identical. Only the leaf
+    probabilities lose precision, at about 1e-7.
+    """
+
+    def __init__(self, children_left, children_right, feature, threshold, value,
+                 roots, classes, n_features_in):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.n_features_in = n_features_in
+
+    @property
+    def classes_(self):
+        return self.classes
+
+    @property
+    def n_features_in_(self):
+        return self.n_features_in
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Flatten a fitted RandomForest / ExtraTrees classifier (or a single tree)."""
+        trees = getattr(forest, "estimators_", None) or [forest]
+        if not all(hasattr(tree, "tree_") for tree in trees):
+            raise ValueError(f"Cannot compact {type(forest).__name__}: not a tree ensemble")
+
+        lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            t = tree.tree_
+            internal = t.children_left >= 0
+            lefts.append(np.where(internal, t.children_left + offset, -1))
+            rights.append(np.where(internal, t.children_right + offset, -1))
+            features.append(np.where(internal, t.feature, -1))
+            thresholds.append(np.where(internal, t.threshold, 0.0))
+
+            # Classifier leaves hold class counts or fractions depending on the
+            # sklearn version; normalise to probabilities either way
+            value = t.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            values.append(value / np.where(totals == 0, 1, totals))
+
+            roots.append(offset)
+            offset += t.node_count
+
+        feature = np.concatenate(features)
+        feature_dtype = np.int16 if forest.n_features_in_ < np.iinfo(np.int16).max else np.int32
+        return cls(
+            children_left=np.concatenate(lefts).astype(np.int32),
+            children_right=np.concatenate(rights).astype(np.int32),
+            feature=feature.astype(feature_dtype),
+            threshold=_floor_float32(np.concatenate(thresholds)),
+            value=np.concatenate(values).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(forest.classes_),
+            n_features_in=forest.n_features_in_
+        )
+
+    def fit(self, X, y, forest=None):
+        """
+        Fit `forest` (default: RandomForestClassifier()) on X, y and take
+        over its flattened arrays, so a pipeline ending in a CompactForest
+        can be refitted like any other.
+        """
+        if forest is None:
+            from sklearn.ensemble import RandomForestClassifier
+            forest = RandomForestClassifier()
+        self.set_params(**CompactForest.from_forest(forest.fit(X, y)).get_params())
+        return self
+
+    # Lets it sit as the final step of a fitted sklearn Pipeline
+    def __sklearn_is_fitted__(self):
+        return True
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(
+            array.nbytes for array in
+            (self.children_left, self.children_right, self.feature, self.threshold, self.value, self.roots)
+        )
+
+    def _leaves(self, X):
+        # Every (row, tree) pair walks down one level per step; pairs that
+        # reached a leaf drop out, so the work is the total path length
+        n_rows = len(X)
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), self.n_trees)
+        X = X.ravel()
+        n_features = self.n_features_in_
+
+        active = np.flatnonzero(self.feature[nodes] >= 0)
+        while active.size:
+            current = nodes[active]
+            values = X[rows[active] * n_features + self.feature[current]]
+            current = np.where(
+                values <= self.threshold[current],
+                self.children_left[current],
+                self.children_right[current]
+            )
+            nodes[active] = current
+            active = active[self.feature[current] >= 0]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+
+        proba = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), COMPACT_BLOCK_ROWS):
+            leaves = self._leaves(X[start:start + COMPACT_BLOCK_ROWS])
+            proba[start:start + len(leaves)] = self.value[leaves].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceSaturated(RuntimeError):
+    """Raised when inference work is rejected because the queue is full."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def set_model_n_jobs(pipeline, n_jobs):
+    """Pin the final estimator's n_jobs so pool workers don't oversubscribe cores."""
+    estimator = pipeline[-1] if hasattr(pipeline, "steps") else pipeline
+    if n_jobs is not None and hasattr(estimator, "n_jobs"):
+        estimator.n_jobs = n_jobs
+    return pipeline
+
+
+# ---------------------------------------------------
+# Process Pool Worker State
+# ---------------------------------------------------
+_worker_config = {}
+_worker_scorer = None
+_worker_model = None
+
+
+def _init_worker(model, threshold, compiled, n_jobs):
+    _worker_config.update(threshold=threshold, compiled=compiled, n_jobs=n_jobs)
+    _load_worker_model(model)
+
+
+def _load_worker_model(model):
+    global _worker_scorer, _worker_model
+    from api.model import load_model
+    from api.scoring import Scorer
+
+    model_path, version = model
+    pipeline = set_model_n_jobs(load_model(model_path), _worker_config["n_jobs"])
+    _worker_scorer = Scorer(
+        pipeline,
+        threshold=_worker_config["threshold"],
+        compiled=_worker_config["compiled"],
+        version=version
+    )
+    _worker_model = model
+
+
+def _worker_ready():
+    return _worker_model
+
+
+def _score_in_worker(model, records):
+    # Each worker keeps one deserialized model and reloads only when it changes
+    if model != _worker_model:
+        _load_worker_model(model)
+    timings = {}
+    return _worker_scorer.score(records, timings), timings
+
+
+def _timed(fn, *args):
+    """Run fn in the pool and report how long it was busy there."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+# ---------------------------------------------------
+# Inference Executor
+# ---------------------------------------------------
+class InferenceExecutor:
+    """
+    Runs model scoring on a dedicated pool, away from the event loop.
+
+    kind="thread" calls `score_fn(records)` on a private thread pool.
+    kind="process" scores inside worker processes that each load the model
+    pickle once, and again only after `use_model()` points them elsewhere.
+    Workers load through `api.model.load_model`, so with MODEL_MMAP they
+    share the artifact's memory-mapped arrays instead of holding a copy
+    each. At most `max_pending` calls may be queued or running; beyond that
+    `score()` raises InferenceSaturated so the API can shed load.
+
+    `on_timings(timings, model_version, rows)` is called after every scoring
+    call with the seconds spent waiting for a worker ("queue") and, for
+    process workers, the scorer's own stage timings.
+    """
+
+    def __init__(self, score_fn=None, kind="thread", max_workers=2, max_pending=None,
+                 model_path=None, model_version=None, threshold=0.5, compiled=False,
+                 n_jobs=1, retry_after=1, on_timings=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+        if kind == "thread" and score_fn is None:
+            raise ValueError("A thread executor needs a score_fn")
+        if kind == "process" and model_path is None:
+            raise ValueError("A process executor needs a model_path")
+
+        self.kind = kind
+        self.score_fn = score_fn
+        self.model = (model_path, model_version)
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self.retry_after = retry_after
+        self.on_timings = on_timings
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="inference")
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model, threshold, compiled, n_jobs)
+            )
+
+    def use_model(self, model_path, model_version=None):
+        """Route subsequent process-pool calls to another model artifact."""
+        self.model = (model_path, model_version)
+
+    async def score(self, records):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceSaturated(
+                f"Inference queue is full ({self.pending}/{self.max_pending})",
+                retry_after=self.retry_after
+            )
+
+        loop = asyncio.get_running_loop()
+        model = self.model
+        self.pending += 1
+        try:
+            submitted = time.perf_counter()
+            if self.kind == "thread":
+                results, busy = await loop.run_in_executor(self._pool, _timed, self.score_fn, records)
+                timings = {}
+            else:
+                (results, timings), busy = await loop.run_in_executor(
+                    self._pool, _timed, _score_in_worker, model, records
+                )
+            if self.on_timings is not None:
+                # Includes pickling to and from process workers
+                timings["queue"] = time.perf_counter() - submitted - busy
+                self.on_timings(timings, model[1], len(records))
+            return results
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def warm_up(self):
+        """Start every worker process up front so the first requests don't pay for model loading."""
+        if self.kind == "process":
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[
+                loop.run_in_executor(self._pool, _worker_ready)
+                for _ in range(self.max_workers)
+            ])
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,198 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+
+# Loggers uvicorn configures before the app is imported; routed through our queue
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line.
+
+    Structured fields passed as `extra={"fields": {...}}` are merged into the
+    object; they are serialized here, on the listener thread, not by the caller.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable format, with structured fields appended."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(levelname)s - %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        return f"{line} {json.dumps(fields, default=str)}" if fields else line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Records are put on a bounded queue; when the writer falls behind they are
+    dropped and counted instead of stalling request handling.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve %-args and tracebacks now (they may not pickle or may change),
+        # but leave JSON formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level="INFO", fmt="json", queue_size=10000, stream=None, access_log=True):
+    """
+    Send all logging through a bounded queue drained by a background thread.
+
+    `fmt` is "json" (one object per line) or "text". With `access_log=False`
+    uvicorn's line-per-request access log is silenced. Calling it again
+    replaces the previous configuration. Returns the queue handler.
+    """
+    global _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    # Stopped at exit so records logged during server shutdown are still written
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, DroppingQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(str(level).upper())
+
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").disabled = not access_log
+    return handler
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# ---------------------------------------------------
+# Prediction Log
+# ---------------------------------------------------
+class PredictionLog:
+    """
+    Aggregates predictions instead of logging one line per request.
+
+    Every `interval` seconds a single "Prediction summary" record carries
+    the count, mean delay probability, delayed share and error count for
+    that interval. A `sample_rate` share of requests is additionally logged
+    with its payload and result (0 disables payload logging).
+    """
+
+    def __init__(self, logger, sample_rate=0.0, interval=60.0):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.probability_sum = 0.0
+        self.delayed = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def record(self, payload, result=None, error=None):
+        with self._lock:
+            if error is not None:
+                self.errors += 1
+            elif result is not None:
+                self.count += 1
+                self.probability_sum += result["delay_probability"]
+                self.delayed += result["delivery_delayed"]
+
+        if self.sample_rate and random.random() < self.sample_rate:
+            fields = {"payload": payload, "result": result}
+            if error is not None:
+                fields["error"] = str(error)
+            self.logger.info("Prediction sample", extra={"fields": fields})
+
+    def flush(self):
+        with self._lock:
+            count, probability_sum, delayed, errors = self.count, self.probability_sum, self.delayed, self.errors
+            seconds = time.monotonic() - self.started
+            self._reset()
+
+        if count or errors:
+            self.logger.info("Prediction summary", extra={"fields": {
+                "interval_seconds": round(seconds, 1),
+                "count": count,
+                "mean_probability": round(probability_sum / count, 4) if count else None,
+                "delayed_rate": round(delayed / count, 4) if count else None,
+                "errors": errors,
+            }})
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, name="prediction-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -1,20 +1,56 @@
-from fastapi import FastAPI
+import time
+
+# Measured so startup can report how long imports took
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from api.schemas import PredictionInput
-from api.model import load_model
+from api.model import (
+    MODEL_DIR, MODEL_NAME, MODEL_PATH, MODEL_REGISTRY_DIR, MODEL_STAGE, check_model_config
+)
+from api.model_manager import ModelManager, ModelVersionNotFound
+from api.batch import BatchFormatError, parse_batch_body, validate_batch
+from api.scoring import Scorer
+from api.batching import MicroBatcher
+from api.executor import InferenceExecutor, InferenceSaturated, set_model_n_jobs
+from api.cache import PredictionCache, SqliteCache
+from api.metrics import CONTENT_TYPE, ApiMetrics, MetricsMiddleware
+from api.log import PredictionLog, setup_logging
+from pipelines.features import order_features
 
-import pandas as pd
+import asyncio
 import logging
+import os
+from typing import List
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 # ---------------------------------------------------
 # Logging Configuration
 # ---------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Records go through a bounded queue and are written by a background thread,
+# as JSON lines (LOG_FORMAT=json) or the plain text format (LOG_FORMAT=text)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# uvicorn's access log writes a line per request; /metrics has per-route counts
+LOG_ACCESS = os.getenv("LOG_ACCESS", "false").lower() == "true"
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, access_log=LOG_ACCESS)
 
 logger = logging.getLogger(__name__)
 
+# Predictions are logged as one summary per interval (0 disables); a sampled
+# share of requests is also logged with its payload (0 disables)
+LOG_SUMMARY_INTERVAL = float(os.getenv("LOG_SUMMARY_INTERVAL", "60"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0"))
+prediction_log = PredictionLog(
+    logging.getLogger("api.predictions"), sample_rate=LOG_SAMPLE_RATE, interval=LOG_SUMMARY_INTERVAL
+)
+
 # ---------------------------------------------------
 # FastAPI App
 # ---------------------------------------------------
@@ -35,48 +71,547 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------------------------------------------
+# Metrics Middleware
+# ---------------------------------------------------
+# Per-route latency, status counts, in-flight requests and prediction stage
+# timings, served by /metrics. Counters are per process: with several uvicorn
+# workers, scrape each one or aggregate in Prometheus.
+metrics = ApiMetrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # ---------------------------------------------------
 # Load ML Model on Startup
 # ---------------------------------------------------
-model = None  # sklearn pipeline
+model_manager = None  # serves the active model version and hot-swaps new ones
+
+# Seconds between checks of MODEL_DIR / MODEL_PATH / the registry for new artifacts (0 disables)
+MODEL_POLL_INTERVAL = float(os.getenv("MODEL_POLL_INTERVAL", "30"))
+
+# Load the model when this module is imported rather than at startup, so a
+# pre-forking server (gunicorn --preload) shares it copy-on-write across workers
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "false").lower() == "true"
+
+# Probability above which an order is labelled as delayed
+PREDICTION_THRESHOLD = float(os.getenv("PREDICTION_THRESHOLD", "0.5"))
+
+# Flatten the fitted preprocessor into NumPy arrays for small requests
+SCORER_COMPILED = os.getenv("SCORER_COMPILED", "false").lower() == "true"
+
+# Inference pool: "thread" or "process", worker count, queue bound and
+# sklearn n_jobs per worker. Requests beyond the bound get a 503.
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "0")) or None
+INFERENCE_N_JOBS = int(os.getenv("INFERENCE_N_JOBS", "1"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "1"))
+executor = None
+
+# Micro-batching for /predict: coalescing window (0 disables) and batch cap
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+batcher = None
+
+# Prediction cache: local LRU entries (0 disables), TTL in seconds and an
+# optional sqlite file shared by all workers on the host
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+PREDICTION_CACHE_SQLITE = os.getenv("PREDICTION_CACHE_SQLITE")
+cache = None
+inflight = {}  # cache key -> task scoring that order right now
+
+# Upper bound on orders scored by a single /predict/batch call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# Customer feature store (python -m pipelines.feature_store); orders that send
+# customer_id without customer_risk_score are scored with the stored delay rate
+feature_store = None
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH")
+# Seconds between pulls of customers updated by the pipeline (0 disables)
+FEATURE_STORE_REFRESH = float(os.getenv("FEATURE_STORE_REFRESH", "60"))
+
+# Audit log of scored orders for drift monitoring (unset disables): written
+# in the background as Parquet segments, rotated by rows or age
+audit_log = None
+AUDIT_LOG_DIR = os.getenv("AUDIT_LOG_DIR")
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_SEGMENT_ROWS = int(os.getenv("AUDIT_SEGMENT_ROWS", "100000"))
+AUDIT_SEGMENT_SECONDS = float(os.getenv("AUDIT_SEGMENT_SECONDS", "3600"))
+AUDIT_RETENTION_DAYS = float(os.getenv("AUDIT_RETENTION_DAYS", "30"))
+
+# Drift reference written by model_train (<model>.drift.json); when set,
+# served features are sketched in memory and compared by GET /drift
+drift_monitor = None
+DRIFT_REFERENCE_PATH = os.getenv("DRIFT_REFERENCE_PATH")
+
+# Delay-rate cube (python -m pipelines.cube) served by GET /cube/rates;
+# reloaded when the file is replaced, checked every DELAY_CUBE_REFRESH seconds
+delay_cube = None
+DELAY_CUBE_PATH = os.getenv("DELAY_CUBE_PATH")
+DELAY_CUBE_REFRESH = float(os.getenv("DELAY_CUBE_REFRESH", "60"))
+
+
+def score_records(records):
+    # Read the active model once so a whole batch is scored by one version
+    scorer = model_manager.current.scorer
+    timings = {}
+    results = scorer.score(records, timings)
+    metrics.observe_stages(timings, scorer.version)
+    return results
+
+
+def build_scorer(pipeline, info):
+    pipeline = set_model_n_jobs(pipeline, INFERENCE_N_JOBS)
+    return Scorer(
+        pipeline,
+        threshold=PREDICTION_THRESHOLD,
+        compiled=SCORER_COMPILED,
+        version=info.version
+    )
+
+
+def on_model_swap(loaded):
+    metrics.set_model(loaded.version)
+    if cache is not None:
+        # Threshold is part of the token: it changes the cached label
+        cache.bind_model(f"{loaded.info.token}|{PREDICTION_THRESHOLD}")
+    if executor is not None:
+        executor.use_model(loaded.info.path, loaded.version)
+
+
+def create_model_manager():
+    check_model_config()
+    if MODEL_REGISTRY_DIR:
+        from pipelines.tracking import Tracker
+    return ModelManager(
+        build_scorer,
+        model_dir=MODEL_DIR,
+        model_path=MODEL_PATH,
+        warmup_records=[prepare_features(PredictionInput.parse_obj(WARMUP_ORDER))],
+        poll_interval=MODEL_POLL_INTERVAL,
+        on_swap=[on_model_swap],
+        registry=Tracker(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None,
+        model_name=MODEL_NAME,
+        model_stage=MODEL_STAGE
+    )
 
 
 @app.on_event("startup")
-def startup_event():
-    global model
-    model = load_model()
+async def startup_event():
+    global model_manager, executor, batcher, cache, feature_store, audit_log, drift_monitor, delay_cube
+    started = time.perf_counter()
+    prediction_log.start()
+
+    # Optional components import their dependencies (pandas, pyarrow, scipy)
+    # only when configured
+    if AUDIT_LOG_DIR:
+        from api.audit import AuditLog
+        audit_log = AuditLog(
+            AUDIT_LOG_DIR,
+            flush_interval=AUDIT_FLUSH_INTERVAL,
+            segment_rows=AUDIT_SEGMENT_ROWS,
+            segment_seconds=AUDIT_SEGMENT_SECONDS,
+            retention_days=AUDIT_RETENTION_DAYS
+        )
+        audit_log.start()
+
+    if DRIFT_REFERENCE_PATH:
+        from pipelines.drift import DriftMonitor, DriftProfile
+        drift_monitor = DriftMonitor(await run_in_threadpool(DriftProfile.load, DRIFT_REFERENCE_PATH))
+
+    if DELAY_CUBE_PATH:
+        from pipelines.cube import CubeReader
+        delay_cube = await run_in_threadpool(CubeReader, DELAY_CUBE_PATH)
+        if DELAY_CUBE_REFRESH > 0:
+            delay_cube.start_auto_refresh(DELAY_CUBE_REFRESH)
+
+    if FEATURE_STORE_PATH:
+        from pipelines.feature_store import CustomerFeatureStore
+        feature_store = await run_in_threadpool(CustomerFeatureStore, FEATURE_STORE_PATH)
+        if FEATURE_STORE_REFRESH > 0:
+            feature_store.start_auto_refresh(FEATURE_STORE_REFRESH)
+        logger.info(f"✅ Feature store loaded: {feature_store.stats()['customers']:,} customers")
+
+    if PREDICTION_CACHE_SIZE > 0:
+        shared = None
+        if PREDICTION_CACHE_SQLITE:
+            shared = SqliteCache(PREDICTION_CACHE_SQLITE, ttl=PREDICTION_CACHE_TTL)
+        cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL, shared=shared)
+
+    if model_manager is None:
+        model_manager = create_model_manager()
+    else:
+        # Preloaded before fork: the cache was created after the swap callback ran
+        on_model_swap(model_manager.current)
+    await run_in_threadpool(model_manager.start)
     logger.info("✅ ML model loaded successfully")
+    active = model_manager.current
+
+    executor = InferenceExecutor(
+        score_records,
+        kind=INFERENCE_EXECUTOR,
+        max_workers=INFERENCE_WORKERS,
+        max_pending=INFERENCE_MAX_PENDING,
+        model_path=active.info.path,
+        model_version=active.version,
+        threshold=PREDICTION_THRESHOLD,
+        compiled=SCORER_COMPILED,
+        n_jobs=INFERENCE_N_JOBS,
+        retry_after=INFERENCE_RETRY_AFTER,
+        on_timings=metrics.observe_stages
+    )
+    await executor.warm_up()
+    logger.info(f"Inference executor: {INFERENCE_EXECUTOR} x {INFERENCE_WORKERS}")
+
+    if MICROBATCH_WINDOW_MS > 0:
+        batcher = MicroBatcher(
+            executor.score,
+            window_ms=MICROBATCH_WINDOW_MS,
+            max_batch_size=MICROBATCH_MAX_SIZE,
+            max_in_flight=INFERENCE_WORKERS,
+            max_queue_size=executor.max_pending * MICROBATCH_MAX_SIZE,
+            retry_after=INFERENCE_RETRY_AFTER
+        )
+        await batcher.start()
+        logger.info(f"Micro-batching enabled: {MICROBATCH_WINDOW_MS} ms window, max {MICROBATCH_MAX_SIZE}")
+
+    logger.info(
+        f"Startup timings: imports {IMPORT_SECONDS * 1000:.0f} ms, "
+        f"model load {active.load_seconds * 1000:.0f} ms"
+        + (" (preloaded)" if MODEL_PRELOAD else "")
+        + f", startup {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if model_manager is not None:
+        model_manager.stop()
+    if batcher is not None:
+        await batcher.stop()
+    if executor is not None:
+        executor.shutdown()
+    if cache is not None and cache.shared is not None:
+        cache.shared.close()
+    if feature_store is not None:
+        feature_store.close()
+    if delay_cube is not None:
+        delay_cube.close()
+    if drift_monitor is not None:
+        drift_monitor.close()
+    prediction_log.stop()
+    if audit_log is not None:
+        await run_in_threadpool(audit_log.close)
+
+
+@app.exception_handler(InferenceSaturated)
+async def saturated_handler(request: Request, exc: InferenceSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# ---------------------------------------------------
+# Feature Preparation
+# ---------------------------------------------------
+# Scored on every candidate model before it is swapped in
+WARMUP_ORDER = PredictionInput.Config.json_schema_extra["example"]
+
+def derive_features(record):
+    # The active model's own feature step, so serving derives features exactly
+    # as training did; the plain defaults for models saved without one
+    active = model_manager.current if model_manager is not None else None
+    features = active.scorer.features if active is not None else None
+    return features.transform_record(record) if features is not None else order_features(record)
+
+
+def prepare_features(data: PredictionInput) -> dict:
+    data_dict = data.dict()
+
+    # Look up customer_risk_score when the caller did not send one
+    customer_id = data_dict.pop("customer_id", None)
+    if data_dict.get("customer_risk_score") is None:
+        if customer_id is None or feature_store is None:
+            raise ValueError(
+                "customer_risk_score is required"
+                + ("" if feature_store is None else " when customer_id is not given")
+            )
+        data_dict["customer_risk_score"] = feature_store.risk_score(customer_id)
+
+    # order_value, order_dayofweek, order_month and is_peak_season, where not provided
+    data_dict = derive_features(data_dict)
+    if data_dict.get("order_dayofweek") is None or data_dict.get("order_month") is None:
+        raise ValueError("order_date is required when order_dayofweek and order_month are not given")
+    # Derived features carry the date: orders on days with the same features share a cache entry
+    data_dict.pop("order_date", None)
+
+    return data_dict
+
+
+def observe_validation(request):
+    # Started by MetricsMiddleware: covers body read, JSON decoding and pydantic
+    started = getattr(request.state, "started", None)
+    if started is not None:
+        metrics.observe_stage("validation", time.perf_counter() - started)
+
+
+def json_response(content):
+    # What FastAPI does for a returned dict, timed as the serialization stage
+    started = time.perf_counter()
+    response = JSONResponse(jsonable_encoder(content))
+    metrics.observe_stage("serialization", time.perf_counter() - started)
+    return response
+
+
+if MODEL_PRELOAD:
+    model_manager = create_model_manager()
+    model_manager.refresh()
 
 # ---------------------------------------------------
 # Prediction Endpoint
 # ---------------------------------------------------
 @app.post("/predict")
-def predict_delay(data: PredictionInput):
-    data_dict = data.dict()
+async def predict_delay(data: PredictionInput, request: Request):
+    observe_validation(request)
+    try:
+        data_dict = prepare_features(data)
+    except ValueError as exc:
+        prediction_log.record(data.dict(), error=exc)
+        raise HTTPException(status_code=422, detail=str(exc))
 
-    # Calculate order_value if not provided
-    if data_dict.get("order_value") is None:
-        data_dict["order_value"] = data_dict["price"] * data_dict["quantity"]
+    try:
+        result = await cached_score(data_dict)
+    except Exception as exc:
+        prediction_log.record(data_dict, error=exc)
+        raise
+    record_prediction(data_dict, result)
+    return json_response(result)
 
-    logger.info(f"Prediction request received: {data_dict}")
 
-    input_df = pd.DataFrame([data_dict])
+def record_prediction(record, result):
+    prediction_log.record(record, result)
+    if audit_log is not None:
+        audit_log.record(record, result)
+    if drift_monitor is not None:
+        drift_monitor.add(record)
 
-    prediction = model.predict(input_df)[0]
-    probability = model.predict_proba(input_df)[0][1]
 
-    return {
-        "delivery_delayed": int(prediction),
-        "delay_probability": round(float(probability), 3)
-    }
+async def cached_score(data_dict):
+    if cache is None:
+        return await score_one(data_dict)
+
+    key = cache.key(data_dict)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Identical orders already being scored share that result
+    if key in inflight:
+        return dict(await asyncio.shield(inflight[key]))
+
+    task = asyncio.ensure_future(score_one(data_dict))
+    inflight[key] = task
+    try:
+        result = await asyncio.shield(task)
+        cache.set(key, result)
+        return result
+    finally:
+        inflight.pop(key, None)
+
+
+async def score_one(data_dict):
+    if batcher is not None:
+        return await batcher.submit(data_dict)
+    return (await executor.score([data_dict]))[0]
+
+# ---------------------------------------------------
+# Batch Prediction Endpoint
+# ---------------------------------------------------
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """
+    Score many orders in one call.
+
+    Accepts a JSON array (application/json), newline-delimited JSON
+    (application/x-ndjson) or a CSV file with a header row (text/csv).
+    Invalid orders are reported per item and do not fail the batch.
+    """
+    body = await request.body()
+
+    try:
+        items = parse_batch_body(body, request.headers.get("content-type"))
+    except (BatchFormatError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(items)} orders exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}"
+        )
+
+    valid, errors = validate_batch(items)
+    observe_validation(request)
+    logger.debug("Batch prediction request received: %d orders, %d invalid", len(items), len(errors))
+
+    results = [None] * len(items)
+    for error in errors:
+        results[error["index"]] = error
+
+    misses = []
+    for index, data in valid:
+        try:
+            record = prepare_features(data)
+        except ValueError as exc:
+            errors.append({"index": index, "error": [{"msg": str(exc)}]})
+            results[index] = errors[-1]
+            continue
+        key = cache.key(record) if cache is not None else None
+        cached = cache.get(key) if key is not None else None
+
+        if cached is not None:
+            results[index] = {"index": index, **cached}
+            record_prediction(record, cached)
+        else:
+            misses.append((index, key, record))
+
+    if misses:
+        scored = await executor.score([record for _, _, record in misses])
+        for (index, key, record), result in zip(misses, scored):
+            if key is not None:
+                cache.set(key, result)
+            results[index] = {"index": index, **result}
+            record_prediction(record, result)
+    for error in errors:
+        prediction_log.record(items[error["index"]], error=error["error"])
+
+    return json_response({
+        "count": len(items),
+        "scored": len(items) - len(errors),
+        "failed": len(errors),
+        "results": results
+    })
 
 # ---------------------------------------------------
 # Health Check Endpoint
 # ---------------------------------------------------
 @app.get("/health")
-def health_check():
+async def health_check():
+    # Async on purpose: answered on the event loop, never queued behind inference
     return {"status": "healthy"}
 
+# ---------------------------------------------------
+# Model Admin Endpoints
+# ---------------------------------------------------
+@app.get("/admin/models")
+def list_models():
+    return model_manager.describe()
+
+
+@app.post("/admin/models/rollback")
+def rollback_model():
+    try:
+        model_manager.rollback()
+    except ModelVersionNotFound as exc:
+        raise HTTPException(status_code=409, detail=str(exc.args[0]))
+    return model_manager.describe()
+
+
+@app.post("/admin/models/{version}/pin")
+def pin_model(version: str):
+    try:
+        model_manager.pin(version)
+    except ModelVersionNotFound:
+        raise HTTPException(status_code=404, detail=f"Model version '{version}' not found")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return model_manager.describe()
+
+
+@app.delete("/admin/models/pin")
+def unpin_model():
+    try:
+        model_manager.unpin()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return model_manager.describe()
+
+# ---------------------------------------------------
+# Runtime Stats Endpoint
+# ---------------------------------------------------
+@app.get("/stats")
+async def runtime_stats():
+    return {
+        "executor": executor.stats() if executor is not None else None,
+        "cache": cache.stats() if cache is not None else None,
+        "batcher": batcher.stats() if batcher is not None else None,
+        "feature_store": feature_store.stats() if feature_store is not None else None,
+        "audit_log": audit_log.stats() if audit_log is not None else None
+    }
+
+# ---------------------------------------------------
+# Drift Endpoint
+# ---------------------------------------------------
+@app.get("/drift")
+def drift_report(reset: bool = False):
+    """PSI / KS / chi-square of features served since the last reset; reset=true starts a new window."""
+    if drift_monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled (set DRIFT_REFERENCE_PATH)")
+    return drift_monitor.report(reset=reset)
+
+# ---------------------------------------------------
+# Delay-Rate Cube Endpoints
+# ---------------------------------------------------
+def current_cube():
+    if delay_cube is None:
+        raise HTTPException(status_code=404, detail="Delay-rate cube is disabled (set DELAY_CUBE_PATH)")
+    return delay_cube.cube
+
+
+@app.get("/cube")
+def cube_summary():
+    """Dimensions and their labels, totals and the newest order folded in."""
+    return current_cube().describe()
+
+
+@app.get("/cube/rates")
+def cube_rates(
+    group_by: List[str] = Query([]),
+    category: List[str] = Query(None),
+    customer_segment: List[str] = Query(None),
+    channel: List[str] = Query(None),
+    device_type: List[str] = Query(None),
+    order_month: List[str] = Query(None),
+    month_from: str = None,
+    month_to: str = None
+):
+    """
+    Delay rates per `group_by` combination, rolled up over the other dimensions.
+
+    Repeat a dimension to keep several labels (`channel=Email&channel=Social`);
+    `month_from` / `month_to` (YYYY-MM) bound order_month.
+    """
+    filters = {
+        "category": category,
+        "customer_segment": customer_segment,
+        "channel": channel,
+        "device_type": device_type,
+        "order_month": order_month,
+    }
+    filters = {dimension: labels for dimension, labels in filters.items() if labels}
+    try:
+        rows = current_cube().query(group_by, filters, month_from, month_to)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"group_by": group_by, "filters": filters, "rows": rows}
+
+# ---------------------------------------------------
+# Prometheus Metrics Endpoint
+# ---------------------------------------------------
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
 # ---------------------------------------------------
 # Root Endpoint
 # ---------------------------------------------------
@@ -0,0 +1,265 @@
+import bisect
+import threading
+import time
+
+# Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond stages up to slow batch requests
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# Stages of a prediction, in request order
+STAGES = ["validation", "queue", "dataframe", "preprocessing", "inference", "serialization"]
+
+
+class Counter:
+    """Monotonic count. Safe to increment from several threads."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self.value)]
+
+
+class Gauge(Counter):
+    """Value that can go up and down (in-flight requests, info metrics)."""
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with cumulative counts, Prometheus style.
+
+    `buckets` are inclusive upper bounds; an implicit +Inf bucket catches the
+    rest. Safe to observe from several threads.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def as_dict(self):
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets + [float("inf")], self.counts):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 6),
+                "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+                "buckets": cumulative,
+            }
+
+    def samples(self, name, labels):
+        snapshot = self.as_dict()
+        samples = [
+            (f"{name}_bucket", {**labels, "le": bound}, count)
+            for bound, count in snapshot["buckets"].items()
+        ]
+        samples.append((f"{name}_sum", labels, self.sum))
+        samples.append((f"{name}_count", labels, self.count))
+        return samples
+
+
+# ---------------------------------------------------
+# Labelled Metric Families
+# ---------------------------------------------------
+class MetricFamily:
+    """One named metric with a child per distinct label combination."""
+
+    def __init__(self, name, documentation, kind, labelnames=(), factory=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.factory = factory
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, self.factory())
+        return child
+
+    def clear(self):
+        with self._lock:
+            self.children.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self.children.items()):
+            for name, labels, value in child.samples(self.name, dict(zip(self.labelnames, key))):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Registry:
+    """Metric families rendered together by /metrics."""
+
+    def __init__(self):
+        self.families = []
+
+    def _add(self, family):
+        self.families.append(family)
+        return family
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(MetricFamily(name, documentation, "counter", labelnames, Counter))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(MetricFamily(name, documentation, "gauge", labelnames, Gauge))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(MetricFamily(name, documentation, "histogram", labelnames, lambda: Histogram(buckets)))
+
+    def render(self):
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------
+# API Metrics
+# ---------------------------------------------------
+class ApiMetrics:
+    """
+    Request and prediction-stage metrics for the API.
+
+    Stage timings answer "where does a prediction spend its time":
+    validation (body read, JSON decoding and pydantic), queue (waiting for an
+    inference worker or micro-batch), dataframe (building the pandas input),
+    preprocessing (ColumnTransformer), inference (the model itself) and
+    serialization (rendering the JSON response). Stages run once per scoring
+    call, so a micro-batch of 20 requests records one inference observation.
+    """
+
+    def __init__(self):
+        self.registry = Registry()
+        self.requests = self.registry.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+        )
+        self.latency = self.registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+        )
+        self.in_flight = self.registry.gauge(
+            "http_requests_in_flight", "Requests currently being served"
+        )
+        self.stages = self.registry.histogram(
+            "prediction_stage_duration_seconds", "Time spent per prediction stage", ("stage", "model_version")
+        )
+        self.rows = self.registry.counter(
+            "predictions_total", "Orders scored by the model", ("model_version",)
+        )
+        self.model_info = self.registry.gauge(
+            "model_info", "Model version currently served (value is always 1)", ("version",)
+        )
+        self.model_version = None
+
+    def set_model(self, version):
+        self.model_version = version
+        self.model_info.clear()
+        self.model_info.labels(version=version).set(1)
+
+    def observe_stage(self, stage, seconds, version=None):
+        self.stages.labels(stage=stage, model_version=version or self.model_version).observe(seconds)
+
+    def observe_stages(self, timings, version=None, rows=None):
+        for stage, seconds in timings.items():
+            self.observe_stage(stage, seconds, version)
+        if rows is not None:
+            self.rows.labels(model_version=version or self.model_version).inc(rows)
+
+    def render(self):
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Routes are labelled by their path template (`/admin/models/{version}/pin`)
+    so label cardinality stays bounded; unknown paths share "unmatched". The
+    request start time is left in `request.state.started` for stage timings.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+        self._templates = None
+
+    def _route(self, scope):
+        if self._templates is None:
+            router = scope.get("app")
+            self._templates = {
+                getattr(route, "endpoint", None): route.path for route in getattr(router, "routes", [])
+            }
+        return self._templates.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope.setdefault("state", {})["started"] = started
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = self.metrics.in_flight.labels()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            route = self._route(scope)
+            method = scope["method"]
+            self.metrics.latency.labels(method=method, route=route).observe(time.perf_counter() - started)
+            self.metrics.requests.labels(method=method, route=route, status=status["code"]).inc()
@@ -1,28 +1,70 @@
 import os
-import joblib
+import sys
+import time
 from dotenv import load_dotenv
 
 # Load environment variables from .env
 load_dotenv()
 
-# Read model path from environment
+# Read model location from environment: a single artifact (MODEL_PATH)
+# or a directory of versioned artifacts (MODEL_DIR)
 MODEL_PATH = os.getenv("MODEL_PATH")
+MODEL_DIR = os.getenv("MODEL_DIR")
 
-if not MODEL_PATH:
-    raise ValueError(
-        "MODEL_PATH not found in environment variables. "
-        "Please set MODEL_PATH in .env file."
-    )
+# ...or the local model registry (pipelines/tracking.py): serve the version of
+# MODEL_NAME in MODEL_STAGE, resolved from the registry's sqlite file
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR")
+MODEL_NAME = os.getenv("MODEL_NAME", "DeliveryDelayModel")
+MODEL_STAGE = os.getenv("MODEL_STAGE", "production")
 
-def load_model():
-    if not os.path.exists(MODEL_PATH):
+# Memory-map numpy arrays out of uncompressed artifacts instead of reading
+# them into fresh buffers. Replace mapped files by rename, never in place.
+MODEL_MMAP = os.getenv("MODEL_MMAP", "false").lower() == "true"
+
+
+def check_model_config():
+    if not MODEL_PATH and not MODEL_DIR and not MODEL_REGISTRY_DIR:
+        raise ValueError(
+            "MODEL_PATH not found in environment variables. "
+            "Please set MODEL_PATH (or MODEL_DIR, or MODEL_REGISTRY_DIR) in .env file."
+        )
+
+
+def load_model(path=None, mmap=None):
+    # joblib (and sklearn through unpickling) is only imported when a model is loaded
+    import joblib
+
+    path = path or MODEL_PATH
+    mmap = MODEL_MMAP if mmap is None else mmap
+    if not path or not os.path.exists(path):
         raise FileNotFoundError(
-            f"Model file not found at path: {MODEL_PATH}"
+            f"Model file not found at path: {path}"
         )
 
-    print(f"✅ Loading model from: {MODEL_PATH}")
-    return joblib.load(MODEL_PATH)
+    print(f"✅ Loading model from: {path}" + (" (mmap)" if mmap else ""))
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def export_uncompressed(src, dst):
+    """
+    Re-save an artifact uncompressed so it can be loaded with MODEL_MMAP.
+
+    Written to a temporary file and renamed into place, so a directory
+    watched by the API never sees a half-written model.
+    """
+    import joblib
+
+    started = time.perf_counter()
+    model = joblib.load(src)
+    tmp_path = f"{dst}.tmp"
+    joblib.dump(model, tmp_path, compress=0)
+    os.replace(tmp_path, dst)
+    return time.perf_counter() - started
 
 
-# Load model once at startup
-model = load_model()
+if __name__ == "__main__":
+    # python -m api.model <src.pkl> <dst.pkl>
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m api.model <src.pkl> <dst.pkl>")
+    seconds = export_uncompressed(sys.argv[1], sys.argv[2])
+    print(f"✅ Wrote uncompressed model to {sys.argv[2]} in {seconds:.2f}s")
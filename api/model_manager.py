@@ -0,0 +1,335 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from api.model import load_model
+
+logger = logging.getLogger(__name__)
+
+MODEL_EXTENSIONS = (".pkl", ".joblib")
+PIN_FILE = ".pinned"
+
+
+class ModelVersionNotFound(KeyError):
+    """Raised when an admin action names a version that is not on disk."""
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    version: str
+    path: str
+    size: int
+    mtime_ns: int
+
+    @property
+    def token(self):
+        return f"{self.version}:{self.size}:{self.mtime_ns}"
+
+
+@dataclass
+class LoadedModel:
+    info: ModelVersion
+    pipeline: object
+    scorer: object
+    load_seconds: float = 0.0
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def version(self):
+        return self.info.version
+
+
+class ModelManager:
+    """
+    Loads, warms up and atomically swaps model versions.
+
+    With `model_dir`, every *.pkl / *.joblib file in the directory is a
+    version named after its file stem, and the newest one is served unless a
+    version is pinned. Pins are stored in `<model_dir>/.pinned`, so every
+    worker process watching the directory follows the same admin action.
+    With only `model_path`, that single file is watched and reloaded when it
+    is replaced.
+
+    With `registry` (a pipelines.tracking.Tracker), the registered versions of
+    `model_name` are the versions (named `v<n>`) and the one in
+    `model_stage` is served, falling back to the newest. Pinning promotes a
+    version to that stage in the registry, so workers and training jobs
+    sharing the registry follow it. Resolving the stage is a local sqlite
+    query, cheap enough to run on every poll.
+
+    A background thread polls every `poll_interval` seconds. Candidates are
+    loaded and scored on `warmup_records` off the request path. Only then is
+    `current` replaced, in one reference assignment. Requests already holding
+    the previous LoadedModel finish on it undisturbed. A version that fails
+    to load or warm up is skipped until its file changes again.
+    """
+
+    def __init__(self, scorer_factory, model_dir=None, model_path=None,
+                 warmup_records=None, poll_interval=30.0, on_swap=None,
+                 registry=None, model_name=None, model_stage="production"):
+        if not model_dir and not model_path and registry is None:
+            raise ValueError("ModelManager needs a model_dir, a model_path or a registry")
+        if registry is not None and not model_name:
+            raise ValueError("ModelManager needs a model_name to serve from a registry")
+
+        self.scorer_factory = scorer_factory
+        self.model_dir = model_dir
+        self.model_path = model_path
+        self.warmup_records = warmup_records or []
+        self.poll_interval = poll_interval
+        self.on_swap = on_swap or []
+        self.registry = registry
+        self.model_name = model_name
+        self.model_stage = model_stage
+
+        self.current = None
+        self.history = []  # versions served so far, oldest first
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------------------------------
+    # Discovery
+    # ---------------------------------------------------
+    def versions(self):
+        """Model versions on disk, oldest first."""
+        if self.registry is not None:
+            return self._registered_versions()
+        if self.model_dir:
+            paths = [
+                os.path.join(self.model_dir, name)
+                for name in os.listdir(self.model_dir)
+                if name.endswith(MODEL_EXTENSIONS)
+            ]
+        else:
+            paths = [self.model_path] if os.path.exists(self.model_path) else []
+
+        versions = []
+        for path in paths:
+            stat = os.stat(path)
+            versions.append(ModelVersion(
+                version=os.path.splitext(os.path.basename(path))[0],
+                path=path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns
+            ))
+        return sorted(versions, key=lambda v: (v.mtime_ns, v.version))
+
+    def _registered_versions(self):
+        versions = []
+        for model in self.registry.list_versions(self.model_name):
+            try:
+                stat = os.stat(model.path)
+            except FileNotFoundError:
+                logger.warning(f"Artifact of {self.model_name} v{model.version} missing: {model.path}")
+                continue
+            versions.append(ModelVersion(
+                version=f"v{model.version}",
+                path=model.path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns
+            ))
+        return versions
+
+    def pinned(self):
+        if self.registry is not None:
+            from pipelines.tracking import RegistryError
+
+            try:
+                return f"v{self.registry.get_version(self.model_name, stage=self.model_stage).version}"
+            except RegistryError:
+                return None
+        if not self.model_dir:
+            return None
+        try:
+            with open(os.path.join(self.model_dir, PIN_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _target(self):
+        versions = self.versions()
+        if not versions:
+            return None
+
+        pinned = self.pinned()
+        if pinned:
+            for info in versions:
+                if info.version == pinned:
+                    return info
+        # A registry serves only what was promoted: never an unpromoted version
+        if self.registry is not None:
+            if pinned:
+                logger.warning(
+                    f"{self.model_name} {pinned} in '{self.model_stage}' has no artifact, keeping current model"
+                )
+            return None
+        if pinned:
+            logger.warning(f"Pinned model version '{pinned}' not found, serving latest")
+
+        return versions[-1]
+
+    # ---------------------------------------------------
+    # Loading & Swapping
+    # ---------------------------------------------------
+    def _load(self, info):
+        started = time.perf_counter()
+        pipeline = load_model(info.path)
+        load_seconds = time.perf_counter() - started
+        scorer = self.scorer_factory(pipeline, info)
+
+        if self.warmup_records:
+            started = time.perf_counter()
+            scorer.score(self.warmup_records)
+            logger.info(
+                f"Warmed up model {info.version} in {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+
+        return LoadedModel(info=info, pipeline=pipeline, scorer=scorer, load_seconds=load_seconds)
+
+    def activate(self, info):
+        """Load `info` and swap it in. Raises if the model fails to load or warm up."""
+        with self._lock:
+            if self.current is not None and self.current.info == info:
+                return self.current
+
+            loaded = self._load(info)
+            previous, self.current = self.current, loaded
+            self.history.append(info.version)
+
+            for callback in self.on_swap:
+                callback(loaded)
+
+            logger.info(
+                f"✅ Serving model version {info.version}, loaded in {loaded.load_seconds * 1000:.0f} ms"
+                + (f" (was {previous.version})" if previous is not None else "")
+            )
+            return loaded
+
+    def refresh(self):
+        """Swap to the pinned or latest version if it differs from the one served."""
+        info = self._target()
+        if info is None:
+            if self.current is None:
+                if self.registry is not None:
+                    raise ModelVersionNotFound(
+                        f"No loadable {self.model_name} version in stage '{self.model_stage}': promote one first"
+                    )
+                raise FileNotFoundError("No model artifacts found")
+            return self.current
+        if (self.current is not None and self.current.info == info) or info in self._failed:
+            return self.current
+
+        try:
+            return self.activate(info)
+        except Exception:
+            self._failed.add(info)
+            logger.exception(f"Failed to load model version {info.version}, keeping current model")
+            if self.current is None:
+                raise
+            return self.current
+
+    def start(self):
+        # No-op when the active version was already loaded (e.g. preloaded before fork)
+        self.refresh()
+        if self.poll_interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Model watcher failed to refresh")
+
+    # ---------------------------------------------------
+    # Admin Actions
+    # ---------------------------------------------------
+    def _find(self, version):
+        for info in self.versions():
+            if info.version == version:
+                return info
+        raise ModelVersionNotFound(version)
+
+    def _write_pin(self, version):
+        if not self.model_dir:
+            return
+
+        pin_path = os.path.join(self.model_dir, PIN_FILE)
+        if version is None:
+            if os.path.exists(pin_path):
+                os.remove(pin_path)
+            return
+
+        tmp_path = f"{pin_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, pin_path)
+
+    def pin(self, version):
+        if not self.model_dir and self.registry is None:
+            raise ValueError("Pinning requires MODEL_DIR or a model registry")
+
+        info = self._find(version)
+        loaded = self.activate(info)
+        if self.registry is not None:
+            self.registry.transition(self.model_name, int(version[1:]), self.model_stage)
+        else:
+            self._write_pin(version)
+        return loaded
+
+    def unpin(self):
+        if self.registry is not None:
+            raise ValueError(f"Registry models follow the '{self.model_stage}' stage; promote a version instead")
+        self._write_pin(None)
+        self._failed.clear()
+        return self.refresh()
+
+    def rollback(self):
+        """
+        Pin the newest version older than the current one, in versions()
+        order: repeated rollbacks keep moving back, never forward.
+        """
+        current = self.current.version if self.current is not None else None
+        versions = self.versions()
+        names = [info.version for info in versions]
+        if current in names:
+            older = versions[:names.index(current)]
+        elif self.current is not None:
+            # Current artifact was removed: compare by the order versions() sorts in
+            info = self.current.info
+            older = [v for v in versions if (v.mtime_ns, v.version) < (info.mtime_ns, info.version)]
+        else:
+            older = versions
+        if not older:
+            raise ModelVersionNotFound("No earlier model version to roll back to")
+        return self.pin(older[-1].version)
+
+    def describe(self):
+        current = self.current.info if self.current is not None else None
+        pinned = self.pinned()
+        return {
+            "active": current.version if current else None,
+            "pinned": pinned,
+            "loaded_at": self.current.loaded_at if self.current else None,
+            "load_seconds": round(self.current.load_seconds, 4) if self.current else None,
+            "versions": [
+                {
+                    "version": info.version,
+                    "size_bytes": info.size,
+                    "modified": info.mtime_ns / 1e9,
+                    "active": info == current,
+                    "pinned": info.version == pinned,
+                }
+                for info in self.versions()
+            ],
+        }
@@ -1,4 +1,7 @@
 # Step 1.3: Define Input Schema
+from datetime import date, datetime
+from typing import Union
+
 from pydantic import BaseModel
 
 class PredictionInput(BaseModel):
@@ -8,9 +11,13 @@ class PredictionInput(BaseModel):
     customer_segment: str
     channel: str
     device_type: str
-    order_dayofweek: int
-    order_month: int
-    customer_risk_score: float
+    # Either pass order_date or order_dayofweek / order_month
+    order_date: Union[datetime, date] = None
+    order_dayofweek: int = None
+    order_month: int = None
+    # Either pass customer_risk_score or let the API look it up by customer_id
+    customer_risk_score: float = None
+    customer_id: int = None
     order_value: float = None
     
     class Config:
@@ -22,8 +29,7 @@ class PredictionInput(BaseModel):
                 "customer_segment": "Regular",
                 "channel": "Direct",
                 "device_type": "Mobile",
-                "order_dayofweek": 1,
-                "order_month": 11,
+                "order_date": "2024-11-05",
                 "customer_risk_score": 0.3,
                 "order_value": 59.98
             }
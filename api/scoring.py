@@ -0,0 +1,209 @@
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Requests up to this many rows use the compiled (pandas-free) path
+COMPILED_MAX_ROWS = 64
+
+
+class CompiledPreprocessor:
+    """
+    Flattened copy of a fitted ColumnTransformer.
+
+    StandardScaler statistics and OneHotEncoder category maps are pulled out
+    into plain NumPy arrays / dicts so a handful of records can be turned into
+    the model's feature matrix without building a DataFrame. Only the
+    transformers used by this project are supported; anything else raises
+    ValueError so the caller can fall back to the sklearn path.
+    """
+
+    def __init__(self, column_transformer):
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if not isinstance(column_transformer, ColumnTransformer):
+            raise ValueError("Only a fitted ColumnTransformer can be compiled")
+
+        self.blocks = []
+        self.n_features = 0
+
+        for name, transformer, columns in column_transformer.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            if not all(isinstance(column, str) for column in columns):
+                raise ValueError(f"Transformer '{name}' must select columns by name")
+
+            if transformer == "passthrough":
+                block = self._numeric_block(columns, None, None)
+            elif isinstance(transformer, StandardScaler):
+                block = self._numeric_block(columns, transformer.mean_, transformer.scale_)
+            elif isinstance(transformer, OneHotEncoder):
+                block = self._onehot_block(columns, transformer)
+            else:
+                raise ValueError(
+                    f"Cannot compile transformer '{name}' of type {type(transformer).__name__}"
+                )
+
+            self.blocks.append(block)
+            self.n_features += block["width"]
+
+    @staticmethod
+    def _numeric_block(columns, mean, scale):
+        width = len(columns)
+        return {
+            "kind": "numeric",
+            "columns": list(columns),
+            "mean": np.zeros(width) if mean is None else np.asarray(mean, dtype=float),
+            "scale": np.ones(width) if scale is None else np.asarray(scale, dtype=float),
+            "width": width,
+        }
+
+    @staticmethod
+    def _onehot_block(columns, encoder):
+        if getattr(encoder, "drop_idx_", None) is not None:
+            raise ValueError("OneHotEncoder with drop= is not supported")
+        if getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("OneHotEncoder with infrequent categories is not supported")
+
+        offsets, width = [], 0
+        for categories in encoder.categories_:
+            offsets.append({category: width + i for i, category in enumerate(categories)})
+            width += len(categories)
+
+        return {
+            "kind": "onehot",
+            "columns": list(columns),
+            "offsets": offsets,
+            "ignore_unknown": encoder.handle_unknown != "error",
+            "width": width,
+        }
+
+    def transform(self, records):
+        X = np.zeros((len(records), self.n_features))
+        start = 0
+
+        for block in self.blocks:
+            columns = block["columns"]
+
+            if block["kind"] == "numeric":
+                values = np.array(
+                    [[record[column] for column in columns] for record in records],
+                    dtype=float,
+                )
+                X[:, start:start + block["width"]] = (values - block["mean"]) / block["scale"]
+            else:
+                for row, record in enumerate(records):
+                    for column, offsets in zip(columns, block["offsets"]):
+                        position = offsets.get(record[column])
+                        if position is not None:
+                            X[row, start + position] = 1.0
+                        elif not block["ignore_unknown"]:
+                            raise ValueError(
+                                f"Found unknown category {record[column]!r} in column '{column}'"
+                            )
+
+            start += block["width"]
+
+        return X
+
+
+class Scorer:
+    """
+    Single-pass scoring layer around the sklearn pipeline.
+
+    The positive-class probability is computed once and the label is derived
+    from it, instead of running the pipeline for predict() and again for
+    predict_proba(). A label is 1 when the probability is strictly above
+    `threshold`, which matches the pipeline's own predict() at 0.5. When a
+    `version` is given it is echoed in every result as `model_version`.
+
+    `features` is the pipeline's leading order-feature step
+    (pipelines.feature_eng.OrderFeatureBuilder) or None for pipelines saved
+    without one. The compiled path runs its pure-Python `transform_record()`
+    before the compiled preprocessor.
+    """
+
+    def __init__(self, pipeline, threshold=0.5, compiled=False, version=None):
+        self.pipeline = pipeline
+        self.threshold = threshold
+        self.version = version
+        self.positive_index = self._positive_index(pipeline)
+        self.features = self._feature_step(pipeline)
+        self.compiled = None
+
+        if compiled:
+            try:
+                steps = [step for _, step in pipeline.steps]
+                if self.features is not None:
+                    steps = steps[1:]
+                if len(steps) != 2:
+                    raise ValueError("Expected a ([features,] preprocessor, model) pipeline")
+                self.compiled = CompiledPreprocessor(steps[0])
+                self.estimator = steps[1]
+            except (ValueError, TypeError, AttributeError) as exc:
+                logger.warning(f"Compiled scoring disabled, falling back to pandas path: {exc}")
+
+    @staticmethod
+    def _feature_step(pipeline):
+        steps = getattr(pipeline, "steps", None)
+        if steps and hasattr(steps[0][1], "transform_record"):
+            return steps[0][1]
+        return None
+
+    @staticmethod
+    def _positive_index(pipeline):
+        classes = list(getattr(pipeline, "classes_", [0, 1]))
+        return classes.index(1) if 1 in classes else len(classes) - 1
+
+    def predict_proba(self, records, timings=None):
+        """
+        Return the delay probability for each record as a NumPy array.
+
+        When a `timings` dict is given, seconds spent building the DataFrame,
+        preprocessing and running the model are added to it by stage name.
+        """
+        stages = []
+        started = time.perf_counter()
+        if self.compiled is not None and len(records) <= COMPILED_MAX_ROWS:
+            if self.features is not None:
+                records = [self.features.transform_record(record) for record in records]
+            X = self.compiled.transform(records)
+            stages.append(("preprocessing", time.perf_counter()))
+            estimator = self.estimator
+        else:
+            # pandas is only needed (and imported) on the DataFrame path
+            import pandas as pd
+            df = pd.DataFrame(records)
+            stages.append(("dataframe", time.perf_counter()))
+            X, estimator = df, self.pipeline
+            if hasattr(self.pipeline, "steps"):
+                # Same steps as pipeline.predict_proba, split so each can be timed
+                X, estimator = self.pipeline[:-1].transform(df), self.pipeline[-1]
+            stages.append(("preprocessing", time.perf_counter()))
+        probabilities = estimator.predict_proba(X)
+        stages.append(("inference", time.perf_counter()))
+
+        if timings is not None:
+            for stage, finished in stages:
+                timings[stage] = timings.get(stage, 0.0) + finished - started
+                started = finished
+        return probabilities[:, self.positive_index]
+
+    def score(self, records, timings=None):
+        probabilities = self.predict_proba(records, timings)
+        labels = probabilities > self.threshold
+
+        results = [
+            {
+                "delivery_delayed": int(label),
+                "delay_probability": round(float(probability), 3)
+            }
+            for label, probability in zip(labels, probabilities)
+        ]
+        if self.version is not None:
+            for result in results:
+                result["model_version"] = self.version
+        return results
@@ -0,0 +1,82 @@
+# Compare two benchmark result files and flag regressions.
+#
+# Usage:
+#   python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json \
+#       --threshold 0.10 --fail-on-regression
+
+import argparse
+import json
+import sys
+
+# Metric name suffixes where a larger number is better; everything else
+# timed (ms, seconds, MB) is better when smaller
+HIGHER_IS_BETTER = ("per_sec",)
+LOWER_IS_BETTER = ("_ms", "seconds", "_mb")
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def direction(metric):
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0  # counts and sizes of the run itself, not compared
+
+
+def compare(baseline, current, threshold=0.10):
+    """Rows of (metric, old, new, relative change, verdict) for metrics in both runs."""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        sign = direction(metric)
+        if sign == 0 or not old[metric]:
+            continue
+        change = (new[metric] - old[metric]) / abs(old[metric])
+        if sign * change < -threshold:
+            verdict = "REGRESSION"
+        elif sign * change > threshold:
+            verdict = "improved"
+        else:
+            verdict = ""
+        rows.append((metric, old[metric], new[metric], change, verdict))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change treated as noise")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for metric, old, new, change, verdict in rows:
+        print(f"{metric:<48} {old:>12.4g} {new:>12.4g} {change:>+8.1%}  {verdict}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
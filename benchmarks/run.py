@@ -0,0 +1,301 @@
+# Offline benchmark suite for the training pipeline and the serving path.
+#
+# Everything runs locally on synthetic orders (pipelines/synthetic.py):
+#   data_prep         pipelines.data_prep rows/sec on a generated raw CSV
+#   feature_eng       pipelines.feature_eng.load_features + OrderFeatureBuilder rows/sec
+#   training          pipelines.model_train baselines (no search), wall time
+#   model_load        artifact size, load time and RSS in a fresh interpreter
+#   cold_start        import + startup + first /predict in a fresh interpreter
+#   predict_latency   sequential single-row /predict percentiles through the ASGI app
+#   batch_throughput  /predict/batch rows/sec at several batch sizes
+#
+# Results go to benchmarks/results/<commit>.json. Compare two runs with
+#   python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+#
+# Usage:
+#   python -m benchmarks.run --rows 200000 --requests 500
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipelines.synthetic import write_orders
+
+SUITES = [
+    "data_prep", "feature_eng", "training", "model_load",
+    "cold_start", "predict_latency", "batch_throughput"
+]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Serving config used by every serving benchmark; recorded in the results
+SERVING_ENV = {
+    "MODEL_POLL_INTERVAL": "0",
+    "PREDICTION_CACHE_SIZE": "0",  # measure the model, not the cache
+    "MAX_BATCH_SIZE": "100000",
+}
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentiles(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p90_ms": round(float(np.percentile(samples, 90)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "max_ms": round(float(samples.max()), 3),
+    }
+
+
+def _records(X, n):
+    # JSON payloads: order_date as an ISO string, like API clients send it
+    head = X.head(n)
+    if "order_date" in head:
+        head = head.assign(order_date=pd.to_datetime(head["order_date"]).dt.strftime("%Y-%m-%dT%H:%M:%S"))
+    return head.to_dict("records")
+
+
+# ---------------------------------------------------
+# Training Pipeline
+# ---------------------------------------------------
+def bench_data_prep(workdir, rows):
+    from pipelines.data_prep import prepare_orders
+
+    raw_path = os.path.join(workdir, "orders_clean.csv")
+    processed_path = os.path.join(workdir, "orders_processed.parquet")
+    write_orders(raw_path, rows, missing_rate=0.01)
+
+    stats = prepare_orders(raw_path, processed_path)
+    return processed_path, {
+        "rows": stats["rows"],
+        "seconds": stats["seconds"],
+        "rows_per_sec": stats["rows_per_sec"],
+        "peak_rss_mb": stats["peak_rss_mb"],
+    }
+
+
+def bench_feature_eng(processed_path):
+    from pipelines.feature_eng import OrderFeatureBuilder, load_features
+
+    started = time.perf_counter()
+    X, y = load_features(processed_path)
+    OrderFeatureBuilder().transform(X)
+    seconds = time.perf_counter() - started
+    return (X, y), {
+        "rows": len(X),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(len(X) / seconds),
+    }
+
+
+def bench_training(workdir, processed_path, cores):
+    from pipelines.model_train import train
+
+    metrics = train(
+        data_path=processed_path,
+        output_path=os.path.join(workdir, "trained.pkl"),
+        cores=cores,
+        search=False
+    )
+    rows = metrics["data"]["train_rows"]
+    return {
+        "train_rows": rows,
+        "seconds": metrics["seconds"],
+        "rows_per_sec": round(rows / metrics["seconds"]),
+        "fit_seconds": {name: scores["fit_seconds"] for name, scores in metrics["models"].items()},
+    }
+
+
+def build_serving_model(workdir, features, max_rows=50_000):
+    """The serving benchmarks use a fixed model: the 200-tree forest from feature_eng."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from pipelines.feature_eng import build_model_pipeline
+
+    X, y = features
+    pipeline = build_model_pipeline(RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1))
+    pipeline.fit(X.head(max_rows), y.head(max_rows))
+    pipeline[-1].n_jobs = 1
+
+    path = os.path.join(workdir, "serving_model.pkl")
+    joblib.dump(pipeline, path)
+    return path
+
+
+# ---------------------------------------------------
+# Serving Path
+# ---------------------------------------------------
+def bench_model_load(model_path):
+    from pipelines.export import measure_load
+
+    runs = [measure_load(model_path) for _ in range(3)]
+    return {
+        "size_mb": round(os.path.getsize(model_path) / (1024 * 1024), 3),
+        "load_ms": round(min(run["load_seconds"] for run in runs) * 1000, 1),
+        "rss_mb": round(max(run["rss_mb"] for run in runs), 1),
+    }
+
+
+COLD_START_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from api.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    response = client.post("/predict", json=json.loads(sys.argv[1]))
+    first = time.perf_counter()
+    assert response.status_code == 200, response.text
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_predict_ms": (first - ready) * 1000,
+    "total_ms": (first - started) * 1000,
+}))
+"""
+
+
+def bench_cold_start(model_path, record):
+    env = {
+        **os.environ, **SERVING_ENV, "MODEL_PATH": model_path,
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])),
+    }
+    runs = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_PROBE, json.dumps(record)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["total_ms"])
+    return {name: round(value, 1) for name, value in best.items()}
+
+
+def bench_serving(model_path, records, requests, batch_sizes):
+    os.environ.update(SERVING_ENV)
+    os.environ["MODEL_PATH"] = model_path
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    results = {}
+    with TestClient(app) as client:
+        for record in records[:20]:  # warm up
+            client.post("/predict", json=record)
+
+        samples = []
+        for record in records[:requests]:
+            started = time.perf_counter()
+            response = client.post("/predict", json=record)
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.text
+        results["predict_latency"] = {
+            "requests": len(samples),
+            **_percentiles(samples),
+            "requests_per_sec": round(len(samples) / (sum(samples) / 1000)),
+        }
+
+        throughput = {}
+        for size in batch_sizes:
+            batch = records[:size]
+            repeats = max(3, 2000 // size)
+            client.post("/predict/batch", json=batch)
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                response = client.post("/predict/batch", json=batch)
+                samples.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+            throughput[str(size)] = {
+                "batch_size": len(batch),
+                **_percentiles(samples),
+                "rows_per_sec": round(len(batch) * len(samples) / (sum(samples) / 1000)),
+            }
+        results["batch_throughput"] = throughput
+    return results
+
+
+# ---------------------------------------------------
+# Runner
+# ---------------------------------------------------
+def run(rows=200_000, requests=500, batch_sizes=(1, 10, 100, 1000), suites=SUITES, cores=None):
+    import pandas
+    import sklearn
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as workdir:
+        processed_path, results["data_prep"] = bench_data_prep(workdir, rows)
+        features, results["feature_eng"] = bench_feature_eng(processed_path)
+        if "training" in suites:
+            results["training"] = bench_training(workdir, processed_path, cores)
+
+        serving = {"model_load", "cold_start", "predict_latency", "batch_throughput"} & set(suites)
+        if serving:
+            model_path = build_serving_model(workdir, features)
+            # Hold-out-like rows for requests: every one distinct, never cached
+            records = _records(features[0].sample(frac=1, random_state=0), max(requests, *batch_sizes))
+            if "model_load" in suites:
+                results["model_load"] = bench_model_load(model_path)
+            if "cold_start" in suites:
+                results["cold_start"] = bench_cold_start(model_path, records[0])
+            if {"predict_latency", "batch_throughput"} & serving:
+                results.update(bench_serving(model_path, records, requests, list(batch_sizes)))
+
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": {"numpy": np.__version__, "pandas": pandas.__version__, "sklearn": sklearn.__version__},
+            "rows": rows,
+            "requests": requests,
+            "serving_env": SERVING_ENV,
+        },
+        "results": {suite: results[suite] for suite in SUITES if suite in results},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--rows", type=int, default=200_000, help="Synthetic orders for the pipeline benchmarks")
+    parser.add_argument("--requests", type=int, default=500, help="Sequential /predict calls")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--cores", type=int, default=None, help="CPU budget for the training benchmark")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.requests, args.batch_sizes, args.suites, args.cores)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["results"], indent=2))
+    print(f"✅ Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# Delay-rate cube
+# Goal: serve delay rates for any slice / roll-up of
+# category x customer_segment x channel x device_type x order_month in
+# milliseconds, instead of rerunning eda.py over raw orders.
+#
+# Order and delayed counts are kept in two dense int64 NumPy arrays with one
+# axis per dimension, indexed by each dimension's sorted labels. Queries
+# slice the arrays with np.ix_ and sum the rolled-up axes. Like the feature
+# store, updates count each order_id once: the ids already applied are kept
+# as a sorted array, so an export may be re-run or overlap the last one.
+# The cube is saved as one .npz file, replaced atomically, which the API
+# reloads (without the applied ids) when it changes.
+#
+# Usage:
+#   python -m pipelines.cube build --orders data/ecommerce_orders_processed.parquet --cube data/delay_cube.npz
+#   python -m pipelines.cube query --cube data/delay_cube.npz --group-by category --filter channel=Email
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipelines.eda import DIMENSIONS, TARGET, wilson_interval
+from pipelines.storage import iter_orders
+
+MONTH = "order_month"  # calendar month of order_date, "YYYY-MM"
+CUBE_DIMENSIONS = DIMENSIONS + [MONTH]
+SOURCE_COLUMNS = ["order_id"] + DIMENSIONS + [TARGET, "order_date", "shipping_date"]
+MISSING = "<missing>"
+NO_APPLIED_IDS = (
+    "Cube has no applied order ids (loaded with applied=False, or built before they were kept): "
+    "load it with applied=True or rebuild it"
+)
+
+
+class DelayCube:
+    """
+    Dense order / delayed counts over CUBE_DIMENSIONS.
+
+    `levels` maps each dimension to its sorted labels; axis i of `orders`
+    and `delayed` follows `levels[CUBE_DIMENSIONS[i]]`. New labels grow the
+    axis in place of a rebuild. `applied` holds the sorted ids of the orders
+    counted; it is None for a cube loaded read-only, which cannot be updated.
+    """
+
+    def __init__(self, levels=None, orders=None, delayed=None, watermark=None, applied=None):
+        self.dimensions = list(CUBE_DIMENSIONS)
+        self.levels = {dimension: list((levels or {}).get(dimension, [])) for dimension in self.dimensions}
+        shape = self.shape
+        self.orders = np.zeros(shape, dtype=np.int64) if orders is None else np.asarray(orders, dtype=np.int64)
+        self.delayed = np.zeros(shape, dtype=np.int64) if delayed is None else np.asarray(delayed, dtype=np.int64)
+        self.watermark = pd.Timestamp(watermark) if watermark is not None else None
+        # A new cube has applied nothing; a loaded one brings its ids (or None)
+        self.applied = np.empty(0, dtype=np.int64) if applied is None and orders is None else applied
+        self._positions = {
+            dimension: {label: i for i, label in enumerate(labels)} for dimension, labels in self.levels.items()
+        }
+
+    @property
+    def shape(self):
+        return tuple(len(self.levels[dimension]) for dimension in self.dimensions)
+
+    # ---------------------------------------------------
+    # Updates
+    # ---------------------------------------------------
+    def _grow(self, axis, labels):
+        """Add `labels` to an axis, keeping it sorted, and move existing counts."""
+        dimension = self.dimensions[axis]
+        merged = sorted(set(self.levels[dimension]) | set(labels))
+        positions = {label: i for i, label in enumerate(merged)}
+        old = [positions[label] for label in self.levels[dimension]]
+
+        shape = list(self.shape)
+        shape[axis] = len(merged)
+        for name in ("orders", "delayed"):
+            grown = np.zeros(shape, dtype=np.int64)
+            index = [slice(None)] * len(shape)
+            index[axis] = old
+            grown[tuple(index)] = getattr(self, name)
+            setattr(self, name, grown)
+
+        self.levels[dimension] = merged
+        self._positions[dimension] = positions
+
+    def _codes(self, axis, values):
+        codes, uniques = pd.factorize(values)
+        uniques = [str(label) for label in uniques]
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(uniques), codes)
+            uniques.append(MISSING)
+
+        unseen = [label for label in uniques if label not in self._positions[self.dimensions[axis]]]
+        if unseen:
+            self._grow(axis, unseen)
+        positions = self._positions[self.dimensions[axis]]
+        return np.asarray([positions[label] for label in uniques], dtype=np.int64)[codes]
+
+    def _new_orders(self, order_ids):
+        """Mask of the first row of each order_id not applied yet; records them as applied."""
+        ids = np.asarray(order_ids)
+        ids = ids.astype(np.int64) if np.issubdtype(ids.dtype, np.number) else ids.astype(str)
+        # Widen the stored ids to the batch's type (longer strings, first batch)
+        self.applied = self.applied.astype(
+            np.promote_types(self.applied.dtype, ids.dtype) if len(self.applied) else ids.dtype
+        )
+
+        unique, first = np.unique(ids, return_index=True)
+        positions = np.searchsorted(self.applied, unique)
+        seen = np.zeros(len(unique), dtype=bool)
+        if len(self.applied):
+            seen = self.applied[np.minimum(positions, len(self.applied) - 1)] == unique
+        # Both arrays are sorted: insert the new ids at their sorted positions
+        self.applied = np.insert(self.applied, positions[~seen], unique[~seen])
+
+        keep = np.zeros(len(ids), dtype=bool)
+        keep[first[~seen]] = True
+        return keep
+
+    def update(self, orders):
+        """
+        Fold orders (SOURCE_COLUMNS) into the cube; returns the number applied.
+
+        Orders whose order_id was applied before are skipped, as are orders
+        not shipped yet (no shipping_date or no outcome), which a later
+        export can still apply.
+        """
+        if self.applied is None:
+            raise ValueError(NO_APPLIED_IDS)
+        dates = pd.to_datetime(orders["order_date"])
+        keep = dates.notna() & orders[TARGET].notna() & orders["order_id"].notna()
+        if "shipping_date" in orders:
+            keep &= orders["shipping_date"].notna()
+        keep = keep.to_numpy()
+        orders, dates = orders[keep], dates[keep]
+        if orders.empty:
+            return 0
+        new = self._new_orders(orders["order_id"])
+        orders, dates = orders[new], dates[new]
+        if orders.empty:
+            return 0
+
+        months = np.datetime_as_string(dates.to_numpy().astype("datetime64[M]"), unit="M")
+        columns = [orders[dimension] for dimension in DIMENSIONS] + [pd.Series(months, index=orders.index)]
+        # Codes first: growing an axis changes the shape used to flatten them
+        codes = [self._codes(axis, column) for axis, column in enumerate(columns)]
+
+        flat = np.ravel_multi_index(codes, self.shape)
+        size = self.orders.size
+        self.orders += np.bincount(flat, minlength=size).reshape(self.shape)
+        self.delayed += np.bincount(
+            flat, weights=orders[TARGET].to_numpy(dtype=float), minlength=size
+        ).round().astype(np.int64).reshape(self.shape)
+
+        # Newest order date seen so far, reported by describe()
+        newest = dates.max()
+        if self.watermark is None or newest > self.watermark:
+            self.watermark = newest
+        return len(orders)
+
+    def ingest(self, orders_path, batch_size=500_000):
+        """Stream an orders dataset into the cube, applying orders not counted yet."""
+        applied = 0
+        for batch in iter_orders(orders_path, columns=SOURCE_COLUMNS, batch_size=batch_size):
+            applied += self.update(batch)
+        return applied
+
+    # ---------------------------------------------------
+    # Queries
+    # ---------------------------------------------------
+    def query(self, group_by=(), filters=None, month_from=None, month_to=None):
+        """
+        Delay rates per combination of `group_by`, summed over the other dimensions.
+
+        `filters` maps a dimension to the labels to keep; `month_from` /
+        `month_to` ("YYYY-MM", inclusive) restrict order_month. Combinations
+        without orders are left out. Raises ValueError for unknown dimensions.
+        """
+        group_by = list(dict.fromkeys(group_by))
+        filters = dict(filters or {})
+        unknown = [dimension for dimension in group_by + list(filters) if dimension not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}, expected some of {self.dimensions}")
+
+        selections = []
+        for dimension in self.dimensions:
+            labels = self.levels[dimension]
+            keep = np.ones(len(labels), dtype=bool)
+            if dimension in filters:
+                keep &= np.isin(labels, [str(label) for label in filters[dimension]])
+            if dimension == MONTH and month_from:
+                keep &= np.asarray(labels, dtype=object) >= month_from
+            if dimension == MONTH and month_to:
+                keep &= np.asarray(labels, dtype=object) <= month_to
+            selections.append(np.flatnonzero(keep))
+
+        rolled_up = tuple(axis for axis, dimension in enumerate(self.dimensions) if dimension not in group_by)
+        index = np.ix_(*selections)
+        orders = self.orders[index].sum(axis=rolled_up)
+        delayed = self.delayed[index].sum(axis=rolled_up)
+
+        if group_by:
+            # Remaining axes are in cube order; report them in group_by order
+            kept = [dimension for dimension in self.dimensions if dimension in group_by]
+            order = [kept.index(dimension) for dimension in group_by]
+            orders, delayed = np.transpose(orders, order), np.transpose(delayed, order)
+        else:
+            orders, delayed = orders.reshape(1), delayed.reshape(1)
+
+        cells = np.argwhere(orders > 0)
+        counts = orders[tuple(cells.T)]
+        delays = delayed[tuple(cells.T)]
+        low, high = wilson_interval(delays, counts)
+
+        rows = []
+        for i, cell in enumerate(cells):
+            row = {
+                dimension: self.levels[dimension][selections[self.dimensions.index(dimension)][position]]
+                for dimension, position in zip(group_by, cell)
+            }
+            row.update(
+                orders=int(counts[i]),
+                delayed=int(delays[i]),
+                delay_rate=round(float(delays[i] / counts[i]), 6),
+                ci_low=round(float(low[i]), 6),
+                ci_high=round(float(high[i]), 6),
+            )
+            rows.append(row)
+        return rows
+
+    def describe(self):
+        return {
+            "dimensions": self.levels,
+            "orders": int(self.orders.sum()),
+            "delayed": int(self.delayed.sum()),
+            "cells": int(self.orders.size),
+            "bytes": int(self.orders.nbytes + self.delayed.nbytes),
+            "watermark": self.watermark.isoformat() if self.watermark is not None else None,
+        }
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, path):
+        meta = {
+            "dimensions": self.dimensions,
+            "levels": self.levels,
+            "watermark": self.watermark.isoformat() if self.watermark is not None else None,
+        }
+        if self.applied is None:
+            raise ValueError(NO_APPLIED_IDS)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f, orders=self.orders, delayed=self.delayed, applied=self.applied, meta=np.array(json.dumps(meta))
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, applied=True):
+        """
+        Load a saved cube. `applied=False` skips the applied order ids (the
+        largest array): enough to query, not to update.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["dimensions"] != CUBE_DIMENSIONS:
+                raise ValueError(f"Cube at {path} has dimensions {meta['dimensions']}, expected {CUBE_DIMENSIONS}")
+            order_ids = data["applied"] if applied and "applied" in data else None
+            return cls(meta["levels"], data["orders"], data["delayed"], meta["watermark"], order_ids)
+
+
+class CubeReader:
+    """Serves the cube saved at `path`, reloading it when the file is replaced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cube = None
+        self._mtime_ns = None
+        self._stop = threading.Event()
+        self._refresh_thread = None
+        self.refresh()
+
+    def refresh(self):
+        """Reload if the file changed; returns True when a new cube was loaded."""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return False
+        # One reference assignment: queries keep the cube they started with
+        self.cube = DelayCube.load(self.path, applied=False)
+        self._mtime_ns = mtime_ns
+        return True
+
+    def start_auto_refresh(self, interval):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except (OSError, ValueError):
+                    pass  # keep serving the last good cube
+
+        self._refresh_thread = threading.Thread(target=loop, name="delay-cube-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the delay-rate cube")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Fold new orders into the cube")
+    build.add_argument("--orders", required=True, help="Processed orders (Parquet dataset or CSV)")
+    build.add_argument("--cube", default="data/delay_cube.npz")
+    build.add_argument("--rebuild", action="store_true", help="Recompute from the full history")
+
+    query = commands.add_parser("query", help="Print delay rates for a slice / roll-up")
+    query.add_argument("--cube", default="data/delay_cube.npz")
+    query.add_argument("--group-by", nargs="*", default=[])
+    query.add_argument("--filter", nargs="*", default=[], help="dimension=label, repeatable")
+    query.add_argument("--month-from")
+    query.add_argument("--month-to")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        cube = DelayCube() if args.rebuild or not os.path.exists(args.cube) else DelayCube.load(args.cube)
+        applied = cube.ingest(args.orders)
+        cube.save(args.cube)
+        summary = cube.describe()
+        print(f"✅ Applied {applied:,} orders in {time.perf_counter() - started:.2f}s: "
+              f"{summary['orders']:,} orders in {summary['cells']:,} cells ({summary['bytes']:,} bytes)")
+        return cube
+
+    filters = {}
+    for item in args.filter:
+        dimension, _, label = item.partition("=")
+        filters.setdefault(dimension, []).append(label)
+    rows = DelayCube.load(args.cube).query(args.group_by, filters, args.month_from, args.month_to)
+    print(pd.DataFrame(rows).to_string(index=False))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
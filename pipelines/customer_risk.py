@@ -0,0 +1,228 @@
+# Time-aware customer risk
+# Goal: customer_risk_score for training as each customer's delay rate over
+# the outcomes known *before* the order being scored: an earlier order counts
+# once it has shipped (shipping_date, when delivery_delayed is decided), so no
+# row sees its own outcome or any outcome from its future.
+#
+# Orders are processed oldest month first. Each order's outcome is an event at
+# its shipping_date; within a chunk, orders and the events due before the
+# chunk's last order date are merged in time order, and rates come from
+# cumulative sums over them sorted by (customer_id, time). Folded counts are
+# carried in sorted NumPy arrays of customer ids, order and delayed counts;
+# outcomes that ship after the chunk wait in a small pending buffer for the
+# next one. Memory grows with customers, not orders. Customers without known
+# outcomes get the delay rate of all known outcomes, like the feature store's
+# fallback for unknown customers. Both count exactly the orders with a
+# shipping_date and a known delivery_delayed, so after `flush()` the carried
+# counts equal the feature store's: the API serves the same definition as of
+# today.
+#
+# Usage:
+#   from pipelines.customer_risk import iter_customer_risk
+#   for orders in iter_customer_risk("data/ecommerce_orders_processed.parquet", columns):
+#       ...
+
+import numpy as np
+import pandas as pd
+
+from pipelines.storage import PARTITION_COLUMN, list_periods, read_orders
+
+TARGET = "delivery_delayed"
+OUTCOME_DATE = "shipping_date"  # when an order's delivery_delayed becomes known
+SOURCE_COLUMNS = ["customer_id", "order_date", OUTCOME_DATE, TARGET]
+RISK_COLUMN = "customer_risk_score"
+
+
+def _run_starts(*keys):
+    """Index of the first row of each row's run of equal (sorted) keys."""
+    n = len(keys[0])
+    new_run = np.zeros(n, dtype=bool)
+    new_run[:1] = True
+    for key in keys:
+        new_run[1:] |= key[1:] != key[:-1]
+    return np.maximum.accumulate(np.where(new_run, np.arange(n), 0)), new_run
+
+
+def _nanoseconds(values):
+    """Datetimes as int64 nanoseconds, and a mask of the ones present."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
+    dates = values.to_numpy(dtype="datetime64[ns]")
+    return dates.view(np.int64), ~np.isnat(dates)
+
+
+class ExpandingRisk:
+    """
+    Per-customer order / delayed counts carried across time-ordered chunks.
+
+    `score()` returns each order's risk from the outcomes that shipped
+    strictly before its order date, then folds the outcomes due so far into
+    the counts; later ones stay pending. Chunks must come oldest first and
+    must not share a timestamp with earlier chunks; `watermark` is the
+    newest order date seen. Orders without an outcome or shipping_date are
+    scored but never counted; orders without a customer_id get the overall
+    rate.
+    """
+
+    def __init__(self):
+        self.customers = np.empty(0, dtype=np.int64)
+        self.orders = np.empty(0, dtype=np.int64)
+        self.delayed = np.empty(0, dtype=np.int64)
+        self.total_orders = 0
+        self.total_delayed = 0
+        self.watermark = None
+        # Outcomes not folded yet: shipping time, customer id (-1 unknown), delayed
+        self.pending = (np.empty(0, dtype=np.int64),) * 3
+
+    @property
+    def global_rate(self):
+        return self.total_delayed / self.total_orders if self.total_orders else 0.0
+
+    def score(self, orders):
+        if orders.empty:
+            return np.empty(0)
+        dates, _ = _nanoseconds(orders["order_date"])
+        if self.watermark is not None and dates.min() <= self.watermark.value:
+            raise ValueError(
+                f"Orders must be scored oldest first: chunk starts at {pd.Timestamp(dates.min())}, "
+                f"at or before the watermark {self.watermark}"
+            )
+        customer_ids = pd.to_numeric(orders["customer_id"], errors="coerce").to_numpy(dtype=float)
+        customer_ids = np.where(np.isnan(customer_ids), -1, customer_ids).astype(np.int64)
+        outcomes = pd.to_numeric(orders[TARGET], errors="coerce").to_numpy(dtype=float)
+        shipped, has_date = _nanoseconds(orders[OUTCOME_DATE])
+        counted = ~np.isnan(outcomes) & has_date
+
+        # Outcome events: the pending ones and this chunk's. Those shipped
+        # before the chunk's last order date are due now; the rest can only
+        # matter to later chunks
+        event_times = np.concatenate([self.pending[0], shipped[counted]])
+        event_ids = np.concatenate([self.pending[1], customer_ids[counted]])
+        event_delays = np.concatenate([self.pending[2], outcomes[counted].round().astype(np.int64)])
+        due = event_times < dates.max()
+
+        # Orders, then due events: a stable time sort keeps an order ahead of
+        # an event at the same instant, so it only sees outcomes strictly before it
+        n = len(orders)
+        times = np.concatenate([dates, event_times[due]])
+        ids = np.concatenate([customer_ids, event_ids[due]])
+        counts = np.concatenate([np.zeros(n, dtype=np.int64), np.ones(int(due.sum()), dtype=np.int64)])
+        delays = np.concatenate([np.zeros(n, dtype=np.int64), event_delays[due]])
+
+        # Overall rate as of each order: cumulative sums in time order (orders add nothing)
+        by_time = np.argsort(times, kind="stable")
+        before_orders = np.cumsum(counts[by_time]) + self.total_orders
+        before_delayed = np.cumsum(delays[by_time]) + self.total_delayed
+        overall = np.empty(len(times))
+        overall[by_time] = np.divide(
+            before_delayed, before_orders, out=np.zeros(len(times)), where=before_orders > 0
+        )
+
+        # Per customer: the same, within runs of equal customer_id, plus the carried counts
+        # Stable sort of the time order by customer: (customer_id, time) order
+        by_customer = by_time[np.argsort(ids[by_time], kind="stable")]
+        sorted_ids = ids[by_customer]
+        customer_starts, _ = _run_starts(sorted_ids)
+        cumulative_orders = np.cumsum(counts[by_customer])
+        cumulative_delayed = np.cumsum(delays[by_customer])
+        customer_orders = cumulative_orders - (cumulative_orders - counts[by_customer])[customer_starts]
+        customer_delayed = cumulative_delayed - (cumulative_delayed - delays[by_customer])[customer_starts]
+
+        carried_orders, carried_delayed = self._lookup(sorted_ids)
+        customer_orders += carried_orders
+        customer_delayed += carried_delayed
+
+        scores = np.empty(len(times))
+        scores[by_customer] = np.divide(
+            customer_delayed, customer_orders,
+            out=overall[by_customer], where=(customer_orders > 0) & (sorted_ids >= 0)
+        )
+
+        self._fold(event_ids[due], event_delays[due])
+        self.pending = (event_times[~due], event_ids[~due], event_delays[~due])
+        self.watermark = pd.Timestamp(dates.max())
+        return scores[:n]
+
+    def flush(self):
+        """Fold the pending outcomes too: the counts as of after the last shipment."""
+        self._fold(self.pending[1], self.pending[2])
+        self.pending = (np.empty(0, dtype=np.int64),) * 3
+        return self
+
+    def _lookup(self, customer_ids):
+        """Carried order / delayed counts per customer id (0 for unseen customers)."""
+        if not len(self.customers):
+            return np.zeros(len(customer_ids), dtype=np.int64), np.zeros(len(customer_ids), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.customers, customer_ids), len(self.customers) - 1)
+        found = self.customers[positions] == customer_ids
+        return np.where(found, self.orders[positions], 0), np.where(found, self.delayed[positions], 0)
+
+    def _fold(self, customer_ids, delays):
+        """Add outcomes (customer id, delayed) into the totals and the carried arrays."""
+        self.total_orders += len(customer_ids)
+        self.total_delayed += int(delays.sum())
+        known = customer_ids >= 0
+        if not known.any():
+            return
+        order = np.argsort(customer_ids[known], kind="stable")
+        sorted_ids, delays = customer_ids[known][order], delays[known][order]
+        _, new_customer = _run_starts(sorted_ids)
+        first_rows = np.flatnonzero(new_customer)
+        ids = sorted_ids[first_rows]
+        chunk_orders = np.diff(np.append(first_rows, len(sorted_ids)))
+        chunk_delayed = np.add.reduceat(delays, first_rows)
+
+        # Both id arrays are sorted and unique: add to known customers in
+        # place, insert new ones at their sorted positions
+        positions = np.searchsorted(self.customers, ids)
+        found = np.zeros(len(ids), dtype=bool)
+        if len(self.customers):
+            found = self.customers[np.minimum(positions, len(self.customers) - 1)] == ids
+        self.orders[positions[found]] += chunk_orders[found]
+        self.delayed[positions[found]] += chunk_delayed[found]
+        new, at = ~found, positions[~found]
+        self.customers = np.insert(self.customers, at, ids[new])
+        self.orders = np.insert(self.orders, at, chunk_orders[new])
+        self.delayed = np.insert(self.delayed, at, chunk_delayed[new])
+
+
+def iter_customer_risk(path, columns, start=None, end=None):
+    """
+    Orders from a Parquet dataset (or CSV file) with customer_risk_score,
+    one month partition at a time, oldest first.
+
+    `start` / `end` (YYYY-MM, inclusive) limit the months yielded; months
+    before `start` are still read (SOURCE_COLUMNS only) so scores include the
+    full earlier history. A CSV file or single Parquet file is one chunk.
+    """
+    columns = list(dict.fromkeys(list(columns) + SOURCE_COLUMNS))
+    risk = ExpandingRisk()
+    periods = list_periods(path)
+
+    if periods is None:
+        orders = read_orders(path, columns=columns)
+        orders = orders[orders["order_date"].notna()].reset_index(drop=True)
+        orders[RISK_COLUMN] = risk.score(orders)
+        months = pd.to_datetime(orders["order_date"]).dt.strftime("%Y-%m")
+        keep = np.ones(len(orders), dtype=bool)
+        if start:
+            keep &= (months >= start).to_numpy()
+        if end:
+            keep &= (months <= end).to_numpy()
+        yield orders[keep].reset_index(drop=True)
+        return
+
+    for period in periods:
+        if end and period > end:
+            break
+        history_only = bool(start) and period < start
+        orders = read_orders(
+            path,
+            columns=SOURCE_COLUMNS if history_only else columns,
+            filters=[(PARTITION_COLUMN, "=", period)]
+        )
+        orders = orders[orders["order_date"].notna()].reset_index(drop=True)
+        scores = risk.score(orders)
+        if not history_only:
+            orders[RISK_COLUMN] = scores
+            yield orders
@@ -0,0 +1,380 @@
+# Data Drift
+# Goal: compare serving features against the training reference hourly,
+# without Evidently and without holding the serving window in memory.
+#
+# - The reference profile (written by model_train.py next to the model as
+#   `<model>.drift.json`) stores quantile bin edges and counts for numeric
+#   features and category counts for categorical ones.
+# - Serving data is folded into sketches with the same bins, so memory is
+#   constant however many orders a window holds, and sketches merge.
+# - Numeric features get PSI and a binned two-sample KS test, categorical
+#   features PSI and a chi-square test against the reference proportions.
+#
+# Usage:
+#   python -m pipelines.drift reference --data data/ecommerce_orders_processed.parquet --output drift_reference.json
+#   python -m pipelines.drift check --reference delivery_delay_model.drift.json --audit logs/audit --hours 24
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import kolmogorov
+from scipy.stats import chi2
+
+DRIFT_NUMERIC = ["price", "order_value", "customer_risk_score"]
+DRIFT_CATEGORICAL = ["category", "channel", "device_type"]
+DEFAULT_BINS = 20
+
+# A feature has drifted when PSI or the test says so
+PSI_THRESHOLD = 0.2
+P_VALUE_THRESHOLD = 0.01
+MISSING = "<missing>"
+EPSILON = 1e-4  # floor for empty-bin proportions in PSI
+
+
+# ---------------------------------------------------
+# Sketches
+# ---------------------------------------------------
+class NumericSketch:
+    """Counts per fixed bin; `edges` are the interior cut points."""
+
+    def __init__(self, edges, counts=None, missing=0):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.missing = missing
+
+    @classmethod
+    def fit(cls, values, bins=DEFAULT_BINS):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])) if len(values) else []
+        return cls(edges).update(values)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        self.missing += int(len(values) - valid.sum())
+        self.counts += np.bincount(
+            np.searchsorted(self.edges, values[valid], side="right"), minlength=len(self.counts)
+        )
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.missing += other.missing
+        return self
+
+    def empty(self):
+        return NumericSketch(self.edges)
+
+    def to_dict(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist(), "missing": self.missing}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["edges"], data["counts"], data.get("missing", 0))
+
+
+class CategoricalSketch:
+    """Count per category; missing values count as their own category."""
+
+    def __init__(self, counts=None):
+        self.counts = dict(counts or {})
+
+    @classmethod
+    def fit(cls, values):
+        return cls().update(values)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def update(self, values):
+        counts = pd.Series(values, dtype=object).fillna(MISSING).value_counts()
+        for category, count in counts.items():
+            self.counts[category] = self.counts.get(category, 0) + int(count)
+        return self
+
+    def merge(self, other):
+        for category, count in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + count
+        return self
+
+    def empty(self):
+        return CategoricalSketch()
+
+    def to_dict(self):
+        return {"counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["counts"])
+
+
+# ---------------------------------------------------
+# Statistics
+# ---------------------------------------------------
+def psi(reference, current):
+    """Population stability index between two aligned count vectors."""
+    expected = np.maximum(np.asarray(reference, dtype=float) / max(np.sum(reference), 1), EPSILON)
+    actual = np.maximum(np.asarray(current, dtype=float) / max(np.sum(current), 1), EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_binned(reference, current):
+    """Two-sample KS statistic on binned counts, with its asymptotic p-value."""
+    n, m = np.sum(reference), np.sum(current)
+    if not n or not m:
+        return 0.0, 1.0
+    statistic = float(np.max(np.abs(np.cumsum(reference) / n - np.cumsum(current) / m)))
+    effective = np.sqrt(n * m / (n + m))
+    return statistic, float(kolmogorov(effective * statistic))
+
+
+def chi_square(reference, current):
+    """Two-sample chi-square test of homogeneity on category counts."""
+    categories = sorted(set(reference) | set(current), key=str)
+    table = np.array([
+        [reference.get(category, 0) for category in categories],
+        [current.get(category, 0) for category in categories],
+    ], dtype=float)
+    if not table[0].sum() or not table[1].sum():
+        return 0.0, 1.0
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+    statistic = float(np.sum((table - expected) ** 2 / expected))
+    return statistic, float(chi2.sf(statistic, max(len(categories) - 1, 1)))
+
+
+def compare_numeric(reference, current):
+    statistic, p_value = ks_binned(reference.counts, current.counts)
+    value = psi(reference.counts, current.counts)
+    return {
+        "type": "numeric",
+        "rows": current.total,
+        "missing": current.missing,
+        "psi": round(value, 4),
+        "ks": round(statistic, 4),
+        "p_value": p_value,
+        "drifted": bool(current.total) and (value > PSI_THRESHOLD or p_value < P_VALUE_THRESHOLD),
+    }
+
+
+def compare_categorical(reference, current):
+    categories = sorted(set(reference.counts) | set(current.counts), key=str)
+    value = psi(
+        [reference.counts.get(category, 0) for category in categories],
+        [current.counts.get(category, 0) for category in categories]
+    )
+    statistic, p_value = chi_square(reference.counts, current.counts)
+    return {
+        "type": "categorical",
+        "rows": current.total,
+        "psi": round(value, 4),
+        "chi2": round(statistic, 4),
+        "p_value": p_value,
+        "unseen": sorted(set(current.counts) - set(reference.counts), key=str),
+        "drifted": bool(current.total) and (value > PSI_THRESHOLD or p_value < P_VALUE_THRESHOLD),
+    }
+
+
+# ---------------------------------------------------
+# Reference Profile & Monitor
+# ---------------------------------------------------
+class DriftProfile:
+    """Reference sketches of the training features."""
+
+    def __init__(self, numeric, categorical):
+        self.numeric = numeric
+        self.categorical = categorical
+
+    @classmethod
+    def fit(cls, X, numeric=DRIFT_NUMERIC, categorical=DRIFT_CATEGORICAL, bins=DEFAULT_BINS):
+        return cls(
+            {column: NumericSketch.fit(X[column], bins) for column in numeric if column in X},
+            {column: CategoricalSketch.fit(X[column]) for column in categorical if column in X}
+        )
+
+    def to_dict(self):
+        return {
+            "numeric": {column: sketch.to_dict() for column, sketch in self.numeric.items()},
+            "categorical": {column: sketch.to_dict() for column, sketch in self.categorical.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {column: NumericSketch.from_dict(sketch) for column, sketch in data["numeric"].items()},
+            {column: CategoricalSketch.from_dict(sketch) for column, sketch in data["categorical"].items()}
+        )
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class DriftMonitor:
+    """
+    Streaming sketches of serving features, compared against a DriftProfile.
+
+    `update()` folds a DataFrame in with vectorized binning. `add()` takes one
+    record and only buffers it, so it is cheap enough for the event loop;
+    every `batch_size` records the buffer is folded in on a background
+    thread, and the rest before each report. Safe to call from several
+    threads; `close()` stops the background thread.
+    """
+
+    def __init__(self, profile, batch_size=1000):
+        self.profile = profile
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._folder = None  # single worker, started by the first full buffer
+        self._pending = None
+        self.reset()
+
+    def reset(self):
+        self.numeric = {column: sketch.empty() for column, sketch in self.profile.numeric.items()}
+        self.categorical = {column: sketch.empty() for column, sketch in self.profile.categorical.items()}
+        self.rows = 0
+        self.since = time.time()
+
+    def update(self, frame):
+        self._merge(*self._bin(frame))
+        return self
+
+    def _bin(self, frame):
+        """Fresh sketches of `frame`: binning touches no shared state, so it runs unlocked."""
+        numeric, categorical = {}, {}
+        for column, sketch in self.profile.numeric.items():
+            values = pd.to_numeric(frame[column], errors="coerce") if column in frame else [np.nan] * len(frame)
+            numeric[column] = sketch.empty().update(values)
+        for column, sketch in self.profile.categorical.items():
+            categorical[column] = sketch.empty().update(frame[column] if column in frame else [None] * len(frame))
+        return numeric, categorical, len(frame)
+
+    def _merge(self, numeric, categorical, rows):
+        with self._lock:
+            for column, sketch in numeric.items():
+                self.numeric[column].merge(sketch)
+            for column, sketch in categorical.items():
+                self.categorical[column].merge(sketch)
+            self.rows += rows
+
+    def add(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) < self.batch_size:
+                return
+            # A fold still queued takes whatever is buffered when it runs
+            if self._pending is not None and not self._pending.done():
+                return
+            if self._folder is None:
+                self._folder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drift-fold")
+            self._pending = self._folder.submit(self.fold)
+
+    def fold(self):
+        # Only the buffer swap and the merge hold the lock, so add() never
+        # waits on building the frame or binning it
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            self.update(pd.DataFrame.from_records(records))
+
+    def report(self, reset=False):
+        pending = self._pending
+        if pending is not None:
+            pending.result()
+        self.fold()
+        with self._lock:
+            features = {
+                column: compare_numeric(self.profile.numeric[column], sketch)
+                for column, sketch in self.numeric.items()
+            }
+            features.update({
+                column: compare_categorical(self.profile.categorical[column], sketch)
+                for column, sketch in self.categorical.items()
+            })
+            report = {
+                "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.since)),
+                "rows": self.rows,
+                "drifted": sorted(column for column, result in features.items() if result["drifted"]),
+                "features": features,
+            }
+            if reset:
+                self.reset()
+        return report
+
+    def close(self):
+        if self._folder is not None:
+            self._folder.shutdown(wait=True)
+
+
+# ---------------------------------------------------
+# Scheduled Check
+# ---------------------------------------------------
+def check_audit(reference_path, audit_path, start=None, end=None):
+    """Drift report over audit log segments, streamed one segment at a time."""
+    from api.audit import iter_segments
+
+    profile = DriftProfile.load(reference_path)
+    monitor = DriftMonitor(profile)
+    if start is not None:
+        monitor.since = pd.Timestamp(start).timestamp()
+    columns = list(profile.numeric) + list(profile.categorical)
+    for segment in iter_segments(audit_path, start, end, columns):
+        monitor.update(segment)
+    return monitor.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build drift references and check serving data against them")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reference = commands.add_parser("reference", help="Profile training features")
+    reference.add_argument("--data", default=None, help="Processed orders (default: feature_eng's path)")
+    reference.add_argument("--output", default="drift_reference.json")
+    reference.add_argument("--bins", type=int, default=DEFAULT_BINS)
+
+    check = commands.add_parser("check", help="Compare audited serving data with a reference")
+    check.add_argument("--reference", required=True)
+    check.add_argument("--audit", default=os.getenv("AUDIT_LOG_DIR", "logs/audit"))
+    check.add_argument("--hours", type=float, default=24, help="Window length ending now")
+    check.add_argument("--fail-on-drift", action="store_true", help="Exit 1 when any feature drifted")
+    args = parser.parse_args(argv)
+
+    if args.command == "reference":
+        from pipelines.feature_eng import OrderFeatureBuilder, load_features
+
+        X, _ = load_features(args.data) if args.data else load_features()
+        X = OrderFeatureBuilder().transform(X)
+        DriftProfile.fit(X, bins=args.bins).save(args.output)
+        print(f"✅ Drift reference for {len(X):,} rows written to {args.output}")
+        return None
+
+    start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=args.hours)
+    report = check_audit(args.reference, args.audit, start=start)
+    print(json.dumps(report, indent=2))
+    if report["drifted"] and args.fail_on_drift:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
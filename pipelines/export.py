@@ -0,0 +1,261 @@
+# 🟢 PHASE 5: Export Serving Artifacts
+# Goal: turn the model selected by model_train.py into smaller serving
+# artifacts and measure what each one costs and how well it scores.
+#
+# Variants (each keeps the fitted preprocessor, so the API loads any of them):
+#   baseline            the trained pipeline as saved
+#   top<k>              forest pruned to the k trees that score best on their
+#                       out-of-bag training rows (bootstrapped forests only)
+#   float32 / top<k>_float32
+#                       the forest flattened into a CompactForest
+#                       (api/compact.py): int32 / float32 node arrays with
+#                       identical split decisions
+#   distilled_logistic  logistic regression on the one-hot features, fitted
+#                       to the teacher's probabilities
+#   distilled_hgb       shallow histogram gradient boosting, same targets
+#
+# The report lists artifact size, load time, RSS after load (both measured
+# in a fresh interpreter), rows/sec and test F1 for every variant.
+#
+# Usage:
+#   python -m pipelines.export --model delivery_delay_model.pkl \
+#       --data data/ecommerce_orders_processed.parquet --output-dir model/variants
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from api.compact import CompactForest
+from pipelines.feature_eng import PROCESSED_DATA_PATH, load_features
+from pipelines.model_train import RANDOM_STATE
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# STEP 1: Build Variants
+def _with_model(pipeline, model):
+    return Pipeline(steps=[*pipeline.steps[:-1], ("model", model)])
+
+
+def out_of_bag_rows(forest, tree, n_samples):
+    """
+    Rows of the training set that `tree` did not see: the complement of its
+    bootstrap draw, regenerated from the tree's seed the way sklearn draws it.
+    """
+    max_samples = forest.max_samples
+    if max_samples is None:
+        n_drawn = n_samples
+    elif isinstance(max_samples, float):
+        n_drawn = max(round(n_samples * max_samples), 1)
+    else:
+        n_drawn = max_samples
+    drawn = np.random.RandomState(tree.random_state).randint(0, n_samples, n_drawn)
+    return np.flatnonzero(np.bincount(drawn, minlength=n_samples) == 0)
+
+
+def can_prune(forest, n_samples):
+    """Out-of-bag ranking needs a bootstrapped sklearn forest fitted on these `n_samples` rows."""
+    return (
+        getattr(forest, "bootstrap", False)
+        and all(hasattr(tree, "tree_") for tree in forest.estimators_)
+        and getattr(forest, "_n_samples", n_samples) == n_samples
+    )
+
+
+def prune_forest(forest, X_train, y_train, k):
+    """
+    Keep the k trees with the best individual ROC AUC on their out-of-bag
+    rows. X_train / y_train must be the rows the forest was fitted on, in
+    the same order; ranking trees on rows they trained on would favour the
+    most overfitted ones.
+    """
+    if not can_prune(forest, len(y_train)):
+        raise ValueError("prune_forest needs a bootstrapped forest and the exact rows it was fitted on")
+    y_train = np.asarray(y_train)
+    scores = []
+    for tree in forest.estimators_:
+        rows = out_of_bag_rows(forest, tree, len(y_train))
+        if len(np.unique(y_train[rows])) < 2:
+            scores.append(-np.inf)  # AUC undefined: rank last
+            continue
+        scores.append(roc_auc_score(y_train[rows], tree.predict_proba(X_train[rows])[:, 1]))
+    keep = np.argsort(scores, kind="stable")[::-1][:k]
+
+    pruned = copy.copy(forest)
+    pruned.estimators_ = [forest.estimators_[i] for i in sorted(keep)]
+    pruned.n_estimators = len(pruned.estimators_)
+    return pruned
+
+
+def distill(student, X, teacher_proba):
+    """
+    Fit `student` to the teacher's probabilities. Every row appears once as
+    positive with weight p and once as negative with weight 1 - p, which is
+    the cross-entropy against the soft labels.
+    """
+    X2 = np.vstack([X, X])
+    y2 = np.concatenate([np.ones(len(X), dtype=int), np.zeros(len(X), dtype=int)])
+    weights = np.concatenate([teacher_proba, 1 - teacher_proba])
+    keep = weights > 0
+    return student.fit(X2[keep], y2[keep], sample_weight=weights[keep])
+
+
+def build_variants(pipeline, X_train, y_train, top_k=(50,), random_state=RANDOM_STATE):
+    variants = {"baseline": pipeline}
+    preprocessor, model = pipeline[:-1], pipeline[-1]
+
+    matrix_train = preprocessor.transform(X_train)
+
+    if hasattr(model, "estimators_") and all(hasattr(tree, "tree_") for tree in model.estimators_):
+        variants["float32"] = _with_model(pipeline, CompactForest.from_forest(model))
+        for k in top_k:
+            if k >= len(model.estimators_) or not can_prune(model, len(y_train)):
+                continue
+            pruned = prune_forest(model, matrix_train, y_train, k)
+            variants[f"top{k}"] = _with_model(pipeline, pruned)
+            variants[f"top{k}_float32"] = _with_model(pipeline, CompactForest.from_forest(pruned))
+
+    teacher_proba = pipeline.predict_proba(X_train)[:, 1]
+    variants["distilled_logistic"] = _with_model(
+        pipeline, distill(LogisticRegression(max_iter=1000), matrix_train, teacher_proba)
+    )
+    variants["distilled_hgb"] = _with_model(
+        pipeline,
+        distill(
+            HistGradientBoostingClassifier(max_depth=3, max_iter=100, random_state=random_state),
+            matrix_train, teacher_proba
+        )
+    )
+    return variants
+
+
+# STEP 2: Measure Variants
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _load_probe(path):
+    # Runs in a fresh interpreter: imports first, so only the model is measured
+    import sklearn.ensemble, sklearn.linear_model, sklearn.pipeline  # noqa: F401
+    import api.compact  # noqa: F401
+
+    before = _rss_mb()
+    started = time.perf_counter()
+    model = joblib.load(path)  # noqa: F841 - must stay referenced while RSS is read
+    seconds = time.perf_counter() - started
+    print(json.dumps({"load_seconds": seconds, "rss_mb": _rss_mb() - before}))
+
+
+def measure_load(path):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+    output = subprocess.run(
+        [sys.executable, "-c", f"from pipelines.export import _load_probe; _load_probe({path!r})"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_throughput(pipeline, X, repeats=3, batch_size=None):
+    """Best-of-`repeats` rows/sec for predict_proba, whole set or in batches."""
+    batch_size = batch_size or len(X)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for start in range(0, len(X), batch_size):
+            pipeline.predict_proba(X.iloc[start:start + batch_size])
+        best = min(best, time.perf_counter() - started)
+    return len(X) / best
+
+
+def evaluate_variants(variants, X_test, y_test, output_dir, threshold=0.5):
+    os.makedirs(output_dir, exist_ok=True)
+    baseline_labels = None
+    report = []
+
+    for name, pipeline in variants.items():
+        path = os.path.join(output_dir, f"{name}.pkl")
+        tmp_path = f"{path}.tmp"
+        joblib.dump(pipeline, tmp_path)
+        os.replace(tmp_path, path)
+
+        proba = pipeline.predict_proba(X_test)[:, 1]
+        labels = (proba > threshold).astype(int)
+        if baseline_labels is None:
+            baseline_labels = labels
+        load = measure_load(path)
+
+        report.append({
+            "variant": name,
+            "path": path,
+            "size_mb": round(os.path.getsize(path) / (1024 * 1024), 3),
+            "load_ms": round(load["load_seconds"] * 1000, 1),
+            "rss_mb": round(load["rss_mb"], 1),
+            "rows_per_sec": round(measure_throughput(pipeline, X_test)),
+            # The API scores micro-batches, so small-batch speed matters too
+            "rows_per_sec_batch64": round(measure_throughput(pipeline, X_test.iloc[:2048], batch_size=64)),
+            "f1": round(float(f1_score(y_test, labels, zero_division=0)), 4),
+            "roc_auc": round(float(roc_auc_score(y_test, proba)), 4),
+            "agreement": round(float((labels == baseline_labels).mean()), 4),
+        })
+    return report
+
+
+def export(model_path, data_path=PROCESSED_DATA_PATH, output_dir="model/variants", top_k=(50,),
+           train_from=None, train_to=None, test_size=0.2, random_state=RANDOM_STATE):
+    pipeline = joblib.load(model_path)
+
+    # Same split as model_train.py, so the test rows were never trained on
+    X, y = load_features(data_path, train_from, train_to)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+
+    variants = build_variants(pipeline, X_train, y_train, top_k, random_state)
+    report = evaluate_variants(variants, X_test, y_test, output_dir)
+
+    with open(os.path.join(output_dir, "report.json"), "w") as f:
+        json.dump({"model": str(model_path), "test_rows": len(X_test), "variants": report}, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export compact model variants and a size/latency report")
+    parser.add_argument("--model", default="delivery_delay_model.pkl")
+    parser.add_argument("--data", default=PROCESSED_DATA_PATH)
+    parser.add_argument("--output-dir", default="model/variants")
+    parser.add_argument("--top-k", type=int, nargs="*", default=[50], help="Tree counts to prune the forest to")
+    parser.add_argument("--train-from", default=os.getenv("TRAIN_FROM"))
+    parser.add_argument("--train-to", default=os.getenv("TRAIN_TO"))
+    args = parser.parse_args(argv)
+
+    report = export(args.model, args.data, args.output_dir, args.top_k, args.train_from, args.train_to)
+
+    columns = ["variant", "size_mb", "load_ms", "rss_mb", "rows_per_sec", "rows_per_sec_batch64",
+               "f1", "agreement"]
+    print("  ".join(f"{column:>20}" if i else f"{column:<20}" for i, column in enumerate(columns)))
+    for row in report:
+        print("  ".join(f"{row[column]:>20}" if i else f"{row[column]:<20}" for i, column in enumerate(columns)))
+    print(f"✅ Variants and report.json written to {args.output_dir}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,167 @@
 # 🟢 PHASE 3: Feature Engineering
 # Goal: Convert raw columns into high-signal features that help the model predict delivery delays accurately.
 # We will create 4 features and then build a preprocessing pipeline.
+#
+# Importable: `load_features()` returns (X, y), `OrderFeatureBuilder` derives
+# the order features and `build_preprocessor()` is the ColumnTransformer used
+# by model_train.py and search.py. The builder is the first step of every
+# saved pipeline, so the API scores raw orders (with `order_date`) through
+# the same code that built the training features.
+
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-
-# STEP 1: Create order_value
-# Create order value
-df["order_value"] = df["price"] * df["quantity"]
-
-
-# STEP 2: Create Day-of-Week Feature
-# Day of week (0=Monday, 6=Sunday)
-df["order_dayofweek"] = df["order_date"].dt.dayofweek
-
-# Readable version for EDA
-df["order_day_name"] = df["order_date"].dt.day_name()
-
-
-# STEP 3: Create Month / Seasonality Features
-# Month number
-df["order_month"] = df["order_date"].dt.month
-
-# Optional Advanced Season Feature
-df["is_peak_season"] = df["order_month"].isin([10, 11, 12]).astype(int)
-
-
-# STEP 4: Create Customer Risk Score
-# Step 4.1: Calculate Historical Delay Rate per Customer
-customer_delay_rate = (
-    df.groupby("customer_id")["delivery_delayed"]
-    .mean()
-    .reset_index()
-    .rename(columns={"delivery_delayed": "customer_delay_rate"})
+from pipelines.customer_risk import iter_customer_risk
+from pipelines.features import (  # noqa: F401
+    CAT_FEATURES, INPUT_FEATURES, NUM_FEATURES, PEAK_MONTHS, TARGET, order_features
 )
 
-# Step 4.2: Merge Back into Main Dataset
-df = df.merge(customer_delay_rate, on="customer_id", how="left")
+PROCESSED_DATA_PATH = os.getenv("PROCESSED_DATA_PATH", "data/ecommerce_orders_processed.parquet")
+
+FEATURE_SOURCE_COLUMNS = [
+    "customer_id", "price", "quantity", "order_date",
+    "category", "customer_segment", "channel", "device_type",
+    "delivery_delayed"
+]
 
-# Step 4.3: Create Customer Risk Score
-df["customer_risk_score"] = df["customer_delay_rate"]
 
+# STEP 0: Load Processed Orders
+# Only the columns the features need are read; the path may be the
+# month-partitioned Parquet dataset from data_prep.py or a CSV file, and
+# train_from / train_to (YYYY-MM) select whole months. Months are read oldest
+# first so STEP 4 can carry customer history forward.
+def load_orders(path=PROCESSED_DATA_PATH, train_from=None, train_to=None):
+    chunks = list(iter_customer_risk(path, FEATURE_SOURCE_COLUMNS, train_from, train_to))
+    if not chunks:
+        raise ValueError(f"No orders in {path} between {train_from or 'start'} and {train_to or 'end'}")
+    return pd.concat(chunks, ignore_index=True)
+
+
+# STEP 1-3: Order Features
+class OrderFeatureBuilder(TransformerMixin, BaseEstimator):
+    """
+    Derives order_value, order_dayofweek, order_month and is_peak_season.
+
+    `transform()` works column-wise on a DataFrame (training, batch scoring);
+    `transform_record()` does the same for one dict in plain Python, with no
+    pandas, for single-order serving. Values already present are kept and
+    only missing ones are derived, so callers may send either `order_date`
+    or `order_dayofweek` / `order_month`. Stateless: `fit()` learns nothing.
+    """
+
+    def __init__(self, peak_months=PEAK_MONTHS):
+        self.peak_months = peak_months
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        if isinstance(X, dict):
+            return self.transform_record(X)
+        X = X.copy(deep=False)
+
+        # STEP 1: Create order_value
+        order_value = X["price"].to_numpy(dtype=float) * X["quantity"].to_numpy(dtype=float)
+        X["order_value"] = _fill(X, "order_value", order_value)
+
+        # STEP 2-3: Day-of-Week (0=Monday, 6=Sunday) and Month / Seasonality
+        if "order_date" in X:
+            dates = _to_datetime(X["order_date"])
+            X["order_dayofweek"] = _fill(X, "order_dayofweek", dates.dt.dayofweek.to_numpy(dtype=float))
+            X["order_month"] = _fill(X, "order_month", dates.dt.month.to_numpy(dtype=float))
+        if "order_month" in X:
+            is_peak = np.isin(X["order_month"].to_numpy(dtype=float), self.peak_months).astype(float)
+            X["is_peak_season"] = _fill(X, "is_peak_season", is_peak)
+        return X
+
+    def transform_record(self, record):
+        """Single-order fast path of transform(); returns a new dict."""
+        return order_features(record, self.peak_months)
+
+
+def _to_datetime(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    try:
+        # Dates and timestamps mixed in one batch (pandas >= 2 needs telling)
+        return pd.to_datetime(values, format="ISO8601")
+    except ValueError:
+        return pd.to_datetime(values)  # pandas < 2 infers per element
+
+
+def _fill(X, column, derived):
+    """`derived`, except where X already has a value for `column`."""
+    if column not in X:
+        return derived
+    given = pd.to_numeric(X[column], errors="coerce").to_numpy(dtype=float)
+    return np.where(np.isnan(given), derived, given)
+
+
+# STEP 4: Customer Risk Score
+# customer_risk_score is each customer's delay rate over the earlier orders
+# that had shipped by the order's date (pipelines/customer_risk.py), added
+# while loading: a row never sees its own outcome or one not known yet, so
+# test metrics are not inflated by the target leaking through this feature.
+# Months before train_from still count as history.
 
 # STEP 5: Drop Leakage Columns
-df = df.drop(columns=["shipping_date", "delivery_days", "customer_delay_rate"])
+# delivery_days is never loaded, and shipping_date only dates the outcomes in
+# STEP 4: neither is in INPUT_FEATURES.
 
 
 # STEP 6: Define Features & Target
-X = df.drop(columns=["delivery_delayed"])
-y = df["delivery_delayed"]
+# X holds the pipeline inputs (INPUT_FEATURES); OrderFeatureBuilder().transform(X)
+# gives the engineered columns the preprocessor sees. Orders not shipped yet
+# (TARGET is NA) are left out: their outcome is unknown.
+def load_features(path=PROCESSED_DATA_PATH, train_from=None, train_to=None):
+    df = load_orders(path, train_from, train_to)
+    df = df[df[TARGET].notna()]
+    X = df[INPUT_FEATURES]
+    y = df[TARGET].astype("int8")
+    return X, y
 
 
 # STEP 7: Build Preprocessing Pipeline
-# Step 7.1: Identify Feature Types
-from sklearn.model_selection import train_test_split
-
-num_features = [
-    "price", "quantity", "order_value",
-    "order_dayofweek", "order_month",
-    "customer_risk_score"
-]
-
-cat_features = [
-    "category",
-    "customer_segment",
-    "channel",
-    "device_type"
-]
-
-# Step 7.2: Create Transformers
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-
-numeric_transformer = StandardScaler()
-
-categorical_transformer = OneHotEncoder(
-    handle_unknown="ignore",
-    sparse_output=False
-)
-
-# Step 7.3: Build ColumnTransformer
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", numeric_transformer, num_features),
-        ("cat", categorical_transformer, cat_features)
-    ]
-)
-
-
-# STEP 8: Combine Preprocessing + Model
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestClassifier
-
-model_pipeline = Pipeline(
-    steps=[
-        ("preprocessor", preprocessor),
-        ("model", RandomForestClassifier(
-            n_estimators=200,
-            random_state=42
-        ))
-    ]
-)
\ No newline at end of file
+# `categories` (one list per CAT_FEATURES column) fixes the one-hot vocabulary
+# up front, and `sparse` keeps the output a sparse matrix; out-of-core
+# training (pipelines/stream_train.py) uses both.
+def build_preprocessor(categories="auto", sparse=False):
+    # Step 7.2: Create Transformers
+    numeric_transformer = StandardScaler()
+
+    categorical_transformer = OneHotEncoder(
+        categories=categories,
+        handle_unknown="ignore",
+        sparse_output=sparse
+    )
+
+    # Step 7.3: Build ColumnTransformer
+    return ColumnTransformer(
+        transformers=[
+            ("num", numeric_transformer, NUM_FEATURES),
+            ("cat", categorical_transformer, CAT_FEATURES)
+        ],
+        sparse_threshold=1.0 if sparse else 0.3
+    )
+
+
+# STEP 8: Combine Features + Preprocessing + Model
+def build_model_pipeline(model):
+    return Pipeline(
+        steps=[
+            ("features", OrderFeatureBuilder()),
+            ("preprocessor", build_preprocessor()),
+            ("model", model)
+        ]
+    )
+
+
+if __name__ == "__main__":
+    X, y = load_features(train_from=os.getenv("TRAIN_FROM"), train_to=os.getenv("TRAIN_TO"))
+    print(f"✅ {len(X):,} orders, {X.shape[1]} features, {y.mean():.2%} delayed")
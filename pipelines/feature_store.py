@@ -0,0 +1,253 @@
+# Customer feature store
+# Goal: keep each customer's historical delay rate (customer_risk_score) up to
+# date incrementally, so training and the API read the same numbers and no
+# client has to re-aggregate order history itself.
+#
+# Counts live in sqlite (one row per customer), next to the ids of the orders
+# already counted, so an export can be applied again or overlap the previous
+# one. Readers keep a dict index in memory for O(1) lookups and pull in only
+# the rows changed since their last refresh.
+#
+# Usage:
+#   python -m pipelines.feature_store --orders data/ecommerce_orders_processed.parquet \
+#       --store data/customer_features.db
+
+import argparse
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from pipelines.storage import iter_orders
+
+SOURCE_COLUMNS = ["order_id", "customer_id", "delivery_delayed", "order_date", "shipping_date"]
+
+
+class CustomerFeatureStore:
+    """
+    Running order / delayed-order counts per customer_id.
+
+    `update()` folds a batch of shipped orders into the counts with one
+    grouped upsert. Each order_id is counted once: orders already applied
+    are skipped, so re-running or overlapping an export does not double
+    count. An order that has not shipped yet (no shipping_date or no
+    delivery_delayed) is not applied, so the first export in which it has
+    shipped counts it. `risk_score()` returns delayed / orders for a known
+    customer and the global delay rate for an unknown one.
+    """
+
+    def __init__(self, path, load_index=True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS customer_stats (
+                customer_id INTEGER PRIMARY KEY,
+                orders INTEGER NOT NULL,
+                delayed INTEGER NOT NULL,
+                seq INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS customer_stats_seq ON customer_stats (seq);
+            CREATE TABLE IF NOT EXISTS applied_orders (
+                order_id PRIMARY KEY
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+
+        self.index = {}
+        self.total_orders = 0
+        self.total_delayed = 0
+        self._seen_seq = 0
+        self._refresh_thread = None
+        self._stop = threading.Event()
+        if load_index:
+            self.refresh()
+
+    # ---------------------------------------------------
+    # Metadata
+    # ---------------------------------------------------
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    @property
+    def watermark(self):
+        value = self._meta("watermark")
+        return pd.Timestamp(value) if value else None
+
+    # ---------------------------------------------------
+    # Writes
+    # ---------------------------------------------------
+    def update(self, orders):
+        """
+        Fold shipped orders (order_id, customer_id, delivery_delayed[,
+        order_date, shipping_date]) into the running counts. Returns the
+        number of orders applied; orders whose order_id was applied before,
+        and orders not shipped yet, are skipped.
+        """
+        required = ["order_id", "customer_id", "delivery_delayed"]
+        if "shipping_date" in orders:
+            required.append("shipping_date")
+        orders = orders.dropna(subset=required)
+        if orders.empty:
+            return 0
+
+        rows = zip(
+            orders["order_id"].tolist(),
+            orders["customer_id"].astype("int64").tolist(),
+            orders["delivery_delayed"].astype("int64").tolist(),
+        )
+        with self._lock, self._conn:
+            # Stage the batch, drop orders counted before, then record and
+            # count the rest: set-based, so a batch costs one pass in sqlite
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS batch_orders "
+                "(order_id PRIMARY KEY, customer_id INTEGER, delayed INTEGER)"
+            )
+            self._conn.execute("DELETE FROM batch_orders")
+            self._conn.executemany("INSERT OR IGNORE INTO batch_orders VALUES (?, ?, ?)", rows)
+            self._conn.execute(
+                "DELETE FROM batch_orders WHERE EXISTS "
+                "(SELECT 1 FROM applied_orders WHERE applied_orders.order_id = batch_orders.order_id)"
+            )
+            applied, delayed = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(delayed), 0) FROM batch_orders"
+            ).fetchone()
+            if not applied:
+                return 0
+            self._conn.execute("INSERT INTO applied_orders (order_id) SELECT order_id FROM batch_orders")
+
+            seq = int(self._meta("seq", 0)) + 1
+            self._conn.execute(
+                """
+                INSERT INTO customer_stats (customer_id, orders, delayed, seq)
+                SELECT customer_id, COUNT(*), SUM(delayed), ? FROM batch_orders WHERE true GROUP BY customer_id
+                ON CONFLICT(customer_id) DO UPDATE SET
+                    orders = orders + excluded.orders,
+                    delayed = delayed + excluded.delayed,
+                    seq = excluded.seq
+                """,
+                (seq,)
+            )
+            self._set_meta("seq", seq)
+            self._set_meta("total_orders", int(self._meta("total_orders", 0)) + applied)
+            self._set_meta("total_delayed", int(self._meta("total_delayed", 0)) + delayed)
+            # Newest order date seen so far, reported by stats()
+            if "order_date" in orders:
+                newest = pd.to_datetime(orders["order_date"]).max()
+                watermark = self.watermark
+                if watermark is None or newest > watermark:
+                    self._set_meta("watermark", newest.isoformat())
+
+        return applied
+
+    def ingest(self, orders_path, batch_size=500_000):
+        """Stream an orders dataset into the store, applying orders not counted yet."""
+        applied = 0
+        for batch in iter_orders(orders_path, columns=SOURCE_COLUMNS, batch_size=batch_size):
+            applied += self.update(batch)
+        return applied
+
+    def rebuild(self, orders_path, batch_size=500_000):
+        """Recompute the store from a full order history."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM customer_stats")
+            self._conn.execute("DELETE FROM applied_orders")
+            # Keep seq increasing so running readers pick up every rebuilt row
+            self._conn.execute("DELETE FROM store_meta WHERE key != 'seq'")
+            self.index.clear()
+            self._seen_seq = 0
+        return self.ingest(orders_path, batch_size)
+
+    # ---------------------------------------------------
+    # Reads
+    # ---------------------------------------------------
+    def refresh(self):
+        """Pull customers changed since the last refresh into the in-memory index."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT customer_id, orders, delayed, seq FROM customer_stats WHERE seq > ?",
+                (self._seen_seq,)
+            ).fetchall()
+            for customer_id, orders, delayed, seq in rows:
+                self.index[customer_id] = (orders, delayed)
+                self._seen_seq = max(self._seen_seq, seq)
+
+            self.total_orders = int(self._meta("total_orders", 0))
+            self.total_delayed = int(self._meta("total_delayed", 0))
+        return len(rows)
+
+    @property
+    def global_rate(self):
+        return self.total_delayed / self.total_orders if self.total_orders else 0.0
+
+    def risk_score(self, customer_id):
+        counts = self.index.get(customer_id)
+        if counts is None or counts[0] == 0:
+            return self.global_rate
+        return counts[1] / counts[0]
+
+    def risk_scores(self, customer_ids):
+        """Vectorized risk_score() for a Series of customer ids (training path)."""
+        with self._lock:
+            rates = pd.read_sql_query(
+                "SELECT customer_id, CAST(delayed AS REAL) / orders AS rate "
+                "FROM customer_stats WHERE orders > 0",
+                self._conn, index_col="customer_id"
+            )["rate"]
+        return customer_ids.map(rates).fillna(self.global_rate)
+
+    def start_auto_refresh(self, interval):
+        def loop():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._refresh_thread = threading.Thread(target=loop, name="feature-store-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        return {
+            "customers": len(self.index),
+            "orders": self.total_orders,
+            "global_rate": round(self.global_rate, 4),
+            "watermark": self._meta("watermark"),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the customer feature store")
+    parser.add_argument("--orders", required=True, help="Processed orders (Parquet dataset or CSV)")
+    parser.add_argument("--store", default="data/customer_features.db")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute from the full history")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    store = CustomerFeatureStore(args.store, load_index=False)
+    applied = store.rebuild(args.orders) if args.rebuild else store.ingest(args.orders)
+    store.refresh()
+
+    print(f"✅ Applied {applied:,} orders in {time.perf_counter() - started:.2f}s: {store.stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
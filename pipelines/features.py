@@ -0,0 +1,51 @@
+# Feature names and the single-order feature derivation, in plain Python.
+#
+# Shared by the training pipeline (feature_eng.py) and the API. This module
+# imports nothing outside the standard library, so `import api.main` does not
+# pull in pandas, sklearn or pyarrow before a model is actually loaded.
+
+from datetime import datetime
+
+# Step 7.1: Identify Feature Types
+NUM_FEATURES = [
+    "price", "quantity", "order_value",
+    "order_dayofweek", "order_month", "is_peak_season",
+    "customer_risk_score"
+]
+
+CAT_FEATURES = [
+    "category",
+    "customer_segment",
+    "channel",
+    "device_type"
+]
+
+# What the saved pipeline takes: OrderFeatureBuilder derives the rest
+INPUT_FEATURES = ["price", "quantity", "order_date", "customer_risk_score"] + CAT_FEATURES
+
+TARGET = "delivery_delayed"
+
+PEAK_MONTHS = (10, 11, 12)
+
+
+def order_features(record, peak_months=PEAK_MONTHS):
+    """
+    order_value, order_dayofweek, order_month and is_peak_season for one
+    order dict, where not already given; returns a new dict.
+    """
+    record = dict(record)
+    if record.get("order_value") is None:
+        record["order_value"] = record["price"] * record["quantity"]
+
+    date = record.get("order_date")
+    if date is not None and (record.get("order_dayofweek") is None or record.get("order_month") is None):
+        if isinstance(date, str):
+            date = datetime.fromisoformat(date)
+        if record.get("order_dayofweek") is None:
+            record["order_dayofweek"] = date.weekday()
+        if record.get("order_month") is None:
+            record["order_month"] = date.month
+
+    if record.get("is_peak_season") is None and record.get("order_month") is not None:
+        record["is_peak_season"] = int(record["order_month"] in peak_months)
+    return record
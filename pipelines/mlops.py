@@ -1,18 +1,18 @@
 # 🟢 PHASE 5: MLOps Integration
 # Goal: Automate, track, monitor, and continuously improve your ML system.
 
-# Step 1.1: Install & Start MLflow
-%pip install mlflow
-import mlflow
+# Step 1.1: Local Experiment Tracking (no MLflow server)
+# Runs and registered models live in TRACKING_DIR (sqlite + artifact files)
+from pipelines.tracking import TRACKING_DIR, Tracker
 
-mlflow.set_tracking_uri("http://localhost:5000")
+tracker = Tracker(TRACKING_DIR)
 
 # Step 1.2: Track Experiments in Code
-import mlflow
-import mlflow.sklearn
-from sklearn.metrics import f1_score
+import os
+import tempfile
 
-mlflow.set_experiment("Delivery_Delay_Prediction")
+import joblib
+from sklearn.metrics import f1_score
 
 # Choose a model to log: prefer final_model, else best_model from grid search, else fallback to rf_pipeline
 model_to_log = (
@@ -23,14 +23,14 @@ model_to_log = (
 if model_to_log is None:
     raise ValueError("No trained model available. Run the training cells first.")
 
-with mlflow.start_run():
+with tracker.start_run("delivery_delay") as run:
     # Train (or retrain) the chosen model to ensure fresh fit in this run
     model_to_log.fit(X_train, y_train)
-    
+
     # Predict
     y_pred = model_to_log.predict(X_test)
     f1 = f1_score(y_test, y_pred)
-    
+
     # Log parameters (log a safe subset if present)
     params = {}
     if hasattr(model_to_log, "get_params"):
@@ -39,44 +39,34 @@ with mlflow.start_run():
             if k in p:
                 params[k] = p[k]
         params["model"] = model_to_log.__class__.__name__
-    mlflow.log_params(params)
-    
+    run.log_params(params)
+
     # Log metrics
-    mlflow.log_metric("f1_score", f1)
-    
-    # Log model (use name to avoid artifact_path deprecation)
-    mlflow.sklearn.log_model(model_to_log, name="model")
+    run.log_metric("f1", f1)
+
+    # Log model
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_file = os.path.join(tmp_dir, "model.pkl")
+        joblib.dump(model_to_log, model_file)
+        run.log_artifact(model_file)
 
 print("Logged run with F1:", f1)
 
 # Register the Best Model (Model Registry)
-import mlflow
-from mlflow.tracking import MlflowClient
-
-# Get the latest run from the Delivery_Delay_Prediction experiment
-client = MlflowClient()
-experiment = mlflow.get_experiment_by_name("Delivery_Delay_Prediction")
-if experiment is None:
-    raise ValueError("Experiment 'Delivery_Delay_Prediction' not found. Run the MLflow logging cell first.")
-
-runs = client.search_runs(
-    experiment_ids=[experiment.experiment_id],
-    order_by=["start_time DESC"],
-    max_results=1,
-)
+# The scripted equivalent of these cells:
+#   python -m pipelines.model_train --tracking-dir tracking --register DeliveryDelayModel
+runs = tracker.search_runs("delivery_delay", order_by="f1", limit=1)
 if len(runs) == 0:
-    raise ValueError("No runs found to register. Run the MLflow logging cell first.")
-
-run_id = runs[0].info.run_id
-model_uri = f"runs:/{run_id}/model"
+    raise ValueError("No runs found to register. Run the tracking cell first.")
 
-# Register the model
-result = mlflow.register_model(
-    model_uri=model_uri,
-    name="DeliveryDelayModel",
-)
+run_id = runs[0]["run_id"]
+result = tracker.register_model("DeliveryDelayModel", run_id)
 print(f"Registered DeliveryDelayModel version {result.version} from run {run_id}")
 
+# Promote the best registered version; the API (MODEL_REGISTRY_DIR) serves it on its next poll
+production = tracker.promote_best("DeliveryDelayModel", metric="f1")
+print(f"DeliveryDelayModel v{production.version} is in production")
+
 
 # STEP-3: Create Airflow Pipeline (Automation)
 # Step 3.1: Airflow DAG Architecture
@@ -137,37 +127,25 @@ with DAG(
     
 # STEP-4: Enable Retraining Trigger
 # STEP-4.2: Trigger 2: Data Drift
-# Drift Detection with Evidently AI
-%pip install evidently
+# Drift Detection with pipelines/drift.py (NumPy sketches, no Evidently)
+# Reference: <model>.drift.json written by model_train.py from the training features
+# Current: orders scored by the API, captured by the audit log (AUDIT_LOG_DIR)
+# The same check runs hourly from a scheduler:
+#   python -m pipelines.drift check --reference delivery_delay_model.drift.json --audit logs/audit --hours 1 --fail-on-drift
+# and live from the API at GET /drift when DRIFT_REFERENCE_PATH is set.
+import os
+from datetime import datetime, timedelta, timezone
+from pipelines.drift import check_audit
+
+drift = check_audit(
+    os.getenv("DRIFT_REFERENCE_PATH", "delivery_delay_model.drift.json"),
+    os.getenv("AUDIT_LOG_DIR", "logs/audit"),
+    start=datetime.now(timezone.utc) - timedelta(days=7)
+)
 
-try:
-    from evidently.report import Report
-    from evidently.metric_preset import DataDriftPreset
-    
-    # Create the drift report
-    report = Report(metrics=[DataDriftPreset()])
-    print("Using DataDriftPreset")
-except ImportError:
-    try:
-        from evidently import Report
-        from evidently.metrics import DatasetDriftMetric
-        
-        # Create the drift report
-        report = Report(metrics=[DatasetDriftMetric()])
-        print("Using DatasetDriftMetric")
-    except ImportError:
-        print("Evidently API changed. Please check the documentation at https://docs.evidentlyai.com/")
-        report = None
-
-if report:
-    # Note: You need actual train_df and new_df for this to work
-    # Placeholder example - replace with your actual dataframes
-    # train_df = X_train  # Reference data from training
-    # new_df = X_test     # New data to check for drift
-    
-    # Uncomment and run when you have actual data:
-    # report.run(reference_data=train_df, current_data=new_df)
-    # report.save_html("drift_report.html")
-    
-    print("Drift detection ready. Uncomment the report.run() lines to generate report with your data.")
-    
+if drift["rows"] == 0:
+    print("No audited orders yet. Set AUDIT_LOG_DIR on the API to capture serving data.")
+elif drift["drifted"]:
+    print(f"Drift in {drift['drifted']} over {drift['rows']:,} served orders: retraining recommended")
+else:
+    print(f"No drift over {drift['rows']:,} served orders")
@@ -1,115 +1,378 @@
 # 🟢 PHASE 4: ML Modeling
 # Goal: Train models, compare them, tune the best one, and save a production-ready model.
 # We’ll do this in 4 clear steps:
-# 1. Train baseline models 
+# 1. Train baseline models
 # 2. Evaluate & compare
-# 3. Tune Random Forest / XGBoost
+# 3. Tune Random Forest
 # 4. Select & save the best model
+#
+# Order features (pipelines/feature_eng.OrderFeatureBuilder) are derived and
+# the preprocessor fitted once on the training split. The transformed
+# matrices are written to .npy files that every worker memory-maps, and the
+# candidate models are fitted concurrently in a process pool. `--cores` caps
+# the total: workers x threads per model never exceeds it.
+#
+# Next to the model it writes <output>.metrics.json and <output>.drift.json,
+# the training-feature reference for pipelines/drift.py. With --tracking-dir
+# the run's params, metrics and artifacts are logged to the local tracker
+# (pipelines/tracking.py), and --register adds the model to its registry.
+#
+# --out-of-core streams the data instead and trains incremental models on
+# sparse batches (pipelines/stream_train.py), for histories larger than RAM.
+#
+# Usage:
+#   python -m pipelines.model_train --data data/ecommerce_orders_processed.parquet \
+#       --output delivery_delay_model.pkl --cores 8
+#   python -m pipelines.model_train --tracking-dir tracking --register DeliveryDelayModel --stage production
 
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# STEP 1: Train–Test Split
-from sklearn.model_selection import train_test_split
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
-
-# STEP 2: Train Baseline Models
-# 2.1 Logistic Regression
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
 
-lr_pipeline = Pipeline(steps=[
-    ("preprocessor", preprocessor),
-    ("model", LogisticRegression(max_iter=1000))
-])
-lr_pipeline.fit(X_train, y_train)
+from pipelines.drift import DriftProfile
+from pipelines.feature_eng import PROCESSED_DATA_PATH, OrderFeatureBuilder, build_preprocessor, load_features
+from pipelines.search import SuccessiveHalvingSearch
+from pipelines.tracking import Tracker
 
-# 2.2 Decision Tree
-from sklearn.tree import DecisionTreeClassifier
+logger = logging.getLogger(__name__)
 
-dt_pipeline = Pipeline(steps=[
-    ("preprocessor", preprocessor),
-    ("model", DecisionTreeClassifier(random_state=42))
-])
-dt_pipeline.fit(X_train, y_train)
+RANDOM_STATE = 42
+EXPERIMENT = "delivery_delay"
 
-# 2.3 Random Forest
-from sklearn.ensemble import RandomForestClassifier
+# STEP 4.1: Parameter Grid for the Random Forest search
+PARAM_GRID = {
+    "model__n_estimators": [100, 200, 300],
+    "model__max_depth": [None, 10, 20],
+    "model__min_samples_split": [2, 5, 10]
+}
 
-rf_pipeline = Pipeline(steps=[
-    ("preprocessor", preprocessor),
-    ("model", RandomForestClassifier(
-        n_estimators=100,
-        random_state=42
-    ))
-])
-rf_pipeline.fit(X_train, y_train)
 
+# STEP 2: Baseline Models
+def baseline_models(random_state=RANDOM_STATE):
+    models = {
+        "logistic_regression": LogisticRegression(max_iter=1000),
+        "decision_tree": DecisionTreeClassifier(random_state=random_state),
+        "random_forest": RandomForestClassifier(n_estimators=100, random_state=random_state),
+    }
 
-# STEP 3: Evaluate Baseline Models
-from sklearn.metrics import accuracy_score, classification_report
+    # STEP 5: (Optional) XGBoost Model
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        logger.info("xgboost not installed, skipping the XGBoost baseline")
+    else:
+        models["xgboost"] = XGBClassifier(
+            n_estimators=300,
+            max_depth=6,
+            learning_rate=0.1,
+            random_state=random_state
+        )
+    return models
 
-def evaluate_model(model, X_test, y_test, name):
+
+# STEP 3: Evaluate Models
+def evaluate_model(model, X_test, y_test):
     y_pred = model.predict(X_test)
-    print(f"\n{name} Performance:")
-    print("Accuracy:", accuracy_score(y_test, y_pred))
-    print(classification_report(y_test, y_pred))
+    metrics = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+        "f1": f1_score(y_test, y_pred, zero_division=0),
+    }
+    if hasattr(model, "predict_proba"):
+        metrics["roc_auc"] = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+    return {name: round(float(value), 4) for name, value in metrics.items()}
 
-evaluate_model(lr_pipeline, X_test, y_test, "Logistic Regression")
-evaluate_model(dt_pipeline, X_test, y_test, "Decision Tree")
-evaluate_model(rf_pipeline, X_test, y_test, "Random Forest")
 
+def core_budget(cores, n_models):
+    """Split `cores` into (workers, threads per model) without oversubscribing."""
+    cores = max(1, cores or os.cpu_count() or 1)
+    workers = max(1, min(n_models, cores))
+    return workers, max(1, cores // workers)
 
-# STEP 4: Hyperparameter Tuning (Random Forest)
-# 4.1 Define Parameter Grid
-param_grid = {
-    "model__n_estimators": [100, 200, 300],
-    "model__max_depth": [None, 10, 20],
-    "model__min_samples_split": [2, 5, 10]
-}
 
-# 4.2 Grid Search
-from sklearn.model_selection import GridSearchCV
+def _limit_threads(estimator, threads):
+    # Only tree ensembles parallelise internally
+    if hasattr(estimator, "n_estimators") and "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=threads)
+    return estimator
 
-grid_search = GridSearchCV(
-    rf_pipeline,
-    param_grid,
-    cv=3,
-    scoring="f1",
-    n_jobs=-1,
-    verbose=1
-)
-grid_search.fit(X_train, y_train)
 
-# 4.3 Best Model
-best_model = grid_search.best_estimator_
-print("Best Parameters:", grid_search.best_params_)
+# ---------------------------------------------------
+# Pool Worker
+# ---------------------------------------------------
+_worker_matrices = {}
 
 
-# STEP 5: (Optional) XGBoost Model
-from xgboost import XGBClassifier
+def _init_worker(matrix_dir, threads):
+    # BLAS / OpenMP pools inside the worker follow the same per-model budget
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
 
-xgb_pipeline = Pipeline(steps=[
-    ("preprocessor", preprocessor),
-    ("model", XGBClassifier(
-        n_estimators=300,
-        max_depth=6,
-        learning_rate=0.1,
-        random_state=42
-    ))
-])
-xgb_pipeline.fit(X_train, y_train)
-evaluate_model(xgb_pipeline, X_test, y_test, "XGBoost")
+    for name in ("X_train", "y_train", "X_test", "y_test"):
+        _worker_matrices[name] = np.load(os.path.join(matrix_dir, f"{name}.npy"), mmap_mode="r")
 
-# STEP 6: Final Model Selection
-final_model = best_model   # or xgb_pipeline
 
+def _fit_candidate(name, estimator):
+    m = _worker_matrices
+    started = time.perf_counter()
+    estimator.fit(m["X_train"], m["y_train"])
+    fit_seconds = time.perf_counter() - started
+
+    metrics = evaluate_model(estimator, m["X_test"], m["y_test"])
+    metrics["fit_seconds"] = round(fit_seconds, 2)
+    return name, estimator, metrics
+
+
+def fit_candidates(models, matrices, cores=None):
+    """Fit every model on the shared transformed matrices in a process pool."""
+    workers, threads = core_budget(cores, len(models))
+    logger.info(f"Fitting {len(models)} models: {workers} workers x {threads} threads")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="model_train_") as matrix_dir:
+        for name, array in matrices.items():
+            np.save(os.path.join(matrix_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(matrix_dir, threads)
+        ) as pool:
+            futures = [
+                pool.submit(_fit_candidate, name, _limit_threads(clone(model), threads))
+                for name, model in models.items()
+            ]
+            for future in as_completed(futures):
+                name, estimator, metrics = future.result()
+                logger.info(f"{name}: {metrics}")
+                results[name] = (estimator, metrics)
+    return results
+
+
+def _save_atomic(write, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_json(payload, path):
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def train(data_path=PROCESSED_DATA_PATH, output_path="delivery_delay_model.pkl", metrics_path=None,
+          cores=None, train_from=None, train_to=None, test_size=0.2, search=True,
+          search_checkpoint=None, select_by="f1", random_state=RANDOM_STATE,
+          tracking_dir=None, experiment=EXPERIMENT, register_as=None, stage=None):
+    started = time.perf_counter()
+    cores = cores or os.cpu_count() or 1
+
+    X, y = load_features(data_path, train_from, train_to)
+
+    # STEP 1: Train–Test Split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y
+    )
+
+    # Order features and one fitted preprocessor shared by every baseline;
+    # the saved pipelines start with the same (stateless) feature step
+    features = OrderFeatureBuilder()
+    F_train, F_test = features.transform(X_train), features.transform(X_test)
+    preprocessor = build_preprocessor().fit(F_train, y_train)
+    matrices = {
+        "X_train": preprocessor.transform(F_train),
+        "y_train": y_train.to_numpy(),
+        "X_test": preprocessor.transform(F_test),
+        "y_test": y_test.to_numpy(),
+    }
+
+    # STEP 2-3: Train & Evaluate Baseline Models
+    candidates = {
+        name: (Pipeline(steps=[("features", features), ("preprocessor", preprocessor), ("model", estimator)]), metrics)
+        for name, (estimator, metrics) in fit_candidates(
+            baseline_models(random_state), matrices, cores
+        ).items()
+    }
+
+    # STEP 4: Hyperparameter Tuning (Random Forest)
+    search_summary = None
+    if search:
+        tuner = SuccessiveHalvingSearch(
+            build_preprocessor(),
+            RandomForestClassifier(random_state=random_state, n_jobs=cores),
+            PARAM_GRID,
+            scoring="f1",
+            cv=3,
+            eta=3,
+            n_jobs=cores,
+            checkpoint_path=search_checkpoint,
+            random_state=random_state
+        ).fit(F_train, y_train)
+        search_summary = tuner.summary()
+        tuned = Pipeline(steps=[("features", features)] + tuner.best_estimator_.steps)
+        candidates["random_forest_tuned"] = (tuned, evaluate_model(tuned, X_test, y_test))
+
+    # STEP 6: Final Model Selection
+    winner = max(candidates, key=lambda name: candidates[name][1][select_by])
+    final_model = candidates[winner][0]
+    _limit_threads(final_model[-1], 1)  # serving sets its own n_jobs
+
+    # Save the Model (.pkl) and its metrics
+    _save_atomic(lambda path: joblib.dump(final_model, path), output_path)
+
+    metrics = {
+        "winner": winner,
+        "selected_by": select_by,
+        "models": {name: metrics for name, (_, metrics) in candidates.items()},
+        "search": search_summary,
+        "data": {
+            "path": str(data_path),
+            "train_from": train_from,
+            "train_to": train_to,
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            "delayed_rate": round(float(y.mean()), 4),
+        },
+        "cores": cores,
+        "random_state": random_state,
+        "versions": {"sklearn": sklearn.__version__, "numpy": np.__version__},
+        "model_path": str(output_path),
+        "drift_reference": f"{os.path.splitext(output_path)[0]}.drift.json",
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    metrics_path = metrics_path or f"{os.path.splitext(output_path)[0]}.metrics.json"
+    _save_atomic(lambda path: _write_json(metrics, path), metrics_path)
+
+    # Reference for drift checks on serving data (pipelines/drift.py)
+    DriftProfile.fit(F_train).save(metrics["drift_reference"])
+
+    if tracking_dir:
+        metrics["tracking"] = track_run(
+            Tracker(tracking_dir), metrics, metrics_path, experiment, register_as, stage
+        )
+    return metrics
+
+
+def track_run(tracker, metrics, metrics_path, experiment=EXPERIMENT, register_as=None, stage=None):
+    """Log a finished training run to the local tracker and optionally register its model."""
+    with tracker.start_run(experiment, name=metrics["winner"]) as run:
+        run.log_params({
+            "winner": metrics["winner"],
+            "selected_by": metrics["selected_by"],
+            "cores": metrics["cores"],
+            "random_state": metrics["random_state"],
+            **{f"data.{key}": value for key, value in metrics["data"].items()},
+            **(metrics["search"] or {}).get("best_params", {}),
+        })
+        run.log_metrics(metrics["models"][metrics["winner"]])
+        for name, scores in metrics["models"].items():
+            run.log_metrics({f"{name}.{key}": value for key, value in scores.items()})
+        run.log_metric("train_seconds", metrics["seconds"])
+        run.set_tags({f"versions.{key}": value for key, value in metrics["versions"].items()})
+
+        run.log_artifact(metrics["model_path"], "model.pkl")
+        run.log_artifact(metrics_path, "metrics.json")
+        run.log_artifact(metrics["drift_reference"], "model.drift.json")
+
+    tracked = {"run_id": run.run_id}
+    if register_as:
+        model = tracker.register_model(register_as, run.run_id)
+        if stage:
+            model = tracker.transition(register_as, model.version, stage)
+        tracked.update(model=register_as, version=model.version, stage=model.stage)
+    return tracked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, compare and save the delivery delay model")
+    parser.add_argument("--data", default=PROCESSED_DATA_PATH, help="Processed orders (Parquet dataset or CSV)")
+    parser.add_argument("--output", default="delivery_delay_model.pkl")
+    parser.add_argument("--metrics", help="Metrics JSON path (default: <output>.metrics.json)")
+    parser.add_argument("--cores", type=int, default=None, help="Total CPU budget (default: all cores)")
+    parser.add_argument("--train-from", default=os.getenv("TRAIN_FROM"), help="First order month, YYYY-MM")
+    parser.add_argument("--train-to", default=os.getenv("TRAIN_TO"), help="Last order month, YYYY-MM")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--no-search", action="store_true", help="Skip the Random Forest search")
+    parser.add_argument("--search-checkpoint", default=os.getenv("SEARCH_CHECKPOINT", "model/search_trials.jsonl"))
+    parser.add_argument("--select-by", default="f1", choices=["f1", "roc_auc", "accuracy", "precision", "recall"])
+    parser.add_argument("--random-state", type=int, default=RANDOM_STATE)
+    parser.add_argument("--tracking-dir", default=os.getenv("TRACKING_DIR"), help="Log the run to this local tracker")
+    parser.add_argument("--experiment", default=EXPERIMENT)
+    parser.add_argument("--register", help="Register the model under this name (needs --tracking-dir)")
+    parser.add_argument("--stage", choices=["staging", "production"], help="Stage for the registered version")
+    parser.add_argument("--out-of-core", action="store_true", help="Stream batches into partial_fit models")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the data (--out-of-core)")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Rows per batch (--out-of-core)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.out_of_core:
+        from pipelines.stream_train import train_out_of_core
+
+        metrics = train_out_of_core(
+            data_path=args.data,
+            output_path=args.output,
+            metrics_path=args.metrics,
+            train_from=args.train_from,
+            train_to=args.train_to,
+            test_size=args.test_size,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            select_by=args.select_by,
+            random_state=args.random_state,
+            tracking_dir=args.tracking_dir,
+            experiment=args.experiment,
+            register_as=args.register,
+            stage=args.stage
+        )
+    else:
+        metrics = train(
+            data_path=args.data,
+            output_path=args.output,
+            metrics_path=args.metrics,
+            cores=args.cores,
+            train_from=args.train_from,
+            train_to=args.train_to,
+            test_size=args.test_size,
+            search=not args.no_search,
+            search_checkpoint=args.search_checkpoint,
+            select_by=args.select_by,
+            random_state=args.random_state,
+            tracking_dir=args.tracking_dir,
+            experiment=args.experiment,
+            register_as=args.register,
+            stage=args.stage
+        )
+
+    print(f"✅ Saved {metrics['winner']} to {metrics['model_path']} in {metrics['seconds']}s")
+    for name, scores in sorted(metrics["models"].items(), key=lambda item: -item[1][args.select_by]):
+        print(f"   {name:<22} {args.select_by}={scores[args.select_by]:.4f}")
+    if "tracking" in metrics:
+        print(f"📒 Tracked run {metrics['tracking']['run_id']}: {metrics['tracking']}")
+    return metrics
 
-# Save the Model (.pkl)
-import joblib
 
-joblib.dump(final_model, "delivery_delay_model.pkl")
+if __name__ == "__main__":
+    main()
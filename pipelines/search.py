@@ -0,0 +1,277 @@
+# Hyperparameter Search
+# Goal: tune a model without paying for the preprocessor and for bad
+# candidates over and over.
+#
+# - The preprocessor is fitted once per CV fold and every candidate trains on
+#   the same precomputed fold matrices.
+# - Successive halving: every candidate is scored on the first fold, only the
+#   best 1/eta move on to the next fold, and so on.
+# - Each completed (candidate, fold) trial is appended to a JSONL checkpoint.
+#   An interrupted search started again with the same data and settings
+#   reuses those trials instead of refitting them.
+# - Every trial records its fit and score wall time.
+
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Fold:
+    X_train: np.ndarray
+    y_train: np.ndarray
+    X_valid: np.ndarray
+    y_valid: np.ndarray
+
+
+def precompute_folds(preprocessor, X, y, cv=3, random_state=42):
+    """Fit a fresh copy of `preprocessor` on each training split, once."""
+    y = np.asarray(y)
+    splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    folds = []
+    for train_index, valid_index in splitter.split(X, y):
+        fitted = clone(preprocessor).fit(X.iloc[train_index], y[train_index])
+        folds.append(Fold(
+            X_train=fitted.transform(X.iloc[train_index]),
+            y_train=y[train_index],
+            X_valid=fitted.transform(X.iloc[valid_index]),
+            y_valid=y[valid_index]
+        ))
+    return folds
+
+
+def _describe(estimator):
+    # Class and nested params; nested estimators are covered by their own params
+    params = estimator.get_params(deep=True)
+    return type(estimator).__name__, sorted(
+        ((key, value) for key, value in params.items() if not hasattr(value, "get_params")), key=str
+    )
+
+
+def _strip_prefix(params, prefix="model__"):
+    # Accept GridSearchCV-style keys written against the full pipeline
+    return {key[len(prefix):] if key.startswith(prefix) else key: value for key, value in params.items()}
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+# ---------------------------------------------------
+# Trial Execution
+# ---------------------------------------------------
+_worker_state = {}
+
+
+def _init_worker(estimator, folds, scoring):
+    # Fold matrices are shipped to each worker once, not with every trial
+    _worker_state.update(estimator=estimator, folds=folds, scoring=scoring)
+
+
+def _run_trial(params, fold_index, estimator=None, folds=None, scoring=None):
+    estimator = estimator if estimator is not None else _worker_state["estimator"]
+    folds = folds if folds is not None else _worker_state["folds"]
+    scoring = scoring if scoring is not None else _worker_state["scoring"]
+    fold = folds[fold_index]
+
+    model = clone(estimator).set_params(**params)
+    started = time.perf_counter()
+    model.fit(fold.X_train, fold.y_train)
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    score = get_scorer(scoring)(model, fold.X_valid, fold.y_valid)
+    score_seconds = time.perf_counter() - started
+
+    return {
+        "params": params,
+        "fold": fold_index,
+        "score": float(score),
+        "fit_seconds": round(fit_seconds, 4),
+        "score_seconds": round(score_seconds, 4),
+    }
+
+
+# ---------------------------------------------------
+# Successive Halving Search
+# ---------------------------------------------------
+class SuccessiveHalvingSearch:
+    """
+    Fold-wise successive halving over a parameter grid.
+
+    Rung r scores the surviving candidates on fold r; candidates are ranked
+    by their mean score over the folds seen so far and the top
+    ceil(n / eta) survive. With 27 candidates, 3 folds and eta=3 that is
+    27 + 9 + 3 fits instead of 81. `best_estimator_` is the preprocessor and
+    the winning model refitted on all of X.
+
+    `n_jobs` worker processes run the trials of a rung in parallel; the
+    estimator's own `n_jobs` is set to 1 then, so cores aren't oversubscribed.
+    """
+
+    def __init__(self, preprocessor, estimator, param_grid, scoring="f1", cv=3, eta=3,
+                 n_jobs=1, checkpoint_path=None, random_state=42, refit=True):
+        self.preprocessor = preprocessor
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.eta = eta
+        self.n_jobs = n_jobs
+        self.checkpoint_path = checkpoint_path
+        self.random_state = random_state
+        self.refit = refit
+
+    # ---------------------------------------------------
+    # Checkpointing
+    # ---------------------------------------------------
+    def _search_id(self, X, y):
+        # Trials are only reused by a search over the same data and settings:
+        # the feature values, the target, the preprocessor and the estimator
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(np.ascontiguousarray(np.asarray(y)).tobytes())
+        digest.update(str(X.shape).encode())
+        digest.update(",".join(map(str, X.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+        digest.update(repr((
+            _describe(self.preprocessor), _describe(self.estimator),
+            self.scoring, self.cv, self.random_state
+        )).encode())
+        return digest.hexdigest()
+
+    def _load_checkpoint(self, search_id):
+        trials = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return trials
+
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    trial = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted write
+                if trial.get("search_id") == search_id:
+                    trials[(_params_key(trial["params"]), trial["fold"])] = trial
+        return trials
+
+    def _save_trial(self, trial):
+        if not self.checkpoint_path:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        with open(self.checkpoint_path, "a") as f:
+            f.write(json.dumps(trial, default=str) + "\n")
+            f.flush()
+
+    # ---------------------------------------------------
+    # Search
+    # ---------------------------------------------------
+    def _run(self, pending, estimator, folds):
+        if not pending:
+            return
+        if self.n_jobs == 1:
+            for params, fold_index in pending:
+                yield _run_trial(params, fold_index, estimator, folds, self.scoring)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=os.cpu_count() if self.n_jobs == -1 else self.n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(estimator, folds, self.scoring)
+        ) as pool:
+            futures = [pool.submit(_run_trial, params, fold_index) for params, fold_index in pending]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def fit(self, X, y):
+        started = time.perf_counter()
+        search_id = self._search_id(X, y)
+        estimator = clone(self.estimator)
+        if self.n_jobs != 1 and "n_jobs" in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+
+        candidates = [_strip_prefix(params) for params in ParameterGrid(self.param_grid)]
+        done = self._load_checkpoint(search_id)
+        if done:
+            logger.info(f"Resuming search {search_id}: {len(done)} trials already checkpointed")
+
+        fold_started = time.perf_counter()
+        folds = precompute_folds(self.preprocessor, X, y, self.cv, self.random_state)
+        self.preprocess_seconds_ = time.perf_counter() - fold_started
+
+        scores = {_params_key(params): [] for params in candidates}
+        self.trials_ = []
+        survivors = candidates
+        self.rungs_ = []
+
+        for fold_index in range(self.cv):
+            pending = []
+            for params in survivors:
+                trial = done.get((_params_key(params), fold_index))
+                if trial is None:
+                    pending.append((params, fold_index))
+                else:
+                    self._record(trial, scores, resumed=True)
+
+            for trial in self._run(pending, estimator, folds):
+                trial["search_id"] = search_id
+                self._save_trial(trial)
+                self._record(trial, scores, resumed=False)
+
+            ranked = sorted(survivors, key=lambda p: np.mean(scores[_params_key(p)]), reverse=True)
+            self.rungs_.append({"fold": fold_index, "candidates": len(survivors), "fitted": len(pending)})
+            if fold_index < self.cv - 1:
+                survivors = ranked[:max(1, math.ceil(len(ranked) / self.eta))]
+            else:
+                survivors = ranked
+
+        best = survivors[0]
+        self.best_params_ = best
+        self.best_score_ = float(np.mean(scores[_params_key(best)]))
+        self.search_seconds_ = time.perf_counter() - started
+
+        if self.refit:
+            model = clone(self.estimator).set_params(**best)
+            self.best_estimator_ = Pipeline(steps=[
+                ("preprocessor", clone(self.preprocessor)),
+                ("model", model)
+            ]).fit(X, y)
+        return self
+
+    def _record(self, trial, scores, resumed):
+        scores[_params_key(trial["params"])].append(trial["score"])
+        self.trials_.append({**trial, "resumed": resumed})
+        logger.info(
+            f"fold {trial['fold']} {trial['params']}: {self.scoring}={trial['score']:.4f} "
+            f"fit {trial['fit_seconds']:.2f}s score {trial['score_seconds']:.2f}s"
+            + (" (checkpoint)" if resumed else "")
+        )
+
+    def summary(self):
+        fitted = [trial for trial in self.trials_ if not trial["resumed"]]
+        return {
+            "best_params": self.best_params_,
+            "best_score": round(self.best_score_, 4),
+            "candidates": self.rungs_[0]["candidates"],
+            "trials_fitted": len(fitted),
+            "trials_resumed": len(self.trials_) - len(fitted),
+            "trial_seconds": round(sum(t["fit_seconds"] + t["score_seconds"] for t in fitted), 2),
+            "preprocess_seconds": round(self.preprocess_seconds_, 2),
+            "search_seconds": round(self.search_seconds_, 2),
+            "rungs": self.rungs_,
+        }
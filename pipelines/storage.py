@@ -0,0 +1,202 @@
+# Columnar storage for the order datasets.
+#
+# Processed orders are kept as a Parquet dataset partitioned by order month
+# (`order_period=YYYY-MM/part-*.parquet`). Dates and dtypes are stored in the
+# files, so readers skip CSV parsing and type inference, load only the
+# columns they ask for and prune whole months through partition filters.
+# CSV paths are still accepted everywhere for small/legacy files.
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+PARTITION_COLUMN = "order_period"
+
+# Low-cardinality text columns restored as pandas `category` on read
+CATEGORICAL_COLUMNS = [
+    "category", "delivery_status", "payment_method",
+    "device_type", "channel", "customer_segment"
+]
+DATE_COLUMNS = ["order_date", "shipping_date"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet storage requires pyarrow. Install it with `pip install pyarrow`."
+        ) from exc
+    return pyarrow
+
+
+def is_csv(path):
+    return str(path).lower().endswith(".csv")
+
+
+def add_partition_column(df):
+    # Format each distinct month once instead of every row
+    months = pd.to_datetime(df["order_date"]).to_numpy().astype("datetime64[M]")
+    uniques, codes = np.unique(months, return_inverse=True)
+    labels = np.asarray(pd.Index(uniques).strftime("%Y-%m"), dtype=object)
+    df[PARTITION_COLUMN] = labels[codes.ravel()]
+    return df
+
+
+def _to_table(df):
+    pa = _pyarrow()
+    df = df.copy()
+    # Store categoricals as plain strings: Parquet dictionary-encodes them
+    # anyway, and it keeps the schema identical across chunks
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+class OrdersWriter:
+    """
+    Append DataFrame chunks to a month-partitioned Parquet dataset.
+
+    Files are written into `<path>.tmp` and moved into place by `close()`,
+    so readers never see a half-written dataset.
+    """
+
+    def __init__(self, path):
+        self.path = str(path).rstrip("/\\")
+        self.tmp_path = f"{self.path}.tmp"
+        self.chunks = 0
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def write(self, df):
+        pa = _pyarrow()
+        if PARTITION_COLUMN not in df:
+            df = add_partition_column(df)
+
+        pa.parquet.write_to_dataset(
+            _to_table(df),
+            root_path=self.tmp_path,
+            partition_cols=[PARTITION_COLUMN],
+            basename_template=f"part-{self.chunks:05d}-{{i}}.parquet",
+        )
+        self.chunks += 1
+
+    def close(self):
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        if os.path.isdir(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def write_orders(df, path):
+    if is_csv(path):
+        df.to_csv(path, index=False)
+        return
+    with OrdersWriter(path) as writer:
+        writer.write(df)
+
+
+def period_filters(start=None, end=None):
+    """Partition filters for an inclusive YYYY-MM range; None means unbounded."""
+    filters = []
+    if start:
+        filters.append((PARTITION_COLUMN, ">=", start))
+    if end:
+        filters.append((PARTITION_COLUMN, "<=", end))
+    return filters or None
+
+
+def list_periods(path):
+    """Sorted order months of a partitioned Parquet dataset; None for a CSV or single file."""
+    if is_csv(path) or not os.path.isdir(path):
+        return None
+    prefix = f"{PARTITION_COLUMN}="
+    return sorted(
+        entry.name[len(prefix):] for entry in os.scandir(path)
+        if entry.is_dir() and entry.name.startswith(prefix)
+    )
+
+
+def _apply_filters(df, filters):
+    ops = {
+        "=": lambda s, v: s == v, "==": lambda s, v: s == v, "!=": lambda s, v: s != v,
+        "<": lambda s, v: s < v, "<=": lambda s, v: s <= v,
+        ">": lambda s, v: s > v, ">=": lambda s, v: s >= v,
+        "in": lambda s, v: s.isin(v), "not in": lambda s, v: ~s.isin(v),
+    }
+    for column, op, value in filters or []:
+        if column == PARTITION_COLUMN and column not in df:
+            add_partition_column(df)
+        df = df[ops[op](df[column], value)]
+    return df
+
+
+def _dataset(path):
+    pa = _pyarrow()
+    return pa.dataset.dataset(path, format="parquet", partitioning="hive")
+
+
+def _to_pandas(table):
+    categories = [column for column in CATEGORICAL_COLUMNS if column in table.column_names]
+    return table.to_pandas(categories=categories)
+
+
+def read_orders(path, columns=None, filters=None):
+    """
+    Load orders from a Parquet dataset (or CSV file).
+
+    `columns` projects the read to the listed columns. `filters` uses the
+    pyarrow list-of-tuples form, e.g. [("order_period", ">=", "2024-06")].
+    It is pushed down to the Parquet reader, so unmatched month partitions
+    and row groups are never read.
+    """
+    if is_csv(path):
+        usecols = None
+        if columns is not None:
+            usecols = lambda column: column.strip() in set(columns) | {"order_date"}
+        df = pd.read_csv(path, usecols=usecols)
+        df.columns = df.columns.str.strip()
+        for column in DATE_COLUMNS:
+            if column in df:
+                df[column] = pd.to_datetime(df[column])
+        df = _apply_filters(df, filters)
+        return df[columns] if columns is not None else df
+
+    pa = _pyarrow()
+    table = pa.parquet.read_table(path, columns=columns, filters=filters, partitioning="hive")
+    return _to_pandas(table)
+
+
+def iter_orders(path, columns=None, filters=None, batch_size=500_000):
+    """Stream orders as DataFrames of at most `batch_size` rows."""
+    if is_csv(path):
+        for chunk in pd.read_csv(path, chunksize=batch_size):
+            chunk.columns = chunk.columns.str.strip()
+            for column in DATE_COLUMNS:
+                if column in chunk:
+                    chunk[column] = pd.to_datetime(chunk[column])
+            chunk = _apply_filters(chunk, filters)
+            yield chunk[columns] if columns is not None else chunk
+        return
+
+    pa = _pyarrow()
+    dataset = _dataset(path)
+    expression = pa.parquet.filters_to_expression(filters) if filters else None
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size):
+        if batch.num_rows:
+            yield _to_pandas(pa.Table.from_batches([batch]))
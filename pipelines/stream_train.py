@@ -0,0 +1,288 @@
+# 🟢 PHASE 4b: Out-of-Core Training
+# Goal: retrain on the full order history on a fixed-memory machine.
+#
+# model_train.py holds the whole training set and a dense one-hot matrix in
+# memory. This mode streams the processed orders instead, in batches of
+# `batch_size` rows:
+#   1. cache pass: one month partition at a time, the time-aware
+#      customer_risk_score (pipelines/customer_risk.py), order features and
+#      the train/test assignment, written once to a temporary Parquet file
+#      (one row group per batch), plus the one-hot vocabulary
+#   2. scaling pass: StandardScaler.partial_fit, class counts, drift sample
+#   3. `epochs` training passes: sparse batches into SGDClassifier.partial_fit
+#   4. evaluation pass over the held-out rows with streaming metrics
+# Passes 2-4 read the cache a row group at a time, so customer risk is
+# computed once. Each row's train/test assignment is drawn from a generator
+# seeded with (random_state, batch index). Memory is bounded by the largest
+# month partition, the vocabulary and the models; the input must be the
+# month-partitioned Parquet dataset from data_prep.py (a CSV or single file
+# would be read whole, so it is rejected).
+#
+# The saved pipeline has the usual features -> preprocessor -> model shape,
+# so the API, the compiled scorer and the tracker treat it like any other.
+#
+# Usage:
+#   python -m pipelines.model_train --out-of-core --epochs 3 --batch-size 100000 \
+#       --data data/ecommerce_orders_processed.parquet --output delivery_delay_model.pkl
+
+import logging
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from pipelines.customer_risk import iter_customer_risk
+from pipelines.drift import DriftProfile
+from pipelines.feature_eng import (
+    CAT_FEATURES, FEATURE_SOURCE_COLUMNS, INPUT_FEATURES, NUM_FEATURES, PROCESSED_DATA_PATH, TARGET,
+    OrderFeatureBuilder, build_preprocessor
+)
+from pipelines.model_train import EXPERIMENT, RANDOM_STATE, _save_atomic, _write_json, track_run
+from pipelines.storage import _pyarrow, list_periods
+from pipelines.tracking import Tracker
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100_000
+DRIFT_SAMPLE_ROWS = 100_000  # training rows kept for the drift reference
+AUC_BINS = 1000
+CLASSES = np.array([0, 1])
+
+
+# Incremental Models (partial_fit, sparse input)
+def streaming_models(random_state=RANDOM_STATE):
+    return {
+        "sgd_logistic": SGDClassifier(loss="log_loss", alpha=1e-4, random_state=random_state),
+        "sgd_modified_huber": SGDClassifier(loss="modified_huber", alpha=1e-4, random_state=random_state),
+    }
+
+
+# Streaming Evaluation
+class StreamingMetrics:
+    """
+    evaluate_model() for data seen in batches.
+
+    Keeps a confusion matrix and per-class histograms of the predicted
+    probability; ROC AUC is computed from the histograms (`bins` buckets),
+    so it matches the exact value to about 1 / bins.
+    """
+
+    def __init__(self, threshold=0.5, bins=AUC_BINS):
+        self.threshold = threshold
+        self.bins = bins
+        self.confusion = np.zeros((2, 2), dtype=np.int64)  # [actual, predicted]
+        self.histograms = np.zeros((2, bins), dtype=np.int64)
+
+    def update(self, y_true, probabilities):
+        y_true = np.asarray(y_true, dtype=np.int64)
+        predicted = (probabilities > self.threshold).astype(np.int64)
+        self.confusion += np.bincount(2 * y_true + predicted, minlength=4).reshape(2, 2)
+        buckets = np.minimum((probabilities * self.bins).astype(np.int64), self.bins - 1)
+        for label in (0, 1):
+            self.histograms[label] += np.bincount(buckets[y_true == label], minlength=self.bins)
+        return self
+
+    def result(self):
+        (tn, fp), (fn, tp) = self.confusion
+        total = self.confusion.sum()
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+        # ROC curve from the highest-probability bucket down; trapezoids count
+        # ties within a bucket as half right
+        positives, negatives = self.histograms[1][::-1], self.histograms[0][::-1]
+        tpr = np.concatenate([[0], np.cumsum(positives)]) / max(positives.sum(), 1)
+        fpr = np.concatenate([[0], np.cumsum(negatives)]) / max(negatives.sum(), 1)
+        roc_auc = np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)
+
+        metrics = {
+            "accuracy": (tp + tn) / total if total else 0.0,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "roc_auc": roc_auc,
+        }
+        return {name: round(float(value), 4) for name, value in metrics.items()}
+
+
+# ---------------------------------------------------
+# Passes
+# ---------------------------------------------------
+def _cache_schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [(column, pa.float64()) for column in NUM_FEATURES]
+        + [(column, pa.string()) for column in CAT_FEATURES]
+        + [(TARGET, pa.int8()), ("is_test", pa.bool_())]
+    )
+
+
+def cache_batches(path, cache_path, train_from=None, train_to=None, batch_size=BATCH_SIZE, test_size=0.2,
+                  random_state=RANDOM_STATE):
+    """
+    Write each batch's order features, target and is_test mask to
+    `cache_path` as one Parquet row group. Returns the one-hot categories
+    per CAT_FEATURES column and the row count.
+    """
+    pa = _pyarrow()
+    features = OrderFeatureBuilder()
+    seen = {column: set() for column in CAT_FEATURES}
+    index = rows = 0
+    with pa.parquet.ParquetWriter(cache_path, _cache_schema()) as writer:
+        for orders in iter_customer_risk(path, FEATURE_SOURCE_COLUMNS, train_from, train_to):
+            orders = orders[orders[TARGET].notna()]
+            for start in range(0, len(orders), batch_size):
+                batch = orders.iloc[start:start + batch_size]
+                F = features.transform(batch[INPUT_FEATURES])[NUM_FEATURES + CAT_FEATURES]
+                for column in CAT_FEATURES:
+                    F[column] = F[column].astype(object).where(F[column].notna(), None)
+                    seen[column].update(F[column].dropna().unique().tolist())
+                F[TARGET] = batch[TARGET].to_numpy(dtype=np.int8)
+                F["is_test"] = np.random.default_rng([random_state, index]).random(len(batch)) < test_size
+                writer.write_table(pa.Table.from_pandas(F, schema=writer.schema, preserve_index=False))
+                rows += len(batch)
+                index += 1
+    return [sorted(seen[column], key=str) for column in CAT_FEATURES], rows
+
+
+def iter_batches(cache_path):
+    """(batch index, order features, target, is_test mask) from cache_batches(), one row group at a time."""
+    cache = _pyarrow().parquet.ParquetFile(cache_path)
+    for index in range(cache.num_row_groups):
+        batch = cache.read_row_group(index).to_pandas()
+        yield index, batch[NUM_FEATURES + CAT_FEATURES], batch[TARGET].to_numpy(dtype=np.int64), \
+            batch["is_test"].to_numpy()
+
+
+def train_out_of_core(data_path=PROCESSED_DATA_PATH, output_path="delivery_delay_model.pkl", metrics_path=None,
+                      train_from=None, train_to=None, test_size=0.2, epochs=3, batch_size=BATCH_SIZE,
+                      select_by="f1", random_state=RANDOM_STATE,
+                      tracking_dir=None, experiment=EXPERIMENT, register_as=None, stage=None):
+    started = time.perf_counter()
+    if list_periods(data_path) is None:
+        raise ValueError(
+            f"Out-of-core training reads the month-partitioned Parquet dataset from data_prep.py; "
+            f"{data_path} is a CSV or single file and would be read whole"
+        )
+
+    with tempfile.TemporaryDirectory(prefix="stream_train_") as cache_dir:
+        cache_path = os.path.join(cache_dir, "batches.parquet")
+
+        # Pass 1: risk, features and split, cached; the vocabulary, so every
+        # batch one-hot encodes into the same columns
+        categories, rows = cache_batches(
+            data_path, cache_path, train_from, train_to, batch_size, test_size, random_state
+        )
+        logger.info(f"Cached {rows:,} rows in {time.perf_counter() - started:.1f}s")
+        preprocessor = build_preprocessor(categories, sparse=True)
+
+        def batches():
+            return iter_batches(cache_path)
+
+        # Pass 2: scaling (fit on the first batch, partial_fit after)
+        class_counts = np.zeros(2, dtype=np.int64)
+        sample_fraction = min(1.0, DRIFT_SAMPLE_ROWS / max(rows, 1))
+        samples = []
+        for index, F, y, is_test in batches():
+            train = ~is_test
+            if not train.any():
+                continue
+            if not hasattr(preprocessor, "transformers_"):
+                preprocessor.fit(F[train])
+            else:
+                preprocessor.named_transformers_["num"].partial_fit(F.loc[train, NUM_FEATURES])
+            class_counts += np.bincount(y[train], minlength=2)
+            keep = np.random.default_rng([random_state, index, 0]).random(int(train.sum())) < sample_fraction
+            samples.append(F[train][keep])
+        if not class_counts.all():
+            raise ValueError("Training rows must include both on-time and delayed orders")
+
+        # partial_fit cannot derive class_weight="balanced" itself
+        train_rows = int(class_counts.sum())
+        class_weight = {label: train_rows / (2 * count) for label, count in enumerate(class_counts)}
+        models = {
+            name: model.set_params(class_weight=class_weight)
+            for name, model in streaming_models(random_state).items()
+        }
+
+        # Pass 3: training epochs over sparse batches, shuffled within each batch
+        for epoch in range(epochs):
+            for index, F, y, is_test in batches():
+                train = ~is_test
+                if not train.any():
+                    continue
+                X, y_train = preprocessor.transform(F[train]), y[train]
+                order = np.random.default_rng([random_state, index, epoch + 1]).permutation(len(y_train))
+                X, y_train = X[order], y_train[order]
+                for model in models.values():
+                    model.partial_fit(X, y_train, classes=CLASSES)
+            logger.info(f"Epoch {epoch + 1}/{epochs} done in {time.perf_counter() - started:.1f}s")
+
+        # Pass 4: evaluation over the held-out rows
+        scores = {name: StreamingMetrics() for name in models}
+        test_rows = test_delayed = 0
+        for _, F, y, is_test in batches():
+            if not is_test.any():
+                continue
+            X = preprocessor.transform(F[is_test])
+            test_rows += int(is_test.sum())
+            test_delayed += int(y[is_test].sum())
+            for name, model in models.items():
+                scores[name].update(y[is_test], model.predict_proba(X)[:, 1])
+
+    candidates = {
+        name: (
+            Pipeline(steps=[("features", OrderFeatureBuilder()), ("preprocessor", preprocessor), ("model", model)]),
+            scores[name].result()
+        )
+        for name, model in models.items()
+    }
+    for name, (_, metrics) in candidates.items():
+        logger.info(f"{name}: {metrics}")
+
+    # Final Model Selection
+    winner = max(candidates, key=lambda name: candidates[name][1][select_by])
+    final_model = candidates[winner][0]
+    _save_atomic(lambda path: joblib.dump(final_model, path), output_path)
+
+    metrics = {
+        "winner": winner,
+        "selected_by": select_by,
+        "mode": "out_of_core",
+        "models": {name: metrics for name, (_, metrics) in candidates.items()},
+        "search": None,
+        "data": {
+            "path": str(data_path),
+            "train_from": train_from,
+            "train_to": train_to,
+            "train_rows": train_rows,
+            "test_rows": test_rows,
+            "delayed_rate": round((int(class_counts[1]) + test_delayed) / max(train_rows + test_rows, 1), 4),
+        },
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "cores": 1,
+        "random_state": random_state,
+        "versions": {"sklearn": sklearn.__version__, "numpy": np.__version__},
+        "model_path": str(output_path),
+        "drift_reference": f"{os.path.splitext(output_path)[0]}.drift.json",
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    metrics_path = metrics_path or f"{os.path.splitext(output_path)[0]}.metrics.json"
+    _save_atomic(lambda path: _write_json(metrics, path), metrics_path)
+
+    # Reference for drift checks on serving data, from a sample of training rows
+    DriftProfile.fit(pd.concat(samples, ignore_index=True)).save(metrics["drift_reference"])
+
+    if tracking_dir:
+        metrics["tracking"] = track_run(
+            Tracker(tracking_dir), metrics, metrics_path, experiment, register_as, stage
+        )
+    return metrics
@@ -0,0 +1,287 @@
+# Synthetic Orders
+# Goal: generate realistic orders with the schema of ecommerce_orders_clean.csv
+# at any volume, so every stage can be run and load-tested without the
+# private export.
+#
+# - Marginals (category, channel, device, quantity, ...) follow the sample in
+#   data/ecommerce_orders_processed.xlsx.
+# - Delay rates per category, customer segment and channel follow the
+#   data/eda_*_delay.csv tables. delivery_days is drawn so that
+#   delivery_days > SLA_DAYS happens with that probability.
+# - Customers keep a stable segment and delay propensity. Both are derived
+#   by hashing customer_id, so chunks are generated independently (and in
+#   constant memory) but agree on every customer.
+#
+# Usage:
+#   python -m pipelines.synthetic --rows 100000000 --output data/synthetic_orders.csv
+#   python -m pipelines.synthetic --rows 10000000 --output data/synthetic_orders.parquet
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from pipelines.data_prep import SLA_DAYS, peak_rss_mb
+from pipelines.storage import OrdersWriter, _pyarrow, is_csv
+
+DEFAULT_CHUNKSIZE = 1_000_000
+ORDERS_PER_CUSTOMER = 3.7  # 10,000 orders / 2,713 customers in the sample
+
+CATEGORIES = {"Home": 0.1713, "Electronics": 0.1694, "Beauty": 0.1682,
+              "Toys": 0.1666, "Books": 0.1625, "Clothing": 0.1620}
+SEGMENTS = {"VIP": 0.5149, "Returning": 0.4285, "New": 0.0566}
+CHANNELS = {"Social": 0.2566, "Paid Search": 0.2525, "Email": 0.2474, "Organic": 0.2435}
+DEVICES = {"Desktop": 0.3383, "Tablet": 0.3339, "Mobile": 0.3278}
+PAYMENT_METHODS = {"Apple Pay": 0.2068, "Debit Card": 0.2002, "Google Pay": 0.1986,
+                   "PayPal": 0.1977, "Credit Card": 0.1967}
+STATUSES = {"Delivered": 0.7047, "Shipped": 0.1938, "Pending": 0.0513, "Returned": 0.0502}
+QUANTITIES = {1: 0.4133, 2: 0.2664, 3: 0.1759, 4: 0.0926, 5: 0.0348,
+              6: 0.0138, 7: 0.0023, 8: 0.0005, 9: 0.0004}
+MAX_DELIVERY_DAYS = 7
+
+# Fallback when data/eda_*_delay.csv are not available
+DEFAULT_DELAY_RATES = {
+    "category": {"Beauty": 0.2913, "Clothing": 0.2907, "Books": 0.288, "Home": 0.286,
+                 "Toys": 0.2839, "Electronics": 0.2769},
+    "customer_segment": {"VIP": 0.2921, "Returning": 0.2803, "New": 0.2756},
+    "channel": {"Organic": 0.2895, "Paid Search": 0.2871, "Email": 0.2842, "Social": 0.2837},
+}
+EDA_FILES = {
+    "category": "eda_category_delay.csv",
+    "customer_segment": "eda_segment_delay.csv",
+    "channel": "eda_channel_delay.csv",
+}
+
+# Spread of the per-customer delay propensity (multiplier with mean 1)
+CUSTOMER_EFFECT_SHAPE = 4.0
+
+ADDRESS_POOL = np.array([f"{n} {street} St" for n in (12, 221, 1600, 742, 31) for street in
+                         ("Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Lake", "Hill")], dtype=object)
+
+
+def load_delay_rates(data_dir="data"):
+    """Delay rate per value for each EDA dimension, read from the eda_*_delay.csv tables."""
+    rates = {}
+    for column, filename in EDA_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            table = pd.read_csv(path)
+            rates[column] = dict(zip(table.iloc[:, 0], table.iloc[:, 1].astype(float)))
+        else:
+            rates[column] = DEFAULT_DELAY_RATES[column]
+    return rates
+
+
+def _lookup(weights):
+    keys = list(weights)
+    p = np.asarray([weights[key] for key in keys], dtype=float)
+    return np.asarray(keys, dtype=object), p / p.sum()
+
+
+def _hash_uniform(ids, salt):
+    """Deterministic uniform [0, 1) per id (splitmix64), identical in every chunk."""
+    with np.errstate(over="ignore"):
+        z = ids.astype(np.uint64) + np.uint64(salt) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class OrderGenerator:
+    """
+    Vectorized, chunked order generator.
+
+    The delay probability of an order is
+        base * f(category) * f(segment) * f(channel) * customer_effect
+    where each f is the EDA delay rate over the overall rate (mean 1 under
+    the sampling weights) and customer_effect is a mean-1 gamma draw per
+    customer. Marginal delay rates per category, segment and channel then
+    match the EDA tables.
+    """
+
+    def __init__(self, rows, seed=0, delay_rates=None, start="2024-04-20", days=365,
+                 customers=None, missing_rate=0.0, sla_days=SLA_DAYS):
+        self.rows = rows
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.days = days
+        self.customers = customers or max(1, int(rows / ORDERS_PER_CUSTOMER))
+        self.missing_rate = missing_rate
+        self.sla_days = sla_days
+
+        rates = delay_rates or load_delay_rates()
+        self.base_rate = float(np.dot(
+            [rates["category"].get(key, 0.0) for key in CATEGORIES], _lookup(CATEGORIES)[1]
+        ))
+        self.factors = {
+            column: {key: rates[column].get(key, self.base_rate) / self.base_rate for key in weights}
+            for column, weights in (("category", CATEGORIES), ("customer_segment", SEGMENTS), ("channel", CHANNELS))
+        }
+        # Renormalise segment/channel factors to mean 1 under their weights
+        for column, weights in (("customer_segment", SEGMENTS), ("channel", CHANNELS)):
+            keys, p = _lookup(weights)
+            mean = float(np.dot([self.factors[column][key] for key in keys], p))
+            self.factors[column] = {key: value / mean for key, value in self.factors[column].items()}
+
+    def _choice(self, rng, weights, size):
+        keys, p = _lookup(weights)
+        index = rng.choice(len(keys), size=size, p=p)
+        return keys, index
+
+    def generate_chunk(self, chunk_index, size, first_order_id):
+        rng = np.random.default_rng([self.seed, chunk_index])
+
+        customer_id = rng.integers(1, self.customers + 1, size)
+
+        # Customer-level attributes from a hash of the id
+        segment_keys, segment_p = _lookup(SEGMENTS)
+        segment_index = np.searchsorted(np.cumsum(segment_p), _hash_uniform(customer_id, 1), side="right")
+        segment_index = np.minimum(segment_index, len(segment_keys) - 1)
+        customer_effect = _gamma_from_uniform(_hash_uniform(customer_id, 2), CUSTOMER_EFFECT_SHAPE)
+
+        category_keys, category_index = self._choice(rng, CATEGORIES, size)
+        channel_keys, channel_index = self._choice(rng, CHANNELS, size)
+        device_keys, device_index = self._choice(rng, DEVICES, size)
+        payment_keys, payment_index = self._choice(rng, PAYMENT_METHODS, size)
+        status_keys, status_index = self._choice(rng, STATUSES, size)
+        quantity_keys, quantity_index = self._choice(rng, QUANTITIES, size)
+
+        factor = (
+            np.asarray([self.factors["category"][key] for key in category_keys])[category_index]
+            * np.asarray([self.factors["customer_segment"][key] for key in segment_keys])[segment_index]
+            * np.asarray([self.factors["channel"][key] for key in channel_keys])[channel_index]
+        )
+        delay_probability = np.clip(self.base_rate * factor * customer_effect, 0.0, 1.0)
+        delayed = rng.random(size) < delay_probability
+
+        # Delayed orders take SLA+1..MAX days, on-time orders 1..SLA days
+        delivery_days = np.where(
+            delayed,
+            rng.integers(self.sla_days + 1, MAX_DELIVERY_DAYS + 1, size),
+            rng.integers(1, self.sla_days + 1, size)
+        )
+
+        order_seconds = rng.integers(0, self.days * 86400, size)
+        order_date = self.start + pd.to_timedelta(order_seconds, unit="s")
+        shipping_date = order_date + pd.to_timedelta(delivery_days, unit="D")
+
+        df = pd.DataFrame({
+            "order_id": np.arange(first_order_id, first_order_id + size, dtype=np.int64),
+            "customer_id": customer_id,
+            "product_id": rng.integers(1, 1001, size),
+            "category": pd.Categorical.from_codes(category_index, category_keys),
+            "price": np.round(rng.uniform(5, 500, size), 2),
+            "quantity": np.asarray(quantity_keys, dtype=np.int64)[quantity_index],
+            "order_date": order_date,
+            "shipping_date": shipping_date,
+            "delivery_status": pd.Categorical.from_codes(status_index, status_keys),
+            "payment_method": pd.Categorical.from_codes(payment_index, payment_keys),
+            "device_type": pd.Categorical.from_codes(device_index, device_keys),
+            "channel": pd.Categorical.from_codes(channel_index, channel_keys),
+            "shipping_address": ADDRESS_POOL[rng.integers(0, len(ADDRESS_POOL), size)],
+            "billing_address": ADDRESS_POOL[rng.integers(0, len(ADDRESS_POOL), size)],
+            "customer_segment": pd.Categorical.from_codes(segment_index, segment_keys),
+        })
+
+        if self.missing_rate > 0:
+            # Blank a few cells the way the raw export does; data_prep imputes them
+            df["quantity"] = df["quantity"].astype("float64")
+            for column in ("price", "quantity", "category", "channel"):
+                df.loc[rng.random(size) < self.missing_rate, column] = np.nan
+        return df
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNKSIZE):
+        for chunk_index, first in enumerate(range(0, self.rows, chunksize)):
+            yield self.generate_chunk(chunk_index, min(chunksize, self.rows - first), first + 1)
+
+
+def _gamma_from_uniform(u, shape):
+    """Mean-1 gamma(shape, 1/shape) quantiles via the Wilson–Hilferty approximation."""
+    z = ndtri(np.clip(u, 1e-12, 1 - 1e-12))
+    c = 1.0 / (9.0 * shape)
+    return np.maximum(1.0 - c + z * np.sqrt(c), 0.0) ** 3
+
+
+def _with_second_timestamps(pa, table):
+    """Write dates as `YYYY-MM-DD HH:MM:SS` like the source export."""
+    for column in ("order_date", "shipping_date"):
+        index = table.schema.get_field_index(column)
+        table = table.set_column(index, column, table.column(column).cast(pa.timestamp("s")))
+    return table
+
+
+def generate_orders(rows, seed=0, **kwargs):
+    """All `rows` orders as one DataFrame; use OrderGenerator.iter_chunks for large volumes."""
+    generator = OrderGenerator(rows, seed=seed, **kwargs)
+    return pd.concat(list(generator.iter_chunks()), ignore_index=True)
+
+
+def write_orders(path, rows, chunksize=DEFAULT_CHUNKSIZE, seed=0, **kwargs):
+    """Stream `rows` orders to CSV or a month-partitioned Parquet dataset."""
+    started = time.perf_counter()
+    generator = OrderGenerator(rows, seed=seed, **kwargs)
+    chunks = generator.iter_chunks(chunksize)
+
+    if is_csv(path):
+        # pyarrow's CSV writer is ~10x faster than DataFrame.to_csv
+        pa = _pyarrow()
+        import pyarrow.csv
+
+        tmp_path = f"{path}.tmp"
+        writer = None
+        try:
+            for chunk in chunks:
+                table = _with_second_timestamps(pa, pa.Table.from_pandas(chunk, preserve_index=False))
+                if writer is None:
+                    writer = pyarrow.csv.CSVWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp_path, path)
+    else:
+        with OrdersWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_sec": round(rows / seconds) if seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic e-commerce orders")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--output", default="data/synthetic_orders.csv",
+                        help="CSV file, or a Parquet dataset for any other path")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2024-04-20", help="First order date")
+    parser.add_argument("--days", type=int, default=365, help="Days of orders")
+    parser.add_argument("--customers", type=int, default=None,
+                        help=f"Distinct customers (default: rows / {ORDERS_PER_CUSTOMER})")
+    parser.add_argument("--missing-rate", type=float, default=0.0,
+                        help="Share of price/quantity/category/channel cells left blank")
+    parser.add_argument("--data-dir", default="data", help="Where the eda_*_delay.csv tables live")
+    args = parser.parse_args(argv)
+
+    stats = write_orders(
+        args.output, args.rows, args.chunksize, seed=args.seed,
+        delay_rates=load_delay_rates(args.data_dir), start=args.start, days=args.days,
+        customers=args.customers, missing_rate=args.missing_rate
+    )
+    print(f"✅ Wrote {stats['rows']:,} orders to {args.output}")
+    print(f"   {stats['rows_per_sec']:,} rows/sec in {stats['seconds']}s, peak RSS {stats['peak_rss_mb']} MB")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
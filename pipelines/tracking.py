@@ -0,0 +1,371 @@
+# Experiment Tracking & Model Registry
+# Goal: track runs and promote models locally, without an MLflow server.
+#
+# Everything lives under one directory (TRACKING_DIR, default "tracking"):
+#   tracking.db            sqlite: runs, params, metrics, registered versions
+#   artifacts/<run_id>/    files logged by a run (model .pkl, metrics, drift reference)
+#
+# The directory is self-contained: it can be copied to the API host or
+# mounted next to it, and serving needs no network. The mount must be
+# writable: sqlite's WAL mode keeps -wal / -shm files beside tracking.db, and
+# the API's pin / rollback actions change registry stages.
+#
+# Registered versions point at a run's model artifact and carry a stage
+# (None, "staging", "production", "archived"). Promoting a version to
+# production archives the previous one. The API serves the production version
+# of MODEL_NAME straight from the registry (MODEL_REGISTRY_DIR).
+#
+# Usage:
+#   python -m pipelines.tracking runs --experiment delivery_delay --order-by f1
+#   python -m pipelines.tracking versions DeliveryDelayModel
+#   python -m pipelines.tracking promote DeliveryDelayModel 3 --stage production
+#   python -m pipelines.tracking promote-best DeliveryDelayModel --metric f1
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+TRACKING_DIR = os.getenv("TRACKING_DIR", "tracking")
+STAGES = ("staging", "production", "archived")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    experiment TEXT NOT NULL,
+    name TEXT,
+    status TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    tags TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment, started);
+CREATE TABLE IF NOT EXISTS params (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (run_id, key)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value REAL,
+    step INTEGER NOT NULL DEFAULT 0,
+    logged REAL NOT NULL,
+    PRIMARY KEY (run_id, key, step)
+);
+CREATE INDEX IF NOT EXISTS metrics_key ON metrics (key, value);
+CREATE TABLE IF NOT EXISTS model_versions (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    stage TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    description TEXT,
+    PRIMARY KEY (name, version)
+);
+"""
+
+
+class RegistryError(LookupError):
+    """Raised when a run, model or version does not exist."""
+
+
+@dataclass(frozen=True)
+class RegisteredModel:
+    name: str
+    version: int
+    run_id: str
+    path: str
+    stage: str
+    created: float
+    updated: float
+    description: str = None
+
+
+class Run:
+    """An active run; use as a context manager to end it with the right status."""
+
+    def __init__(self, tracker, run_id):
+        self.tracker = tracker
+        self.run_id = run_id
+        self.artifact_dir = os.path.join(tracker.root, "artifacts", run_id)
+
+    def log_params(self, params):
+        self.tracker._execute_many(
+            "INSERT OR REPLACE INTO params (run_id, key, value) VALUES (?, ?, ?)",
+            [(self.run_id, key, json.dumps(value, default=str)) for key, value in params.items()]
+        )
+
+    def log_metrics(self, metrics, step=0):
+        now = time.time()
+        self.tracker._execute_many(
+            "INSERT OR REPLACE INTO metrics (run_id, key, value, step, logged) VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.run_id, key, float(value), step, now)
+                for key, value in metrics.items() if value is not None
+            ]
+        )
+
+    def log_metric(self, key, value, step=0):
+        self.log_metrics({key: value}, step)
+
+    def set_tags(self, tags):
+        current = self.tracker.get_run(self.run_id)["tags"]
+        current.update(tags)
+        self.tracker._execute("UPDATE runs SET tags = ? WHERE run_id = ?", (json.dumps(current), self.run_id))
+
+    def log_artifact(self, path, name=None):
+        """Copy a file into the run's artifact directory; returns the stored path."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        target = os.path.join(self.artifact_dir, name or os.path.basename(path))
+        tmp_path = f"{target}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+        return target
+
+    def end(self, status="finished"):
+        self.tracker._execute(
+            "UPDATE runs SET status = ?, ended = ? WHERE run_id = ?", (status, time.time(), self.run_id)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end("finished" if exc_type is None else "failed")
+
+
+class Tracker:
+    """
+    Local, file-backed run tracking and model registry.
+
+    One sqlite database in WAL mode, so the training job can write while API
+    workers read the production version. All queries are local. Connections
+    are per thread and per process, so a tracker created before a fork keeps
+    working in the children.
+    """
+
+    def __init__(self, root=TRACKING_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(root, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.root, "tracking.db"), timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, sql, args=()):
+        conn = self._conn()
+        with conn:
+            return conn.execute(sql, args)
+
+    def _execute_many(self, sql, rows):
+        conn = self._conn()
+        with conn:
+            conn.executemany(sql, rows)
+
+    def _query(self, sql, args=()):
+        return self._conn().execute(sql, args).fetchall()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------------------------------------------------
+    # Runs
+    # ---------------------------------------------------
+    def start_run(self, experiment, name=None, tags=None):
+        run_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO runs (run_id, experiment, name, status, started, tags) VALUES (?, ?, ?, 'running', ?, ?)",
+            (run_id, experiment, name, time.time(), json.dumps(tags or {}))
+        )
+        return Run(self, run_id)
+
+    def get_run(self, run_id):
+        rows = self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            raise RegistryError(f"Run '{run_id}' not found")
+        run = dict(rows[0])
+        run["tags"] = json.loads(run["tags"])
+        run["params"] = {
+            row["key"]: json.loads(row["value"])
+            for row in self._query("SELECT key, value FROM params WHERE run_id = ?", (run_id,))
+        }
+        run["metrics"] = {
+            row["key"]: row["value"]
+            for row in self._query(
+                "SELECT key, value FROM metrics WHERE run_id = ? ORDER BY step", (run_id,)
+            )
+        }
+        run["artifact_dir"] = os.path.join(self.root, "artifacts", run_id)
+        return run
+
+    def search_runs(self, experiment=None, order_by=None, descending=True, limit=20, status="finished"):
+        """Runs, newest first or ranked by the latest value of metric `order_by`."""
+        where, args = ["r.status = ?"], [status]
+        if experiment is not None:
+            where.append("r.experiment = ?")
+            args.append(experiment)
+
+        if order_by:
+            sql = (
+                "SELECT r.run_id, m.value AS score FROM runs r "
+                "JOIN metrics m ON m.run_id = r.run_id AND m.key = ? "
+                "AND m.step = (SELECT MAX(step) FROM metrics WHERE run_id = r.run_id AND key = ?) "
+                f"WHERE {' AND '.join(where)} ORDER BY m.value {'DESC' if descending else 'ASC'} LIMIT ?"
+            )
+            args = [order_by, order_by, *args]
+        else:
+            sql = f"SELECT r.run_id FROM runs r WHERE {' AND '.join(where)} ORDER BY r.started DESC LIMIT ?"
+        return [self.get_run(row["run_id"]) for row in self._query(sql, (*args, limit))]
+
+    # ---------------------------------------------------
+    # Model Registry
+    # ---------------------------------------------------
+    def register_model(self, name, run_id, artifact="model.pkl", description=None):
+        """Register a run's model artifact as the next version of `name`."""
+        path = os.path.join(self.get_run(run_id)["artifact_dir"], artifact)
+        if not os.path.exists(path):
+            raise RegistryError(f"Run '{run_id}' has no artifact '{artifact}'")
+
+        conn = self._conn()
+        with conn:
+            version = conn.execute(
+                "SELECT COALESCE(MAX(version), 0) + 1 FROM model_versions WHERE name = ?", (name,)
+            ).fetchone()[0]
+            now = time.time()
+            conn.execute(
+                "INSERT INTO model_versions (name, version, run_id, path, stage, created, updated, description) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                (name, version, run_id, os.path.relpath(path, self.root), now, now, description)
+            )
+        return self.get_version(name, version)
+
+    def get_version(self, name, version=None, stage=None):
+        """A version by number, or the version currently in `stage`."""
+        if version is not None:
+            rows = self._query("SELECT * FROM model_versions WHERE name = ? AND version = ?", (name, int(version)))
+        else:
+            rows = self._query(
+                "SELECT * FROM model_versions WHERE name = ? AND stage = ? ORDER BY updated DESC LIMIT 1",
+                (name, stage)
+            )
+        if not rows:
+            raise RegistryError(f"Model '{name}' has no version {version if version is not None else stage!r}")
+        return self._model(rows[0])
+
+    def list_versions(self, name):
+        rows = self._query("SELECT * FROM model_versions WHERE name = ? ORDER BY version", (name,))
+        return [self._model(row) for row in rows]
+
+    def _model(self, row):
+        # Artifact paths are stored relative to the root so the directory can move
+        return RegisteredModel(**{**dict(row), "path": os.path.join(self.root, row["path"])})
+
+    def transition(self, name, version, stage):
+        """Move a version to `stage`; promoting to production archives the previous one."""
+        if stage is not None and stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {STAGES}")
+        self.get_version(name, version)
+
+        conn = self._conn()
+        with conn:
+            now = time.time()
+            if stage == "production":
+                conn.execute(
+                    "UPDATE model_versions SET stage = 'archived', updated = ? "
+                    "WHERE name = ? AND stage = 'production' AND version != ?",
+                    (now, name, int(version))
+                )
+            conn.execute(
+                "UPDATE model_versions SET stage = ?, updated = ? WHERE name = ? AND version = ?",
+                (stage, now, name, int(version))
+            )
+        return self.get_version(name, version)
+
+    def compare_versions(self, name, metric):
+        """(version, stage, metric value) for every version of `name`, best first."""
+        rows = self._query(
+            "SELECT v.version, v.stage, m.value FROM model_versions v "
+            "LEFT JOIN metrics m ON m.run_id = v.run_id AND m.key = ? "
+            "WHERE v.name = ? ORDER BY m.value IS NULL, m.value DESC, v.version DESC",
+            (metric, name)
+        )
+        return [(row["version"], row["stage"], row["value"]) for row in rows]
+
+    def promote_best(self, name, metric="f1"):
+        """Promote the best version by `metric` to production unless it already is."""
+        ranked = self.compare_versions(name, metric)
+        if not ranked or ranked[0][2] is None:
+            raise RegistryError(f"No version of '{name}' has metric '{metric}'")
+        version, stage, _ = ranked[0]
+        if stage == "production":
+            return self.get_version(name, version)
+        return self.transition(name, version, "production")
+
+
+# ---------------------------------------------------
+# CLI
+# ---------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local experiment tracking and model registry")
+    parser.add_argument("--root", default=TRACKING_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs = commands.add_parser("runs", help="List finished runs")
+    runs.add_argument("--experiment")
+    runs.add_argument("--order-by", help="Metric to rank by")
+    runs.add_argument("--limit", type=int, default=20)
+
+    versions = commands.add_parser("versions", help="List registered versions of a model")
+    versions.add_argument("name")
+    versions.add_argument("--metric", default="f1")
+
+    promote = commands.add_parser("promote", help="Move a version to a stage")
+    promote.add_argument("name")
+    promote.add_argument("version", type=int)
+    promote.add_argument("--stage", default="production", choices=STAGES)
+
+    best = commands.add_parser("promote-best", help="Promote the best version by a metric")
+    best.add_argument("name")
+    best.add_argument("--metric", default="f1")
+    args = parser.parse_args(argv)
+
+    tracker = Tracker(args.root)
+    if args.command == "runs":
+        for run in tracker.search_runs(args.experiment, args.order_by, limit=args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started"]))
+            score = run["metrics"].get(args.order_by) if args.order_by else None
+            print(f"{run['run_id']}  {started}  {run['experiment']}  {run['name'] or ''}"
+                  + (f"  {args.order_by}={score:.4f}" if score is not None else ""))
+    elif args.command == "versions":
+        for version, stage, value in tracker.compare_versions(args.name, args.metric):
+            print(f"v{version:<4} {stage or '-':<11} {args.metric}={value if value is not None else '-'}")
+    elif args.command == "promote":
+        model = tracker.transition(args.name, args.version, args.stage)
+        print(f"✅ {model.name} v{model.version} -> {model.stage}")
+    else:
+        model = tracker.promote_best(args.name, args.metric)
+        print(f"✅ {model.name} v{model.version} is in production")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+_model_dir = None
+
+
+def _train_tiny_model(path):
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from pipelines.feature_eng import build_model_pipeline
+
+    rng = np.random.default_rng(0)
+    rows = 300
+    X = pd.DataFrame({
+        "price": rng.uniform(5, 500, rows),
+        "quantity": rng.integers(1, 5, rows),
+        "category": rng.choice(["Electronics", "Books", "Home"], rows),
+        "customer_segment": rng.choice(["Regular", "VIP", "New"], rows),
+        "channel": rng.choice(["Direct", "Email", "Social"], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+        "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 366, rows), unit="D"),
+        "customer_risk_score": rng.uniform(0, 1, rows),
+    })
+    y = (X["customer_risk_score"] > 0.6).astype(int)
+
+    pipeline = build_model_pipeline(RandomForestClassifier(n_estimators=10, random_state=0))
+    joblib.dump(pipeline.fit(X, y), path)
+
+
+def pytest_configure(config):
+    # The API and model tests need an artifact; train a tiny one unless
+    # MODEL_PATH already points at a real model
+    global _model_dir
+    if os.getenv("MODEL_PATH") and os.path.exists(os.getenv("MODEL_PATH")):
+        return
+
+    _model_dir = tempfile.mkdtemp(prefix="test_model_")
+    path = os.path.join(_model_dir, "delivery_delay_model.pkl")
+    _train_tiny_model(path)
+    os.environ["MODEL_PATH"] = path
+    os.environ.setdefault("MODEL_POLL_INTERVAL", "0")
+
+
+def pytest_unconfigure(config):
+    if _model_dir is not None:
+        shutil.rmtree(_model_dir, ignore_errors=True)
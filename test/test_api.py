@@ -1,14 +1,27 @@
+import os
+import subprocess
+import sys
+
+import pytest
 from fastapi.testclient import TestClient
 from api.main import app
 
-client = TestClient(app)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Entering the client runs the startup event, which loads the model
+    with TestClient(app) as client:
+        yield client
 
-def test_health_endpoint():
+
+def test_health_endpoint(client):
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json()["status"] == "ok"
+    assert response.json()["status"] == "healthy"
 
-def test_prediction_endpoint():
+def test_prediction_endpoint(client):
     payload = {
         "price": 29.99,
         "quantity": 2,
@@ -23,6 +36,51 @@ def test_prediction_endpoint():
 
     response = client.post("/predict", json=payload)
     assert response.status_code == 200
-    assert "prediction" in response.json()
-    assert "delay_probability" in response.json()
+    assert response.json()["delivery_delayed"] in [0, 1]
+    assert 0 <= response.json()["delay_probability"] <= 1
+
+
+def test_prediction_from_order_date(client):
+    payload = {
+        "price": 29.99,
+        "quantity": 2,
+        "category": "Electronics",
+        "customer_segment": "Regular",
+        "channel": "Direct",
+        "device_type": "Mobile",
+        "customer_risk_score": 0.3
+    }
+
+    by_date = client.post("/predict", json={**payload, "order_date": "2024-11-05T09:30:00"})
+    by_parts = client.post("/predict", json={**payload, "order_dayofweek": 1, "order_month": 11})
+    assert by_date.status_code == 200
+    assert by_date.json()["delay_probability"] == by_parts.json()["delay_probability"]
+    assert client.post("/predict", json=payload).status_code == 422
+
+
+def test_metrics_endpoint(client):
+    client.get("/health")
+    client.post("/predict", json={"price": -1})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in text
+    assert 'http_requests_total{method="POST",route="/predict",status="422"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in text
+    assert "http_requests_in_flight 1" in text  # the /metrics call itself
+    assert "model_info{version=" in text
+
 
+def test_api_import_skips_training_dependencies():
+    # A fresh interpreter: this one has imported the pipelines already
+    probe = (
+        "import sys; import api.main; "
+        "print(','.join(m for m in ('pandas', 'sklearn', 'pyarrow', 'joblib', 'scipy') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == ""
@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+
+from api.audit import AuditLog, list_segments, read_audit
+
+FEATURES = {
+    "price": 29.99, "quantity": 2, "order_value": 59.98, "order_dayofweek": 1,
+    "order_month": 11, "customer_risk_score": 0.3, "category": "Electronics",
+    "customer_segment": "VIP", "channel": "Email", "device_type": "Mobile",
+}
+
+
+def result(probability):
+    return {"delivery_delayed": int(probability > 0.5), "delay_probability": probability, "model_version": "v1"}
+
+
+def test_audit_log_rotates_segments_and_reads_them_back(tmp_path):
+    audit = AuditLog(str(tmp_path), segment_rows=3)
+
+    for i in range(5):
+        audit.record(dict(FEATURES, price=float(i)), result(i / 10))
+    assert list_segments(str(tmp_path)) == []  # nothing written on the request path
+
+    audit.flush()  # 5 rows >= segment_rows: closed and visible
+    audit.record(FEATURES, result(0.9))
+    audit.flush()  # open segment, not readable yet
+    assert len(list_segments(str(tmp_path))) == 1
+    assert len(read_audit(str(tmp_path))) == 5
+
+    audit.close()
+    df = read_audit(str(tmp_path), columns=["price", "delay_probability", "model_version"])
+    assert len(list_segments(str(tmp_path))) == 2
+    assert df["price"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 29.99]
+    assert (df["model_version"] == "v1").all()
+
+    future = pd.Timestamp.now(tz="UTC") + pd.Timedelta(days=1)
+    assert len(read_audit(str(tmp_path), start=future)) == 0
+    assert len(read_audit(str(tmp_path), end=future)) == 6
+
+
+def test_audit_log_drops_rows_beyond_max_pending_and_discards_open_segments(tmp_path):
+    audit = AuditLog(str(tmp_path), max_pending=2)
+    for _ in range(5):
+        audit.record(FEATURES, result(0.2))
+    assert audit.stats()["dropped"] == 3
+
+    audit.flush()
+    open_segments = [name for name in os.listdir(tmp_path) if name.endswith(".open")]
+    assert len(open_segments) == 1
+
+    # A restart after a crash removes the footer-less segment
+    AuditLog(str(tmp_path))
+    assert not any(name.endswith(".open") for name in os.listdir(tmp_path))
@@ -0,0 +1,36 @@
+import json
+
+from api.batch import parse_batch_body, validate_batch
+
+ORDER = {
+    "price": 29.99,
+    "quantity": 2,
+    "category": "Electronics",
+    "customer_segment": "Regular",
+    "channel": "Direct",
+    "device_type": "Mobile",
+    "order_dayofweek": 1,
+    "order_month": 11,
+    "customer_risk_score": 0.3
+}
+
+
+def test_parse_json_array():
+    body = b'[{"price": 1}, {"price": 2}]'
+    items = parse_batch_body(body, "application/json")
+    assert [item["price"] for item in items] == [1, 2]
+
+
+def test_parse_csv_blank_cells_are_missing():
+    body = b"price,quantity,order_value\n10.5,2,\n"
+    items = parse_batch_body(body, "text/csv")
+    assert items == [{"price": "10.5", "quantity": "2"}]
+
+
+def test_invalid_items_keep_their_position():
+    body = b'{"price": "oops"}\nnot json\n' + json.dumps(ORDER).encode()
+    items = parse_batch_body(body, "application/x-ndjson")
+    valid, errors = validate_batch(items)
+
+    assert [index for index, _ in valid] == [2]
+    assert [error["index"] for error in errors] == [0, 1]
@@ -0,0 +1,42 @@
+import asyncio
+
+from api.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    async def score(records):
+        calls.append(len(records))
+        return [record * 10 for record in records]
+
+    async def run():
+        batcher = MicroBatcher(score, window_ms=20, max_batch_size=8)
+        await batcher.start()
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(10)])
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+
+    assert results == [i * 10 for i in range(10)]
+    assert calls == [8, 2]
+    assert stats["batch_size"]["count"] == 2
+    assert stats["wait_ms"]["count"] == 10
+
+
+def test_scoring_errors_reach_every_caller():
+    async def score(records):
+        raise RuntimeError("model exploded")
+
+    async def run():
+        batcher = MicroBatcher(score, window_ms=5)
+        await batcher.start()
+        results = await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
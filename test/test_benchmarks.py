@@ -0,0 +1,66 @@
+import pandas as pd
+
+from benchmarks.compare import compare
+from pipelines.data_prep import CATEGORICAL_COLUMNS, DATE_COLUMNS, NUMERIC_COLUMNS, SLA_DAYS
+from pipelines.synthetic import OrderGenerator, generate_orders, load_delay_rates
+
+
+def test_synthetic_orders_match_clean_csv_schema():
+    df = generate_orders(1000, seed=1, missing_rate=0.01)
+
+    assert len(df) == 1000
+    assert set(NUMERIC_COLUMNS + CATEGORICAL_COLUMNS + DATE_COLUMNS) <= set(df.columns)
+    assert ((df["shipping_date"] - df["order_date"]).dt.days.between(1, 7)).all()
+    assert df["price"].isna().any()
+
+
+def test_synthetic_delay_rates_follow_eda_tables():
+    df = pd.concat(OrderGenerator(400_000, seed=0).iter_chunks(100_000), ignore_index=True)
+    df["delayed"] = (df["shipping_date"] - df["order_date"]).dt.days > SLA_DAYS
+
+    assert df["order_id"].is_unique
+    # A customer's segment is the same in every chunk
+    assert (df.groupby("customer_id")["customer_segment"].nunique() == 1).all()
+
+    rates = load_delay_rates()
+    for column in ("category", "customer_segment", "channel"):
+        observed = df.groupby(column, observed=True)["delayed"].mean()
+        for value, rate in observed.items():
+            assert abs(rate - rates[column][value]) < 0.01, (column, value)
+
+
+def test_compare_flags_regressions_by_metric_direction():
+    baseline = {"results": {
+        "predict_latency": {"p99_ms": 10.0, "requests": 500},
+        "data_prep": {"rows_per_sec": 1000},
+    }}
+    current = {"results": {
+        "predict_latency": {"p99_ms": 15.0, "requests": 500},
+        "data_prep": {"rows_per_sec": 1500},
+    }}
+
+    verdicts = {row[0]: row[4] for row in compare(baseline, current, threshold=0.1)}
+
+    assert verdicts == {
+        "predict_latency.p99_ms": "REGRESSION",
+        "data_prep.rows_per_sec": "improved",
+    }
+
+
+def test_serving_benchmark_posts_load_features_records(tmp_path, monkeypatch):
+    from benchmarks.run import (
+        SERVING_ENV, _records, bench_data_prep, bench_feature_eng, bench_serving, build_serving_model
+    )
+
+    for name, value in SERVING_ENV.items():
+        monkeypatch.setenv(name, value)  # restored after bench_serving overwrites them
+    processed_path, _ = bench_data_prep(str(tmp_path), 2000)
+    features, _ = bench_feature_eng(processed_path)
+    model_path = build_serving_model(str(tmp_path), features, max_rows=500)
+    monkeypatch.setenv("MODEL_PATH", model_path)
+
+    records = _records(features[0], 100)
+    assert isinstance(records[0]["order_date"], str)
+    results = bench_serving(model_path, records, requests=5, batch_sizes=[100])
+    assert results["predict_latency"]["requests"] == 5
+    assert set(results["batch_throughput"]) == {"100"}
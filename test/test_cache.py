@@ -0,0 +1,49 @@
+from api.cache import LocalCache, PredictionCache, SqliteCache, canonical_key
+
+RESULT = {"delivery_delayed": 1, "delay_probability": 0.71}
+
+
+def test_key_ignores_field_order_but_not_model():
+    a = {"price": 10.0, "category": "Books"}
+    b = {"category": "Books", "price": 10.0}
+
+    assert canonical_key(a, "v1") == canonical_key(b, "v1")
+    assert canonical_key(a, "v1") != canonical_key(a, "v2")
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_model_change_invalidates_entries():
+    cache = PredictionCache(maxsize=10)
+    cache.bind_model("v1")
+    key = cache.key({"price": 10.0})
+    cache.set(key, RESULT)
+    assert cache.get(key) == RESULT
+
+    cache.bind_model("v2")
+    assert cache.get(key) is None
+    assert cache.key({"price": 10.0}) != key
+
+
+def test_sqlite_backend_shares_hits(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = PredictionCache(shared=SqliteCache(path))
+    reader = PredictionCache(shared=SqliteCache(path))
+    writer.bind_model("v1")
+    reader.bind_model("v1")
+
+    key = writer.key({"price": 10.0})
+    writer.set(key, RESULT)
+
+    assert reader.get(key) == RESULT
+    assert reader.stats()["shared_hits"] == 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main
+from pipelines.cube import CubeReader, DelayCube
+
+
+def make_orders(rows=1500, seed=0, start="2024-01-01", first_id=0):
+    rng = np.random.default_rng(seed)
+    orders = pd.DataFrame({
+        "order_id": np.arange(first_id, first_id + rows),
+        "category": rng.choice(["Books", "Home", "Toys"], rows),
+        "customer_segment": rng.choice(["New", "VIP"], rows),
+        "channel": rng.choice(["Email", "Social"], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+        "delivery_delayed": rng.integers(0, 2, rows),
+        "order_date": pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 90, rows), unit="D"),
+    })
+    orders["shipping_date"] = orders["order_date"] + pd.to_timedelta(rng.integers(1, 10, rows), unit="D")
+    return orders
+
+
+def test_incremental_cube_matches_groupby():
+    first, second = make_orders(seed=0), make_orders(seed=1, start="2024-04-01", first_id=1500)
+    second.loc[second.index[:10], "category"] = "Garden"  # new label grows the axis
+    cube = DelayCube()
+
+    assert cube.update(first) == len(first)
+    assert cube.update(second) == len(second)
+    assert cube.update(first) == 0  # already applied
+
+    orders = pd.concat([first, second])
+    orders["order_month"] = orders["order_date"].dt.strftime("%Y-%m")
+    email = orders[(orders["channel"] == "Email") & (orders["order_month"] >= "2024-02")]
+    expected = email.groupby(["order_month", "category"])["delivery_delayed"].agg(["count", "mean"])
+
+    rows = cube.query(["order_month", "category"], {"channel": ["Email"]}, month_from="2024-02")
+    got = pd.DataFrame(rows).set_index(["order_month", "category"])
+    assert got["orders"].to_dict() == expected["count"].to_dict()
+    np.testing.assert_allclose(got["delay_rate"], expected["mean"].loc[got.index], atol=1e-6)
+    assert cube.levels["category"] == ["Books", "Garden", "Home", "Toys"]
+    assert cube.query([])[0]["orders"] == len(orders)
+
+
+def test_overlapping_export_applies_rest_of_watermark_day(tmp_path):
+    orders = make_orders(rows=6).assign(order_date=pd.Timestamp("2024-03-31"))
+    orders.loc[0, "order_date"] = pd.Timestamp("2024-03-01")
+    orders.loc[0, "shipping_date"] = pd.NaT  # not shipped at the first export
+    path = str(tmp_path / "cube.npz")
+
+    cube = DelayCube()
+    assert cube.update(orders.iloc[:3]) == 2
+    cube.save(path)
+
+    # The next export repeats the watermark day, with the rest of its orders
+    # and the late outcome of the first order
+    orders.loc[0, "shipping_date"] = pd.Timestamp("2024-03-12")
+    cube = DelayCube.load(path)
+    assert cube.update(orders) == 4
+    assert cube.query([])[0]["orders"] == 6
+    assert cube.applied.tolist() == list(range(6))
+
+    # The API's read-only copy skips the ids and refuses updates
+    with pytest.raises(ValueError):
+        DelayCube.load(path, applied=False).update(orders)
+
+
+def test_rates_endpoint_serves_saved_cube(tmp_path, monkeypatch):
+    path = str(tmp_path / "cube.npz")
+    cube = DelayCube()
+    cube.update(make_orders())
+    cube.save(path)
+    monkeypatch.setattr(api.main, "delay_cube", CubeReader(path))
+    client = TestClient(api.main.app)
+
+    response = client.get("/cube/rates", params={"group_by": "device_type", "channel": ["Email", "Social"]})
+    assert response.status_code == 200
+    rows = response.json()["rows"]
+    assert {row["device_type"] for row in rows} == {"Desktop", "Mobile"}
+    assert sum(row["orders"] for row in rows) == 1500
+
+    assert client.get("/cube/rates", params={"group_by": "warehouse"}).status_code == 400
+    assert client.get("/cube").json()["orders"] == 1500
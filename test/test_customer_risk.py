@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipelines.customer_risk import ExpandingRisk, iter_customer_risk
+from pipelines.storage import write_orders
+
+
+def make_orders(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    orders = pd.DataFrame({
+        "customer_id": rng.integers(0, 40, rows),
+        "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D"),
+        "delivery_delayed": rng.integers(0, 2, rows).astype(float),
+        "price": rng.uniform(5, 500, rows),
+    })
+    orders["shipping_date"] = orders["order_date"] + pd.to_timedelta(rng.integers(0, 15, rows), unit="D")
+    orders.loc[rng.choice(rows, 20, replace=False), "delivery_delayed"] = np.nan
+    return orders
+
+
+def brute_force_risk(orders):
+    scores = []
+    for row in orders.itertuples():
+        earlier = orders[(orders["shipping_date"] < row.order_date) & orders["delivery_delayed"].notna()]
+        overall = earlier["delivery_delayed"].mean() if len(earlier) else 0.0
+        history = earlier.loc[earlier["customer_id"] == row.customer_id, "delivery_delayed"]
+        scores.append(history.mean() if len(history) else overall)
+    return np.array(scores)
+
+
+def test_expanding_risk_uses_only_outcomes_known_earlier():
+    orders = make_orders()
+    months = orders["order_date"].dt.strftime("%Y-%m")
+
+    risk = ExpandingRisk()
+    scores = np.empty(len(orders))
+    for month in sorted(months.unique()):
+        in_month = (months == month).to_numpy()
+        scores[in_month] = risk.score(orders[in_month])
+
+    assert np.allclose(scores, brute_force_risk(orders))
+    # With the pending outcomes folded, carried counts are the full-history rates
+    risk.flush()
+    full = orders.dropna(subset=["delivery_delayed"]).groupby("customer_id")["delivery_delayed"]
+    assert risk.customers.tolist() == full.count().index.tolist()
+    assert risk.orders.tolist() == full.count().tolist()
+
+    with pytest.raises(ValueError):
+        risk.score(orders.head(5))  # older than the watermark
+
+
+def test_iter_customer_risk_keeps_history_before_start(tmp_path):
+    orders = make_orders(seed=1)
+    path = str(tmp_path / "orders")
+    write_orders(orders, path)
+
+    expected = orders.assign(customer_risk_score=brute_force_risk(orders))
+    expected = expected[expected["order_date"] >= "2024-02-01"]
+
+    chunks = list(iter_customer_risk(path, ["price"], start="2024-02"))
+    loaded = pd.concat(chunks, ignore_index=True)
+
+    assert len(chunks) == 2  # one per month partition
+    assert len(loaded) == len(expected)
+    merged = loaded.merge(expected, on=["customer_id", "order_date", "price"], suffixes=("", "_expected"))
+    assert np.allclose(merged["customer_risk_score"], merged["customer_risk_score_expected"])
+
+
+def test_outcome_counts_only_once_shipped():
+    orders = pd.DataFrame({
+        "customer_id": [7, 7, 7],
+        "order_date": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-10"]),
+        # The first order is placed earlier but ships after the second is placed
+        "shipping_date": pd.to_datetime(["2024-01-08", "2024-01-04", "2024-01-12"]),
+        "delivery_delayed": [1.0, 0.0, 1.0],
+    })
+
+    risk = ExpandingRisk()
+    assert risk.score(orders.iloc[:2]).tolist() == [0.0, 0.0]
+    assert risk.total_orders == 0  # both outcomes ship after 2024-01-03: still pending
+    assert risk.score(orders.iloc[2:]).tolist() == [0.5]
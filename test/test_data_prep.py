@@ -0,0 +1,59 @@
+import pandas as pd
+
+from pipelines.data_prep import prepare_orders
+from pipelines.storage import period_filters, read_orders
+
+RAW_CSV = """order_id,customer_id,product_id,category,price,quantity,order_date,shipping_date,channel
+a,1,10,Books,10.0,1,2024-01-01,2024-01-03,Email
+b,2,11,Books,,2,2024-01-01,2024-01-09,Email
+c,3,12,,30.0,,2024-01-02,2024-01-04,Social
+d,4,13,Toys,40.0,3,2024-01-02,2024-01-10,
+e,5,14,Books,50.0,1,2024-01-03,2024-01-08,Email
+"""
+
+
+def test_chunked_prep_matches_full_column_statistics(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    out_path = tmp_path / "processed.csv"
+    raw_path.write_text(RAW_CSV)
+
+    stats = prepare_orders(str(raw_path), str(out_path), chunksize=2)
+    df = pd.read_csv(out_path)
+
+    assert stats["rows"] == 5
+    assert df.loc[1, "price"] == 35.0        # median of 10, 30, 40, 50
+    assert df.loc[2, "quantity"] == 2        # median of 1, 2, 3, 1 = 1.5, rounded
+    assert df.loc[2, "category"] == "Books"  # mode
+    assert df.loc[3, "channel"] == "Email"
+    assert df["delivery_days"].tolist() == [2, 8, 2, 8, 5]
+    assert df["delivery_delayed"].tolist() == [0, 1, 0, 1, 0]
+
+
+def test_parquet_output_supports_projection_and_month_filters(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    out_path = tmp_path / "processed.parquet"
+    raw_path.write_text(RAW_CSV.replace("2024-01-03,2024-01-08", "2024-02-03,2024-02-08"))
+
+    prepare_orders(str(raw_path), str(out_path), chunksize=2)
+    df = read_orders(
+        str(out_path),
+        columns=["category", "delivery_delayed"],
+        filters=period_filters("2024-02", "2024-02")
+    )
+
+    assert list(df.columns) == ["category", "delivery_delayed"]
+    assert len(df) == 1
+    assert isinstance(df["category"].dtype, pd.CategoricalDtype)
+
+
+def test_unshipped_orders_have_no_target(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    out_path = tmp_path / "processed.parquet"
+    raw_path.write_text(RAW_CSV + "f,6,15,Toys,20.0,1,2024-01-04,,Email\n")
+
+    stats = prepare_orders(str(raw_path), str(out_path), chunksize=2)
+    df = read_orders(str(out_path), columns=["order_id", "delivery_delayed"])
+
+    assert df["delivery_delayed"].isna().tolist() == [False] * 5 + [True]
+    assert stats["unshipped"] == 1
+    assert stats["delayed_pct"] == 40.0
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pipelines.drift import DriftMonitor, DriftProfile, NumericSketch
+
+
+def make_features(rows, seed, price_shift=0.0, category_p=None):
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(5, 500, rows) + price_shift
+    return pd.DataFrame({
+        "price": price,
+        "order_value": price * rng.integers(1, 5, rows),
+        "customer_risk_score": rng.beta(2, 5, rows),
+        "category": rng.choice(["Books", "Home", "Toys"], rows, p=category_p),
+        "channel": rng.choice(["Email", "Social"], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+    })
+
+
+def test_monitor_flags_shifted_features_only():
+    profile = DriftProfile.from_dict(DriftProfile.fit(make_features(50_000, seed=0)).to_dict())
+
+    same = DriftMonitor(profile).update(make_features(20_000, seed=1)).report()
+    assert same["rows"] == 20_000
+    assert same["drifted"] == []
+
+    monitor = DriftMonitor(profile, batch_size=100)
+    for record in make_features(5_000, seed=2, price_shift=100, category_p=[0.6, 0.2, 0.2]).to_dict("records"):
+        monitor.add(record)
+    shifted = monitor.report(reset=True)
+
+    assert {"price", "order_value", "category"} <= set(shifted["drifted"])
+    assert "channel" not in shifted["drifted"]
+    assert shifted["features"]["price"]["psi"] > 0.2
+    assert monitor.report()["rows"] == 0
+
+
+def test_monitor_folds_full_buffers_off_the_calling_thread():
+    profile = DriftProfile.fit(make_features(1_000, seed=0))
+    monitor = DriftMonitor(profile, batch_size=50)
+    fold = monitor.fold
+    folded_on = []
+    monitor.fold = lambda: folded_on.append(threading.current_thread().name) or fold()
+
+    for record in make_features(120, seed=1).to_dict("records"):
+        monitor.add(record)
+
+    assert monitor.report()["rows"] == 120
+    assert folded_on[0].startswith("drift-fold")
+    monitor.close()
+
+
+def test_sketches_merge_like_a_single_pass():
+    values = np.random.default_rng(0).normal(size=10_000)
+    whole = NumericSketch.fit(values, bins=10)
+
+    first = whole.empty().update(values[:4000])
+    second = whole.empty().update(np.append(values[4000:], np.nan))
+
+    merged = first.merge(second)
+    assert (merged.counts == whole.counts).all()
+    assert merged.missing == 1
+    assert len(merged.counts) == 10
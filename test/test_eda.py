@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from pipelines.eda import DelayAggregate, aggregate_orders, wilson_interval, write_outputs
+from pipelines.synthetic import load_delay_rates
+
+
+def make_orders(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "category": rng.choice(["Books", "Home", "Toys"], rows),
+        "customer_segment": rng.choice(["New", "VIP"], rows),
+        "channel": rng.choice(["Email", "Social", None], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+        "delivery_delayed": rng.integers(0, 2, rows),
+    })
+    return df
+
+
+def test_chunked_aggregate_matches_groupby():
+    df = make_orders()
+    aggregate = DelayAggregate().update(df.iloc[:700]).merge(DelayAggregate().update(df.iloc[700:]))
+
+    assert aggregate.orders == len(df)
+    for column in ["category", "channel", "device_type"]:
+        expected = df.groupby(column)["delivery_delayed"].mean()
+        got = aggregate.breakdown(column).set_index(column)["delay_rate"]
+        pd.testing.assert_series_equal(got.sort_index(), expected.sort_index(), check_names=False)
+
+    expected = pd.pivot_table(df, values="delivery_delayed", index="category", columns="channel", aggfunc="mean")
+    np.testing.assert_allclose(aggregate.pivot("category", "channel").to_numpy(), expected.to_numpy())
+
+    low, high = wilson_interval(45, 100)
+    assert round(float(low), 4) == 0.3561 and round(float(high), 4) == 0.5476
+
+
+def test_writes_eda_tables_from_csv(tmp_path):
+    make_orders().to_csv(tmp_path / "orders.csv", index=False)
+
+    aggregate = aggregate_orders(str(tmp_path / "orders.csv"), batch_size=500)
+    write_outputs(aggregate, str(tmp_path))
+
+    table = pd.read_csv(tmp_path / "eda_category_delay.csv")
+    assert list(table.columns) == ["category", "delay_rate", "orders", "delayed", "ci_low", "ci_high"]
+    assert table["delay_rate"].is_monotonic_decreasing
+    assert ((table["ci_low"] < table["delay_rate"]) & (table["delay_rate"] < table["ci_high"])).all()
+    assert set(load_delay_rates(str(tmp_path))["customer_segment"]) == {"New", "VIP"}
+    assert (tmp_path / "eda_category_channel_delay.csv").exists()
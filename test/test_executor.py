@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+import pytest
+
+from api.executor import InferenceExecutor, InferenceSaturated
+
+
+def test_rejects_work_beyond_max_pending():
+    release = threading.Event()
+
+    def score(records):
+        release.wait(5)
+        return records
+
+    async def run():
+        executor = InferenceExecutor(score, max_workers=1, max_pending=2, retry_after=3)
+        running = [asyncio.ensure_future(executor.score([i])) for i in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferenceSaturated) as exc_info:
+            await executor.score([99])
+
+        release.set()
+        results = await asyncio.gather(*running)
+        executor.shutdown()
+        return results, exc_info.value, executor.stats()
+
+    results, error, stats = asyncio.run(run())
+
+    assert results == [[0], [1]]
+    assert error.retry_after == 3
+    assert stats["rejected"] == 1 and stats["pending"] == 0
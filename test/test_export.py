@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from api.compact import CompactForest
+from api.scoring import Scorer
+from pipelines.export import build_variants, out_of_bag_rows, prune_forest
+
+
+def make_pipeline():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "price": rng.uniform(5, 500, 200),
+        "quantity": rng.integers(1, 5, 200),
+        "category": rng.choice(["Books", "Home", "Toys"], 200),
+    })
+    df["order_value"] = df["price"] * df["quantity"]
+    y = (df["order_value"] > 400).astype(int)
+
+    preprocessor = ColumnTransformer([
+        ("num", StandardScaler(), ["price", "quantity", "order_value"]),
+        ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), ["category"])
+    ])
+    pipeline = Pipeline([
+        ("preprocessor", preprocessor),
+        ("model", RandomForestClassifier(n_estimators=10, random_state=42))
+    ])
+    return pipeline.fit(df, y), df.to_dict("records")
+
+
+def test_compact_forest_matches_sklearn_forest():
+    pipeline, records = make_pipeline()
+    forest = pipeline[-1]
+    X = pipeline[0].transform(pd.DataFrame(records))
+
+    compact = CompactForest.from_forest(forest)
+
+    assert np.allclose(compact.predict_proba(X), forest.predict_proba(X), atol=1e-6)
+    assert (compact.predict(X) == forest.predict(X)).all()
+    assert compact.threshold.dtype == np.float32
+
+    # Drops into the serving pipeline, compiled path included
+    served = Pipeline([("preprocessor", pipeline[0]), ("model", compact)])
+    assert np.allclose(
+        Scorer(served, compiled=True).predict_proba(records[:5]),
+        forest.predict_proba(X[:5])[:, 1],
+        atol=1e-6
+    )
+
+
+def test_variants_keep_preprocessor_and_prune_forest():
+    pipeline, records = make_pipeline()
+    df = pd.DataFrame(records)
+    y = (df["order_value"] > 400).astype(int)
+
+    pruned = prune_forest(pipeline[-1], pipeline[0].transform(df), y, 3)
+    assert len(pruned.estimators_) == 3
+    assert len(pipeline[-1].estimators_) == 10
+
+    variants = build_variants(pipeline, df, y, top_k=(3,))
+    assert set(variants) == {
+        "baseline", "float32", "top3", "top3_float32", "distilled_logistic", "distilled_hgb"
+    }
+    for variant in variants.values():
+        assert variant.predict_proba(df.head()).shape == (5, 2)
+
+
+def test_out_of_bag_rows_match_sklearn_oob_predictions():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] + rng.normal(scale=0.5, size=300) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=25, max_samples=0.8, oob_score=True, random_state=0).fit(X, y)
+
+    # Averaging each tree's votes over its out-of-bag rows rebuilds sklearn's OOB estimate
+    votes, seen = np.zeros((len(X), 2)), np.zeros(len(X))
+    for tree in forest.estimators_:
+        rows = out_of_bag_rows(forest, tree, len(X))
+        votes[rows] += tree.predict_proba(X[rows])
+        seen[rows] += 1
+    covered = seen > 0
+    assert np.allclose(votes[covered] / seen[covered, None], forest.oob_decision_function_[covered])
+
+
+def test_compact_forest_refits_in_a_pipeline():
+    pipeline, records = make_pipeline()
+    df = pd.DataFrame(records)
+    y = (df["order_value"] > 400).astype(int)
+
+    compact = Pipeline([("preprocessor", pipeline[0]), ("model", CompactForest.from_forest(pipeline[-1]))])
+    compact.fit(df, y)
+    assert compact[-1].n_trees == 100  # RandomForestClassifier() default
+    assert compact.predict(df).shape == (len(df),)
@@ -0,0 +1,76 @@
+import pandas as pd
+
+from pipelines.feature_store import CustomerFeatureStore
+
+
+def orders(rows):
+    return pd.DataFrame(rows, columns=["order_id", "customer_id", "delivery_delayed", "order_date"]).assign(
+        order_date=lambda df: pd.to_datetime(df["order_date"])
+    )
+
+
+def test_update_accumulates_counts_incrementally(tmp_path):
+    store = CustomerFeatureStore(str(tmp_path / "features.db"))
+    store.update(orders([(1, 1, 1, "2024-05-01"), (2, 1, 0, "2024-05-02"), (3, 2, 0, "2024-05-02")]))
+    store.update(orders([(4, 1, 1, "2024-06-01"), (5, 3, 1, "2024-06-01")]))
+    store.refresh()
+
+    assert store.risk_score(1) == 2 / 3
+    assert store.risk_score(2) == 0.0
+    assert store.risk_score(3) == 1.0
+    # Unknown customers fall back to the global delay rate
+    assert store.risk_score(99) == 3 / 5
+
+
+def test_update_skips_orders_already_applied(tmp_path):
+    path = str(tmp_path / "features.db")
+    batch = orders([(1, 1, 1, "2024-05-01"), (2, 2, 0, "2024-05-03")])
+
+    writer = CustomerFeatureStore(path, load_index=False)
+    assert writer.update(batch) == 2
+    assert writer.update(batch) == 0
+    assert writer.update(orders([(3, 2, 1, "2024-05-04")])) == 1
+
+    # A separate reader sees the writer's changes on refresh
+    reader = CustomerFeatureStore(path)
+    assert reader.risk_score(2) == 0.5
+    assert list(reader.risk_scores(pd.Series([1, 2, 7]))) == [1.0, 0.5, 2 / 3]
+
+
+def test_overlapping_export_applies_rest_of_watermark_day(tmp_path):
+    store = CustomerFeatureStore(str(tmp_path / "features.db"))
+    # First export: part of 2024-05-03, and order 3 not delivered yet
+    first = orders([(1, 1, 1, "2024-05-02"), (2, 1, 0, "2024-05-03"), (3, 2, None, "2024-05-01")])
+    assert store.update(first) == 2
+    assert store.watermark == pd.Timestamp("2024-05-03")
+
+    # Second export repeats the watermark day with its remaining orders and
+    # order 3's late outcome
+    second = orders([
+        (2, 1, 0, "2024-05-03"), (4, 1, 1, "2024-05-03"), (3, 2, 1, "2024-05-01"), (5, 2, 0, "2024-05-04")
+    ])
+    assert store.update(second) == 3
+    store.refresh()
+
+    assert store.risk_score(1) == 2 / 3
+    assert store.risk_score(2) == 0.5
+    assert store.stats()["orders"] == 5
+
+
+def test_order_is_counted_once_it_ships(tmp_path):
+    store = CustomerFeatureStore(str(tmp_path / "features.db"))
+    # Order 2 is exported before it ships: no shipping_date yet (the target
+    # alone is not trusted, older exports filled it in as on time)
+    first = orders([(1, 1, 0, "2024-05-01"), (2, 1, 0, "2024-05-02")]).assign(
+        shipping_date=pd.to_datetime(["2024-05-03", None])
+    )
+    assert store.update(first) == 1
+
+    # It ships late and turns up again in the next export
+    second = orders([(2, 1, 1, "2024-05-02")]).assign(shipping_date=pd.to_datetime(["2024-05-12"]))
+    assert store.update(second) == 1
+    assert store.update(second) == 0
+    store.refresh()
+
+    assert store.risk_score(1) == 0.5
+    assert store.stats()["orders"] == 2
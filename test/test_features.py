@@ -4,3 +4,60 @@ def test_order_value_calculation():
     quantity = 2
     order_value = price * quantity
     assert order_value == 200
+
+
+def test_order_feature_builder_batch_matches_record():
+    import pandas as pd
+    from pipelines.feature_eng import OrderFeatureBuilder
+
+    orders = pd.DataFrame({
+        "price": [10.0, 25.5, 4.0],
+        "quantity": [2, 1, 3],
+        "order_date": ["2024-11-04", "2024-03-09 18:30:00", "2024-12-31"],
+        "order_month": [None, None, 7],  # given values are kept
+    })
+    builder = OrderFeatureBuilder()
+    batch = builder.transform(orders)
+
+    assert batch["order_value"].tolist() == [20.0, 25.5, 12.0]
+    assert batch["order_dayofweek"].tolist() == [0, 5, 1]
+    assert batch["order_month"].tolist() == [11, 3, 7]
+    assert batch["is_peak_season"].tolist() == [1, 0, 0]
+    assert "order_value" not in orders  # input left untouched
+
+    for row, record in zip(batch.to_dict("records"), orders.to_dict("records")):
+        record["order_month"] = None if pd.isna(record["order_month"]) else int(record["order_month"])
+        single = builder.transform_record(record)
+        assert {column: single[column] for column in ("order_value", "order_dayofweek", "order_month", "is_peak_season")} \
+            == {column: row[column] for column in ("order_value", "order_dayofweek", "order_month", "is_peak_season")}
+
+
+def test_pipeline_scores_raw_order_date():
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    from api.scoring import Scorer
+    from pipelines.feature_eng import build_model_pipeline
+
+    rng = np.random.default_rng(0)
+    rows = 200
+    X = pd.DataFrame({
+        "price": rng.uniform(5, 500, rows),
+        "quantity": rng.integers(1, 5, rows),
+        "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 366, rows), unit="D"),
+        "customer_risk_score": rng.uniform(0, 1, rows),
+        "category": rng.choice(["Books", "Home"], rows),
+        "customer_segment": rng.choice(["Regular", "VIP"], rows),
+        "channel": rng.choice(["Email", "Social"], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+    })
+    y = (X["order_date"].dt.month >= 10).astype(int)
+    pipeline = build_model_pipeline(LogisticRegression()).fit(X, y)
+
+    records = X.head(5).assign(order_date=X["order_date"].head(5).dt.strftime("%Y-%m-%d")).to_dict("records")
+    expected = pipeline.predict_proba(X.head(5))[:, 1]
+    compiled = Scorer(pipeline, compiled=True)
+
+    assert compiled.compiled is not None
+    assert np.allclose(compiled.predict_proba(records), expected)
+    assert np.allclose(Scorer(pipeline).predict_proba(records), expected)
@@ -0,0 +1,44 @@
+import io
+import json
+import logging
+
+from api.log import PredictionLog, setup_logging, shutdown_logging
+
+
+def test_queue_logging_writes_json_lines():
+    stream = io.StringIO()
+    root_level = logging.getLogger().level
+    handler = setup_logging("WARNING", stream=stream)
+    try:
+        logger = logging.getLogger("test.log")
+        logger.info("dropped by level")
+        logger.warning("Scored %d orders", 3, extra={"fields": {"model_version": "v1"}})
+    finally:
+        shutdown_logging()
+        logging.getLogger().removeHandler(handler)
+        logging.getLogger().setLevel(root_level)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["level"] == "WARNING"
+    assert lines[0]["message"] == "Scored 3 orders"
+    assert lines[0]["model_version"] == "v1"
+
+
+def test_prediction_log_emits_one_summary_per_interval(caplog):
+    log = PredictionLog(logging.getLogger("test.predictions"), sample_rate=0.0, interval=0)
+    payload = {"price": 10.0}
+
+    with caplog.at_level(logging.INFO, logger="test.predictions"):
+        log.record(payload, {"delivery_delayed": 1, "delay_probability": 0.8})
+        log.record(payload, {"delivery_delayed": 0, "delay_probability": 0.2})
+        log.record(payload, error=ValueError("customer_risk_score is required"))
+        log.flush()
+        log.flush()  # nothing new: no empty summary
+
+    assert [record.message for record in caplog.records] == ["Prediction summary"]
+    summary = caplog.records[0].fields
+    assert summary["count"] == 2
+    assert summary["mean_probability"] == 0.5
+    assert summary["delayed_rate"] == 0.5
+    assert summary["errors"] == 1
@@ -0,0 +1,34 @@
+from api.metrics import ApiMetrics, Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=[0.1, 1])
+
+    requests.labels(route="/predict").inc()
+    requests.labels(route="/predict").inc()
+    latency.labels(route='/a"b').observe(0.5)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/predict"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 1' in lines
+    assert 'latency_seconds_count{route="/a\\"b"} 1' in lines
+
+
+def test_stage_timings_are_labelled_with_the_model_version():
+    metrics = ApiMetrics()
+    metrics.set_model("v1")
+    metrics.observe_stages({"inference": 0.02, "queue": 0.001}, rows=3)
+    metrics.set_model("v2")
+
+    text = metrics.render()
+
+    assert 'prediction_stage_duration_seconds_count{stage="inference",model_version="v1"} 1' in text
+    assert 'predictions_total{model_version="v1"} 3' in text
+    assert 'model_info{version="v2"} 1' in text
+    assert 'model_info{version="v1"}' not in text
@@ -1,15 +1,14 @@
 import joblib
 import os
+import pandas as pd
 from dotenv import load_dotenv
 
-MODEL_PATH = "model/delivery_delay_model.pkl"
 load_dotenv()
 
+# Set by test/conftest.py when no real model is configured
 MODEL_PATH = os.getenv("MODEL_PATH")
 
-if not MODEL_PATH:
-    raise ValueError("MODEL_PATH is not set")
-    
+
 def test_model_loads():
     assert os.path.exists(MODEL_PATH)
     model = joblib.load(MODEL_PATH)
@@ -18,18 +17,18 @@ def test_model_loads():
 def test_model_prediction_shape():
     model = joblib.load(MODEL_PATH)
 
-    sample_input = [[
-        59.99,     # price
-        1,         # quantity
-        "Electronics",
-        "Regular",
-        "Direct",
-        "Mobile",
-        2,         # day of week
-        10,        # month
-        0.4        # customer risk
-    ]]
+    sample_input = pd.DataFrame([{
+        "price": 59.99,
+        "quantity": 1,
+        "category": "Electronics",
+        "customer_segment": "Regular",
+        "channel": "Direct",
+        "device_type": "Mobile",
+        "order_dayofweek": 2,
+        "order_month": 10,
+        "customer_risk_score": 0.4,
+        "order_value": 59.99
+    }])
 
     prediction = model.predict(sample_input)
     assert prediction[0] in [0, 1]
-
@@ -0,0 +1,156 @@
+import os
+
+import joblib
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from api.model import export_uncompressed, load_model
+from api.model_manager import ModelManager, ModelVersionNotFound
+from api.scoring import Scorer
+from pipelines.tracking import Tracker
+
+
+def save_model(model_dir, version, constant, mtime):
+    path = os.path.join(model_dir, f"{version}.pkl")
+    model = DummyClassifier(strategy="constant", constant=constant).fit([[0], [1]], [0, 1])
+    joblib.dump(model, path)
+    os.utime(path, (mtime, mtime))
+
+
+def build_scorer(pipeline, info):
+    return Scorer(pipeline, version=info.version)
+
+
+def test_serves_newest_and_swaps_on_refresh(tmp_path):
+    save_model(tmp_path, "v1", 0, 1000)
+    swaps = []
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0,
+                           warmup_records=[[0]], on_swap=[swaps.append])
+    manager.start()
+    assert manager.current.version == "v1"
+
+    save_model(tmp_path, "v2", 1, 2000)
+    manager.refresh()
+
+    assert manager.current.version == "v2"
+    assert [loaded.version for loaded in swaps] == ["v1", "v2"]
+
+
+def test_pin_and_rollback(tmp_path):
+    save_model(tmp_path, "v1", 0, 1000)
+    save_model(tmp_path, "v2", 1, 2000)
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+
+    manager.rollback()
+    assert manager.current.version == "v1"
+    assert manager.pinned() == "v1"
+
+    # A pin survives refreshes until it is removed
+    manager.refresh()
+    assert manager.current.version == "v1"
+    manager.unpin()
+    assert manager.current.version == "v2"
+
+
+def test_rollback_from_pinned_old_version_goes_further_back(tmp_path):
+    for i, version in enumerate(["v1", "v2", "v3"]):
+        save_model(tmp_path, version, i % 2, 1000 * (i + 1))
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+    manager.pin("v2")
+    # A fresh process: no serving history, only the pin on disk
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+    assert manager.current.version == "v2"
+
+    manager.rollback()
+    assert manager.current.version == "v1"
+
+
+def test_repeated_rollback_keeps_moving_back(tmp_path):
+    save_model(tmp_path, "v1", 0, 1000)
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+    for i, version in enumerate(["v2", "v3"]):
+        save_model(tmp_path, version, i % 2, 2000 + 1000 * i)
+        manager.refresh()
+    assert manager.history == ["v1", "v2", "v3"]
+
+    manager.rollback()
+    assert manager.current.version == "v2"
+    manager.rollback()
+    assert manager.current.version == "v1"
+
+
+def test_rollback_without_older_version_fails(tmp_path):
+    save_model(tmp_path, "v1", 0, 1000)
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+
+    with pytest.raises(ModelVersionNotFound):
+        manager.rollback()
+
+
+def test_serves_registry_production_version(tmp_path):
+    tracker = Tracker(str(tmp_path / "tracking"))
+    for constant in (0, 1):
+        save_model(tmp_path, f"m{constant}", constant, 1000)
+        with tracker.start_run("delivery_delay") as run:
+            run.log_artifact(str(tmp_path / f"m{constant}.pkl"), "model.pkl")
+        tracker.register_model("DeliveryDelayModel", run.run_id)
+    tracker.transition("DeliveryDelayModel", 1, "production")
+
+    manager = ModelManager(build_scorer, registry=tracker, model_name="DeliveryDelayModel", poll_interval=0)
+    manager.start()
+    assert manager.current.version == "v1"
+
+    tracker.transition("DeliveryDelayModel", 2, "production")
+    manager.refresh()
+    assert manager.current.version == "v2"
+
+    manager.rollback()
+    assert manager.current.version == "v1"
+    assert tracker.get_version("DeliveryDelayModel", stage="production").version == 1
+
+
+def test_broken_artifact_keeps_current_model(tmp_path):
+    save_model(tmp_path, "v1", 0, 1000)
+    manager = ModelManager(build_scorer, model_dir=str(tmp_path), poll_interval=0)
+    manager.start()
+
+    broken = tmp_path / "v2.pkl"
+    broken.write_bytes(b"not a pickle")
+    manager.refresh()
+
+    assert manager.current.version == "v1"
+
+
+def test_uncompressed_export_loads_with_mmap(tmp_path):
+    save_model(tmp_path, "v1", 1, 1000)
+    joblib.dump(joblib.load(tmp_path / "v1.pkl"), tmp_path / "v1.z.pkl", compress=3)
+
+    export_uncompressed(str(tmp_path / "v1.z.pkl"), str(tmp_path / "v1.raw.pkl"))
+    model = load_model(str(tmp_path / "v1.raw.pkl"), mmap=True)
+
+    assert model.predict([[0]])[0] == 1
+
+
+def test_registry_serves_nothing_until_a_version_is_promoted(tmp_path):
+    tracker = Tracker(str(tmp_path / "tracking"))
+    save_model(tmp_path, "m0", 0, 1000)
+    with tracker.start_run("delivery_delay") as run:
+        run.log_artifact(str(tmp_path / "m0.pkl"), "model.pkl")
+    tracker.register_model("DeliveryDelayModel", run.run_id)
+
+    manager = ModelManager(build_scorer, registry=tracker, model_name="DeliveryDelayModel", poll_interval=0)
+    with pytest.raises(ModelVersionNotFound, match="promote"):
+        manager.start()
+
+    tracker.transition("DeliveryDelayModel", 1, "production")
+    manager.refresh()
+    assert manager.current.version == "v1"
+
+    # Demoted with nothing promoted in its place: keep serving v1
+    tracker.transition("DeliveryDelayModel", 1, "archived")
+    assert manager.refresh().version == "v1"
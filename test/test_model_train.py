@@ -0,0 +1,98 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipelines import storage
+from pipelines.model_train import core_budget, main
+from pipelines.tracking import Tracker
+
+
+def write_orders(path, rows=400):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "customer_id": rng.integers(1, 60, rows),
+        "price": rng.uniform(5, 500, rows).round(2),
+        "quantity": rng.integers(1, 5, rows),
+        "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 300, rows), unit="D"),
+        "category": rng.choice(["Books", "Home", "Toys"], rows),
+        "customer_segment": rng.choice(["New", "VIP"], rows),
+        "channel": rng.choice(["Email", "Social"], rows),
+        "device_type": rng.choice(["Mobile", "Desktop"], rows),
+    })
+    df["shipping_date"] = df["order_date"] + pd.to_timedelta(rng.integers(1, 8, rows), unit="D")
+    df["delivery_delayed"] = ((df["price"] * df["quantity"] > 500) | (df["category"] == "Toys")).astype(int)
+    storage.write_orders(df, str(path))
+
+
+def test_core_budget_never_oversubscribes():
+    assert core_budget(8, 3) == (3, 2)
+    assert core_budget(2, 4) == (2, 1)
+    assert core_budget(1, 3) == (1, 1)
+
+
+def test_cli_writes_winning_model_and_metrics(tmp_path):
+    data_path = tmp_path / "orders.csv"
+    model_path = tmp_path / "model.pkl"
+    write_orders(data_path)
+
+    metrics = main([
+        "--data", str(data_path), "--output", str(model_path),
+        "--cores", "2", "--no-search",
+        "--tracking-dir", str(tmp_path / "tracking"), "--register", "DeliveryDelayModel", "--stage", "production"
+    ])
+
+    saved = json.loads((tmp_path / "model.metrics.json").read_text())
+    assert saved["winner"] == metrics["winner"]
+    assert set(saved["models"]) >= {"logistic_regression", "decision_tree", "random_forest"}
+    assert saved["models"][saved["winner"]]["f1"] == max(m["f1"] for m in saved["models"].values())
+
+    model = joblib.load(model_path)
+    sample = pd.read_csv(data_path).head(3)
+    sample["order_value"] = sample["price"] * sample["quantity"]
+    sample["order_dayofweek"], sample["order_month"], sample["customer_risk_score"] = 1, 5, 0.2
+    assert model.predict_proba(sample).shape == (3, 2)
+
+    tracker = Tracker(str(tmp_path / "tracking"))
+    production = tracker.get_version("DeliveryDelayModel", stage="production")
+    assert production.run_id == metrics["tracking"]["run_id"]
+    assert joblib.load(production.path).predict_proba(sample).shape == (3, 2)
+    assert tracker.get_run(production.run_id)["metrics"]["f1"] == saved["models"][saved["winner"]]["f1"]
+
+
+def test_out_of_core_training_and_streamed_metrics(tmp_path):
+    from sklearn.metrics import roc_auc_score
+
+    from pipelines.stream_train import StreamingMetrics
+
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 2000)
+    proba = np.clip(0.3 * y_true + rng.uniform(0, 0.7, 2000), 0, 1)
+    streamed = StreamingMetrics()
+    for start in range(0, 2000, 300):
+        streamed.update(y_true[start:start + 300], proba[start:start + 300])
+    assert abs(streamed.result()["roc_auc"] - roc_auc_score(y_true, proba)) < 1e-3
+
+    data_path = tmp_path / "orders"  # month-partitioned Parquet dataset
+    model_path = tmp_path / "model.pkl"
+    write_orders(data_path)
+    metrics = main([
+        "--data", str(data_path), "--output", str(model_path),
+        "--out-of-core", "--epochs", "5", "--batch-size", "64"
+    ])
+
+    assert metrics["mode"] == "out_of_core"
+    assert set(metrics["models"]) == {"sgd_logistic", "sgd_modified_huber"}
+    assert metrics["data"]["train_rows"] + metrics["data"]["test_rows"] == 400
+    model = joblib.load(model_path)
+    assert [name for name, _ in model.steps] == ["features", "preprocessor", "model"]
+    sample = storage.read_orders(str(data_path)).head(3).assign(customer_risk_score=0.2)
+    assert model.predict_proba(sample).shape == (3, 2)
+    assert (tmp_path / "model.drift.json").exists()
+
+    # A CSV would be read whole: rejected rather than silently loaded
+    write_orders(tmp_path / "orders.csv")
+    with pytest.raises(ValueError, match="month-partitioned"):
+        main(["--data", str(tmp_path / "orders.csv"), "--output", str(model_path), "--out-of-core"])
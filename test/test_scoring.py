@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from api.scoring import Scorer
+
+NUM_FEATURES = ["price", "quantity", "order_value"]
+CAT_FEATURES = ["category", "channel"]
+
+
+def make_pipeline():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "price": rng.uniform(5, 500, 200),
+        "quantity": rng.integers(1, 5, 200),
+        "category": rng.choice(["Books", "Home", "Toys"], 200),
+        "channel": rng.choice(["Email", "Social"], 200),
+    })
+    df["order_value"] = df["price"] * df["quantity"]
+    y = (df["order_value"] > 400).astype(int)
+
+    preprocessor = ColumnTransformer([
+        ("num", StandardScaler(), NUM_FEATURES),
+        ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), CAT_FEATURES)
+    ])
+    pipeline = Pipeline([
+        ("preprocessor", preprocessor),
+        ("model", RandomForestClassifier(n_estimators=10, random_state=42))
+    ])
+    return pipeline.fit(df, y), df.to_dict("records")
+
+
+def test_compiled_matches_pipeline():
+    pipeline, records = make_pipeline()
+    records[0]["category"] = "Unseen"
+
+    expected = pipeline.predict_proba(pd.DataFrame(records))[:, 1]
+    compiled = Scorer(pipeline, compiled=True)
+
+    assert compiled.compiled is not None
+    assert np.allclose(compiled.predict_proba(records[:10]), expected[:10])
+
+
+def test_labels_follow_threshold():
+    pipeline, records = make_pipeline()
+    results = Scorer(pipeline, threshold=1.0).score(records)
+
+    assert all(result["delivery_delayed"] == 0 for result in results)
+    assert Scorer(pipeline).score(records[:5]) == [
+        {"delivery_delayed": int(label), "delay_probability": round(float(proba), 3)}
+        for label, proba in zip(
+            pipeline.predict(pd.DataFrame(records[:5])),
+            pipeline.predict_proba(pd.DataFrame(records[:5]))[:, 1]
+        )
+    ]
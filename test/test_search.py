@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from pipelines.search import SuccessiveHalvingSearch
+
+PARAM_GRID = {
+    "model__max_depth": [1, 2, 4],
+    "model__min_samples_split": [2, 10, 50]
+}
+
+
+def make_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "price": rng.uniform(5, 500, 300),
+        "quantity": rng.integers(1, 5, 300),
+        "category": rng.choice(["Books", "Home", "Toys"], 300),
+    })
+    y = ((X["price"] * X["quantity"] > 600) ^ (X["category"] == "Toys")).astype(int)
+    return X, y
+
+
+def make_search(checkpoint_path):
+    preprocessor = ColumnTransformer([
+        ("num", StandardScaler(), ["price", "quantity"]),
+        ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), ["category"])
+    ])
+    return SuccessiveHalvingSearch(
+        preprocessor, DecisionTreeClassifier(random_state=0), PARAM_GRID,
+        cv=3, eta=3, checkpoint_path=checkpoint_path
+    )
+
+
+def test_halving_drops_candidates_fold_by_fold(tmp_path):
+    X, y = make_data()
+    search = make_search(str(tmp_path / "trials.jsonl")).fit(X, y)
+
+    assert [rung["candidates"] for rung in search.rungs_] == [9, 3, 1]
+    assert len(search.trials_) == 13
+    assert all(trial["fit_seconds"] >= 0 for trial in search.trials_)
+    assert search.best_estimator_.predict(X.head()).shape == (5,)
+
+
+def test_interrupted_search_resumes_from_checkpoint(tmp_path):
+    X, y = make_data()
+    checkpoint = tmp_path / "trials.jsonl"
+    expected = make_search(str(checkpoint)).fit(X, y)
+
+    # Keep only the first rung, as if the search died after fold 0
+    lines = checkpoint.read_text().splitlines()
+    checkpoint.write_text("\n".join(line for line in lines if json.loads(line)["fold"] == 0) + "\n")
+
+    resumed = make_search(str(checkpoint)).fit(X, y)
+    summary = resumed.summary()
+
+    assert summary["trials_resumed"] == 9
+    assert summary["trials_fitted"] == 4
+    assert resumed.best_params_ == expected.best_params_
+
+
+def test_checkpoint_is_not_reused_for_other_data_or_preprocessor(tmp_path):
+    X, y = make_data()
+    checkpoint = str(tmp_path / "trials.jsonl")
+    make_search(checkpoint).fit(X, y)
+
+    # Same shape, columns and target, different feature values
+    scaled = X.assign(price=X["price"] * 2)
+    assert make_search(checkpoint).fit(scaled, y).summary()["trials_resumed"] == 0
+
+    other = make_search(checkpoint)
+    other.preprocessor.set_params(num__with_mean=False)
+    assert other.fit(X, y).summary()["trials_resumed"] == 0
+    assert make_search(checkpoint).fit(X, y).summary()["trials_resumed"] == 13
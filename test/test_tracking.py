@@ -0,0 +1,43 @@
+import pytest
+
+from pipelines.tracking import RegistryError, Tracker
+
+
+def log_run(tracker, tmp_path, f1):
+    artifact = tmp_path / f"model-{f1}.pkl"
+    artifact.write_bytes(b"model")
+    with tracker.start_run("delivery_delay") as run:
+        run.log_params({"n_estimators": 200, "max_depth": None})
+        run.log_metrics({"f1": f1, "roc_auc": 0.8})
+        run.log_artifact(str(artifact), "model.pkl")
+    return run.run_id
+
+
+def test_runs_are_ranked_by_metric(tmp_path):
+    tracker = Tracker(str(tmp_path / "tracking"))
+    for f1 in (0.61, 0.74, 0.68):
+        log_run(tracker, tmp_path, f1)
+
+    runs = tracker.search_runs("delivery_delay", order_by="f1")
+
+    assert [run["metrics"]["f1"] for run in runs] == [0.74, 0.68, 0.61]
+    assert runs[0]["params"] == {"n_estimators": 200, "max_depth": None}
+    assert runs[0]["status"] == "finished"
+
+
+def test_promotion_archives_previous_production(tmp_path):
+    tracker = Tracker(str(tmp_path / "tracking"))
+    first = tracker.register_model("DeliveryDelayModel", log_run(tracker, tmp_path, 0.61))
+    second = tracker.register_model("DeliveryDelayModel", log_run(tracker, tmp_path, 0.74))
+    assert (first.version, second.version) == (1, 2)
+
+    tracker.transition("DeliveryDelayModel", 1, "production")
+    assert tracker.get_version("DeliveryDelayModel", stage="production").version == 1
+
+    promoted = tracker.promote_best("DeliveryDelayModel", metric="f1")
+    assert promoted.version == 2 and promoted.stage == "production"
+    assert tracker.get_version("DeliveryDelayModel", 1).stage == "archived"
+    assert tracker.compare_versions("DeliveryDelayModel", "f1") == [(2, "production", 0.74), (1, "archived", 0.61)]
+
+    with pytest.raises(RegistryError):
+        tracker.get_version("DeliveryDelayModel", stage="staging")